@@ -0,0 +1,128 @@
+"""Command line interface for exporting and importing the catalog.
+
+Usage:
+    python -m app export [--gzip] [--batch-size N] [-o FILE]
+    python -m app import [--batch-size N] [-i FILE]
+    python -m app snapshot [--batch-size N] -o FILE
+
+The storage is given by the same environment variables as for the service. A
+file name ending in .gz is read or written gzip compressed. A snapshot is
+served read-only by the service with STORAGE_BACKEND=snapshot.
+"""
+
+import argparse
+import asyncio
+import sys
+from collections.abc import AsyncIterator
+from contextlib import nullcontext
+from pathlib import Path
+from typing import BinaryIO
+
+from .adapters import CompetitionFormatsAdapter, write_snapshot
+from .main import create_storage
+from .services import CatalogService
+
+# Bytes read from the input per chunk when importing:
+READ_CHUNK_SIZE = 64 * 1024
+
+
+async def read_chunks(file: BinaryIO) -> AsyncIterator[bytes]:
+    """Read a file in chunks."""
+    while chunk := file.read(READ_CHUNK_SIZE):
+        yield chunk
+
+
+async def export_catalog(args: argparse.Namespace, file: BinaryIO) -> None:
+    """Write the catalog to the file."""
+    async for chunk in CatalogService.export_competition_formats(
+        batch_size=args.batch_size, compress=args.gzip
+    ):
+        file.write(chunk)
+
+
+async def import_catalog(args: argparse.Namespace, file: BinaryIO) -> None:
+    """Read the catalog from the file, and report the outcome on stderr."""
+    result = await CatalogService.import_competition_formats(
+        read_chunks(file), batch_size=args.batch_size, compressed=args.gzip
+    )
+    for error in result.errors:
+        print(error, file=sys.stderr)
+    print(
+        f"Created {result.created}, replaced {result.replaced}, invalid {result.invalid}.",
+        file=sys.stderr,
+    )
+
+
+async def snapshot_catalog(args: argparse.Namespace, file: BinaryIO) -> None:
+    """Write a snapshot of the catalog to the file."""
+    count = await write_snapshot(
+        file,
+        CompetitionFormatsAdapter.stream_competition_formats(
+            batch_size=args.batch_size
+        ),
+    )
+    print(f"Wrote {count} competition formats to the snapshot.", file=sys.stderr)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app", description="Export or import the catalog."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="export as ndjson")
+    export_parser.add_argument("-o", "--output", type=Path, help="default: stdout")
+    import_parser = commands.add_parser("import", help="import from ndjson")
+    import_parser.add_argument("-i", "--input", type=Path, help="default: stdin")
+    snapshot_parser = commands.add_parser(
+        "snapshot", help="write a snapshot to serve read-only"
+    )
+    snapshot_parser.add_argument("-o", "--output", type=Path, required=True)
+    for command_parser in (export_parser, import_parser):
+        command_parser.add_argument(
+            "--gzip", action="store_true", help="gzip compressed"
+        )
+    for command_parser in (export_parser, import_parser, snapshot_parser):
+        command_parser.add_argument(
+            "--batch-size", type=int, default=100, help="formats per db round trip"
+        )
+    args = parser.parse_args(argv)
+    if args.command != "snapshot":
+        path = args.output if args.command == "export" else args.input
+        args.gzip = args.gzip or (path is not None and path.suffix == ".gz")
+    return args
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Connect to the db and run the command."""
+    storage = await create_storage()
+    try:
+        await CompetitionFormatsAdapter.init(storage)
+        if args.command == "export":
+            output = (
+                args.output.open("wb")
+                if args.output
+                else nullcontext(sys.stdout.buffer)
+            )
+            with output as file:
+                await export_catalog(args, file)
+        elif args.command == "snapshot":
+            with args.output.open("wb") as file:
+                await snapshot_catalog(args, file)
+        else:
+            input_ = (
+                args.input.open("rb") if args.input else nullcontext(sys.stdin.buffer)
+            )
+            with input_ as file:
+                await import_catalog(args, file)
+    finally:
+        await storage.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the command line interface."""
+    asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
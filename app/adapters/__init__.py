@@ -1,6 +1,50 @@
 """Package for all adapters."""
 
 from .competition_formats_adapter import CompetitionFormatsAdapter
+from .documents import SCHEMA_VERSION, read_document
 from .liveness_adapter import LivenessAdapter
+from .memory_storage import InMemoryCompetitionFormatsStorage
+from .mongo_pool import (
+    MongoClientSettings,
+    PoolMetricsListener,
+    PoolStats,
+    open_min_pool,
+    pool_metrics_listener,
+)
+from .mongo_storage import MongoCompetitionFormatsStorage
+from .name_index import NameSearchMode, normalize_name
+from .pagination import InvalidCursorError, decode_cursor, encode_cursor
+from .replica_storage import ReplicaCompetitionFormatsStorage
+from .snapshot_storage import SnapshotCompetitionFormatsStorage, write_snapshot
+from .sqlite_storage import SqliteCompetitionFormatsStorage
+from .storage import (
+    CompetitionFormatsStorage,
+    ReadOnlyStorageError,
+    StorageBackend,
+)
 
-__all__ = ["CompetitionFormatsAdapter", "LivenessAdapter"]
+__all__ = [
+    "SCHEMA_VERSION",
+    "CompetitionFormatsAdapter",
+    "CompetitionFormatsStorage",
+    "InMemoryCompetitionFormatsStorage",
+    "InvalidCursorError",
+    "LivenessAdapter",
+    "MongoClientSettings",
+    "MongoCompetitionFormatsStorage",
+    "NameSearchMode",
+    "PoolMetricsListener",
+    "PoolStats",
+    "ReadOnlyStorageError",
+    "ReplicaCompetitionFormatsStorage",
+    "SnapshotCompetitionFormatsStorage",
+    "SqliteCompetitionFormatsStorage",
+    "StorageBackend",
+    "decode_cursor",
+    "encode_cursor",
+    "normalize_name",
+    "open_min_pool",
+    "pool_metrics_listener",
+    "read_document",
+    "write_snapshot",
+]
@@ -1,89 +1,239 @@
 """Module for competition_format adapter."""
 
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 from uuid import UUID
 
-from pydantic import TypeAdapter
+from app.models import (
+    CompetitionFormatSummary,
+    CompetitionFormatUnion,
+    CompetitionFormatView,
+)
 
-from app.models import CompetitionFormatUnion
+from .name_index import NameSearchMode
+from .storage import CompetitionFormatsStorage
 
 
 class CompetitionFormatsAdapter:
-    """Class representing an adapter for competition_formats."""
+    """Class representing an adapter for competition_formats.
 
-    database: Any
+    Every operation is delegated to the storage given to init, so that the
+    services do not depend on which storage is used.
+    """
+
+    storage: CompetitionFormatsStorage
     logger: logging.Logger
 
     @classmethod
-    async def init(cls, database: Any) -> None:  # pragma: no cover
-        """Initialize class properties."""
-        cls.database = database
+    async def init(cls, storage: CompetitionFormatsStorage) -> None:
+        """Initialize class properties, and prepare the storage."""
+        cls.storage = storage
         cls.logger = logging.getLogger("uvicorn.error")
+        await storage.init()
 
     @classmethod
     async def get_all_competition_formats(
         cls: Any,
-    ) -> list[CompetitionFormatUnion]:  # pragma: no cover
-        """Get all competition_formats function."""
-        cursor = cls.database.competition_formats_collection.find()
-        return [
-            TypeAdapter(CompetitionFormatUnion).validate_python(competition_format)
-            for competition_format in await cursor.to_list(None)
-        ]
+        limit: int,
+        after: tuple[str, UUID] | None = None,
+    ) -> list[CompetitionFormatUnion]:
+        """Get a page of competition_formats ordered by (name_key, id).
+
+        Args:
+            limit: the maximum number of competition_formats on the page
+            after: the (name_key, id) of the last item on the previous page
+        """
+        return await cls.storage.get_all_competition_formats(limit, after)
+
+    @classmethod
+    async def get_all_competition_format_summaries(
+        cls: Any,
+        limit: int,
+        after: tuple[str, UUID] | None = None,
+    ) -> list[CompetitionFormatSummary]:
+        """Get a page of competition_formats as summaries, ordered by (name_key, id)."""
+        return await cls.storage.get_all_competition_format_summaries(limit, after)
+
+    @classmethod
+    async def get_competition_format_revisions(
+        cls: Any,
+        limit: int,
+        after: tuple[str, UUID] | None = None,
+    ) -> list[tuple[UUID, int]]:
+        """Get the (id, revision) of a page of competition_formats."""
+        return await cls.storage.get_competition_format_revisions(limit, after)
+
+    @classmethod
+    def stream_competition_formats(
+        cls: Any, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatUnion]:
+        """Iterate over all competition_formats, fetching batch_size at a time."""
+        return cls.storage.stream_competition_formats(batch_size)
+
+    @classmethod
+    def stream_competition_format_summaries(
+        cls: Any, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatSummary]:
+        """Iterate over summaries of all competition_formats, batch_size at a time."""
+        return cls.storage.stream_competition_format_summaries(batch_size)
+
+    @classmethod
+    def serves_json(cls: Any) -> bool:
+        """Check if the storage returns the json of formats as is."""
+        storage = getattr(cls, "storage", None)
+        return storage.serves_json() if storage else False
+
+    @classmethod
+    async def get_competition_format_json_by_id(
+        cls: Any, competition_format_id: UUID, view: CompetitionFormatView
+    ) -> tuple[int, bytes | memoryview] | None:
+        """Get the json of a view of a competition_format by id, with its revision."""
+        return await cls.storage.get_competition_format_json_by_id(
+            competition_format_id, view
+        )
+
+    @classmethod
+    async def get_all_competition_format_json(
+        cls: Any,
+        limit: int,
+        view: CompetitionFormatView,
+        after: tuple[str, UUID] | None = None,
+    ) -> list[tuple[str, UUID, int, bytes | memoryview]]:
+        """Get the name_key, id, revision and json of a page of competition_formats."""
+        return await cls.storage.get_all_competition_format_json(limit, view, after)
+
+    @classmethod
+    def stream_competition_format_json(
+        cls: Any, batch_size: int, view: CompetitionFormatView
+    ) -> AsyncIterator[bytes | memoryview]:
+        """Iterate over all competition_formats as lines of newline delimited json."""
+        return cls.storage.stream_competition_format_json(batch_size, view)
 
     @classmethod
     async def create_competition_format(
         cls: Any, competition_format: CompetitionFormatUnion
-    ) -> str:  # pragma: no cover
-        """Create competition_format function."""
-        return await cls.database.competition_formats_collection.insert_one(
-            competition_format.model_dump()
-        )
+    ) -> Any:
+        """Create competition_format function.
+
+        Raises:
+            DuplicateKeyError: a format with the same id or name already exist
+        """
+        return await cls.storage.create_competition_format(competition_format)
+
+    @classmethod
+    async def create_competition_formats(
+        cls: Any, competition_formats: list[CompetitionFormatUnion]
+    ) -> set[int]:
+        """Create many competition_formats in one write.
+
+        Returns:
+            The positions in competition_formats of those that were not
+            created, because a format with the same id or name already exist.
+        """
+        return await cls.storage.create_competition_formats(competition_formats)
+
+    @classmethod
+    async def upsert_competition_formats(
+        cls: Any, competition_formats: list[CompetitionFormatUnion]
+    ) -> tuple[int, int, dict[int, str]]:
+        """Create or replace many competition_formats by id, in one write.
+
+        The revision of every competition_format is set as on update.
+
+        Returns:
+            The number of created and of replaced competition_formats, and the
+            error message for the position of every one that was not written.
+        """
+        return await cls.storage.upsert_competition_formats(competition_formats)
 
     @classmethod
     async def get_competition_format_by_id(
         cls: Any, competition_format_id: UUID
-    ) -> CompetitionFormatUnion | None:  # pragma: no cover
+    ) -> CompetitionFormatUnion | None:
         """Get competition_format by id function."""
-        result = await cls.database.competition_formats_collection.find_one(
-            {"id": competition_format_id}
-        )
-        return (
-            TypeAdapter(CompetitionFormatUnion).validate_python(result)
-            if result
-            else None
+        return await cls.storage.get_competition_format_by_id(competition_format_id)
+
+    @classmethod
+    async def get_competition_format_summary_by_id(
+        cls: Any, competition_format_id: UUID
+    ) -> CompetitionFormatSummary | None:
+        """Get the summary of a competition_format by id."""
+        return await cls.storage.get_competition_format_summary_by_id(
+            competition_format_id
         )
 
+    @classmethod
+    async def get_competition_format_revision(
+        cls: Any, competition_format_id: UUID
+    ) -> int | None:
+        """Get the revision of a competition_format, without reading the rest."""
+        return await cls.storage.get_competition_format_revision(competition_format_id)
+
     @classmethod
     async def get_competition_formats_by_name(
-        cls: Any, competition_format_name: str
-    ) -> list[CompetitionFormatUnion]:  # pragma: no cover
-        """Get competition_format by name function."""
-        query = {"$regex": f".*{competition_format_name}.*", "$options": "i"}
-        cls.logger.debug(f"Query: {query}.")
-        cursor = cls.database.competition_formats_collection.find({"name": query})
-        return [
-            TypeAdapter(CompetitionFormatUnion).validate_python(competition_format)
-            for competition_format in await cursor.to_list(None)
-        ]
+        cls: Any,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatUnion]:
+        """Get competition_formats by name function."""
+        return await cls.storage.get_competition_formats_by_name(
+            competition_format_name, mode=mode, limit=limit
+        )
+
+    @classmethod
+    async def get_competition_format_summaries_by_name(
+        cls: Any,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatSummary]:
+        """Get summaries of competition_formats by name."""
+        return await cls.storage.get_competition_format_summaries_by_name(
+            competition_format_name, mode=mode, limit=limit
+        )
 
     @classmethod
     async def update_competition_format(
         cls: Any,
         competition_format_id: UUID,
         competition_format: CompetitionFormatUnion,
-    ) -> str | None:  # pragma: no cover
-        """Get competition_format function."""
-        return await cls.database.competition_formats_collection.replace_one(
-            {"id": competition_format_id}, competition_format.model_dump()
+        expected_revision: int | None = None,
+    ) -> int | None:
+        """Update competition_format function.
+
+        The competition_format is replaced and its revision incremented in
+        one atomic write.
+
+        Args:
+            competition_format_id: the id of the competition_format
+            competition_format: the new competition_format
+            expected_revision: only update the competition_format if at this revision
+
+        Returns:
+            The new revision, or None if no competition_format matched.
+
+        Raises:
+            DuplicateKeyError: another format with the same name already exist
+        """
+        return await cls.storage.update_competition_format(
+            competition_format_id,
+            competition_format,
+            expected_revision=expected_revision,
         )
 
     @classmethod
-    async def delete_competition_format(
-        cls: Any, competition_format_id: UUID
-    ) -> str | None:  # pragma: no cover
-        """Get competition_format function."""
-        return await cls.database.competition_formats_collection.delete_one(
-            {"id": competition_format_id}
-        )
+    async def delete_competition_format(cls: Any, competition_format_id: UUID) -> Any:
+        """Delete competition_format function."""
+        return await cls.storage.delete_competition_format(competition_format_id)
+
+    @classmethod
+    def watch_competition_format_changes(
+        cls: Any, poll_interval: float
+    ) -> AsyncIterator[UUID | None]:
+        """Yield the id of every competition_format that is changed.
+
+        None is yielded when the id of a change is unknown, as for deletes.
+        """
+        return cls.storage.watch_competition_format_changes(poll_interval)
@@ -0,0 +1,150 @@
+"""Module for the competition_format documents written to a storage.
+
+Every document written by this service is stamped with SCHEMA_VERSION. It
+was validated before it was written, so it is trusted on read: its model is
+built from the stored values without validating them again. A document of
+another version, or without one, is validated in full, as is one missing a
+field of its model.
+
+Durations are stored as integer seconds since version 2, and as "HH:MM:SS"
+in version 1, which is still trusted on read.
+"""
+
+import json
+from datetime import timedelta
+from typing import Any, Literal
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.models import (
+    CompetitionFormatUnion,
+    CompetitionFormatUnionAdapter,
+    IndividualSprintFormat,
+    IntervalStartFormat,
+    RaceConfig,
+)
+
+SCHEMA_VERSION = 2
+TRUSTED_SCHEMA_VERSIONS = {1, SCHEMA_VERSION}
+MODELS: dict[str, type[IntervalStartFormat | IndividualSprintFormat]] = {
+    "interval_start": IntervalStartFormat,
+    "individual_sprint": IndividualSprintFormat,
+}
+FIELDS = {datatype: list(model.model_fields) for datatype, model in MODELS.items()}
+# The fields of every format that are stored as durations:
+DURATION_FIELDS = {
+    datatype: [
+        name
+        for name, field in model.model_fields.items()
+        if field.annotation is timedelta
+    ]
+    for datatype, model in MODELS.items()
+}
+RACE_CONFIGS = ["race_config_ranked", "race_config_non_ranked"]
+RACE_CONFIG_FIELDS = list(RaceConfig.model_fields)
+
+
+def construct[M: BaseModel](model: type[M], values: dict[str, Any]) -> M:
+    """Build a model from trusted values, as model_construct does.
+
+    The values must be every field of the model, already of its type.
+    model_construct also looks up aliases and defaults of every field,
+    which makes it slower than validating the document in pydantic-core.
+    """
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(values))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
+
+
+def duration_fields(competition_format: CompetitionFormatUnion) -> dict[str, int]:
+    """Return the durations of a competition_format as stored, in whole seconds."""
+    return {
+        name: int(getattr(competition_format, name).total_seconds())
+        for name in DURATION_FIELDS[competition_format.datatype]
+    }
+
+
+def is_current(document: dict[str, Any]) -> bool:
+    """Check if a stored document is of the current version, with its revision."""
+    return document.get("schema_version") == SCHEMA_VERSION and "revision" in document
+
+
+def write_document(
+    competition_format: CompetitionFormatUnion,
+    mode: Literal["python", "json"] = "python",
+) -> dict[str, Any]:
+    """Dump a competition_format to the document stored, of the current version.
+
+    Args:
+        competition_format: the competition_format to store
+        mode: "python" to keep ids as UUIDs, or "json" to dump them as strings
+    """
+    return (
+        competition_format.model_dump(mode=mode)
+        | duration_fields(competition_format)
+        | {"schema_version": SCHEMA_VERSION}
+    )
+
+
+def read_duration(value: int | str) -> timedelta:
+    """Read a duration stored as seconds, or as "HH:MM:SS" before version 2."""
+    if isinstance(value, int):
+        return timedelta(seconds=value)
+    hours, minutes, seconds = value.split(":")
+    return timedelta(hours=int(hours), minutes=int(minutes), seconds=int(seconds))
+
+
+def read_race_config(document: dict[str, Any]) -> RaceConfig:
+    """Build a race config of a trusted document."""
+    return construct(RaceConfig, {name: document[name] for name in RACE_CONFIG_FIELDS})
+
+
+def read_document(document: dict[str, Any]) -> CompetitionFormatUnion:
+    """Build a competition_format from a stored document.
+
+    The model is picked by the datatype of a trusted document, and built
+    without validation. Fields that are not on the model, as the search keys
+    and timestamps of the storage, are left out. A trusted document missing
+    a field, as one stored before revisions were, is validated instead.
+
+    Raises:
+        ValidationError: an untrusted document is not a valid competition_format
+    """
+    if document.get("schema_version") not in TRUSTED_SCHEMA_VERSIONS:
+        return CompetitionFormatUnionAdapter.validate_python(document)
+    datatype = document["datatype"]
+    model = MODELS[datatype]
+    try:
+        values = {name: document[name] for name in FIELDS[datatype]}
+    except KeyError:
+        return CompetitionFormatUnionAdapter.validate_python(document)
+    for name in DURATION_FIELDS[datatype]:
+        values[name] = read_duration(values[name])
+    if model is IndividualSprintFormat:
+        for name in RACE_CONFIGS:
+            values[name] = [read_race_config(item) for item in values[name]]
+    return construct(model, values)
+
+
+def read_json_document(
+    document: str | bytes, schema_version: int | None = None
+) -> CompetitionFormatUnion:
+    """Build a competition_format from a document stored as json.
+
+    The document is one written with write_document in json mode, where
+    the id is a string. It is read as any other stored document. A document
+    without a version of its own is read at the schema_version given, if
+    any: the json of a format as returned is laid out as version 1.
+
+    Raises:
+        ValidationError: an untrusted document is not a valid competition_format
+    """
+    values = json.loads(document)
+    values["id"] = UUID(values["id"])
+    if schema_version is not None:
+        values.setdefault("schema_version", schema_version)
+    return read_document(values)
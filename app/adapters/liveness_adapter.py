@@ -3,26 +3,32 @@
 import logging
 from typing import Any
 
+from .storage import CompetitionFormatsStorage
+
 
 class LivenessAdapter:
     """Class representing an adapter for the liveness connection."""
 
-    database: Any
+    storage: CompetitionFormatsStorage
     logger: logging.Logger
 
     @classmethod
-    async def init(cls, database: Any) -> None:  # pragma: no cover
+    async def init(cls, storage: CompetitionFormatsStorage) -> None:
         """Initialize class properties."""
-        cls.database = database
+        cls.storage = storage
         cls.logger = logging.getLogger("uvicorn.error")
 
     @classmethod
-    async def database_is_ready(cls) -> bool:  # pragma: no cover
-        """Check if the database connection is ready."""
+    async def database_is_ready(cls: Any) -> bool:
+        """Check if the storage is ready."""
         try:
-            result = await cls.database.command("ping")
+            return await cls.storage.is_ready()
         except Exception:
-            cls.logger.exception("Error pinging database")
+            cls.logger.exception("Error checking the storage")
             return False
-        cls.logger.debug(f"result of db-ping: {result}")
-        return result["ok"] == 1
+
+    @classmethod
+    def catalog_age(cls: Any) -> float | None:
+        """Return the seconds since the catalog replica was loaded, if any."""
+        storage = getattr(cls, "storage", None)
+        return storage.replica_age() if storage else None
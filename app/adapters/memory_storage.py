@@ -0,0 +1,317 @@
+"""Module for the in-memory storage of competition_formats."""
+
+import asyncio
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import AsyncIterator, Iterable
+from itertools import islice, takewhile
+from typing import override
+from uuid import UUID
+
+from pymongo.errors import DuplicateKeyError
+
+from app.models import CompetitionFormatSummary, CompetitionFormatUnion
+
+from .name_index import NameSearchMode, name_ngrams, normalize_name
+from .storage import CompetitionFormatsStorage
+
+# Error code of a write violating a unique index, as from mongo:
+DUPLICATE_KEY = 11000
+
+
+class InMemoryCompetitionFormatsStorage(CompetitionFormatsStorage):
+    """Class representing a storage of competition_formats in process memory.
+
+    Nothing is persisted, and every replica has its own storage. The
+    competition_formats are indexed by id, by name_key and by the n-grams of
+    the name_key, like the mongo collection. Formats are copied in and out,
+    so that callers cannot change what is stored. No method awaits while
+    changing the indexes, so writes are atomic on the event loop.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty storage."""
+        self._by_id: dict[UUID, CompetitionFormatUnion] = {}
+        self._by_name_key: dict[str, UUID] = {}
+        self._order: list[tuple[str, UUID]] = []
+        self._by_ngram: dict[str, set[UUID]] = {}
+        self._watchers: set[asyncio.Queue[UUID | None]] = set()
+
+    def _check_unique(
+        self, competition_format: CompetitionFormatUnion, replacing: UUID | None
+    ) -> None:
+        """Raise DuplicateKeyError if another format has the id or name_key."""
+        if competition_format.id in self._by_id and competition_format.id != replacing:
+            msg = f"E11000 duplicate key error, dup key: {{ id: {competition_format.id} }}"
+            raise DuplicateKeyError(msg, code=DUPLICATE_KEY)
+        name_key = normalize_name(competition_format.name)
+        if self._by_name_key.get(name_key, replacing) != replacing:
+            msg = f'E11000 duplicate key error, dup key: {{ name_key: "{name_key}" }}'
+            raise DuplicateKeyError(msg, code=DUPLICATE_KEY)
+
+    def _insert(self, competition_format: CompetitionFormatUnion) -> None:
+        """Store a copy of a competition_format, and index it."""
+        competition_format_id = competition_format.id
+        name_key = normalize_name(competition_format.name)
+        self._by_id[competition_format_id] = competition_format.model_copy(deep=True)
+        self._by_name_key[name_key] = competition_format_id
+        insort(self._order, (name_key, competition_format_id))
+        for ngram in name_ngrams(name_key):
+            self._by_ngram.setdefault(ngram, set()).add(competition_format_id)
+
+    def _remove(self, competition_format_id: UUID) -> None:
+        """Remove a stored competition_format from the indexes."""
+        competition_format = self._by_id.pop(competition_format_id)
+        name_key = normalize_name(competition_format.name)
+        del self._by_name_key[name_key]
+        del self._order[bisect_left(self._order, (name_key, competition_format_id))]
+        for ngram in name_ngrams(name_key):
+            ids = self._by_ngram[ngram]
+            ids.discard(competition_format_id)
+            if not ids:
+                del self._by_ngram[ngram]
+
+    def _notify(self, competition_format_id: UUID) -> None:
+        """Tell every watcher that a competition_format is changed."""
+        for queue in self._watchers:
+            queue.put_nowait(competition_format_id)
+
+    def _page(self, limit: int, after: tuple[str, UUID] | None) -> list[UUID]:
+        """Return the ids on a page ordered by (name_key, id)."""
+        start = bisect_right(self._order, after) if after else 0
+        end = start + limit if limit else None
+        return [
+            competition_format_id for _, competition_format_id in self._order[start:end]
+        ]
+
+    def _search(self, name: str, mode: NameSearchMode, limit: int) -> list[UUID]:
+        """Return the ids of the formats matching a name, ordered by name_key."""
+        name_key = normalize_name(name)
+        if mode == NameSearchMode.Prefix:
+            # The keys starting with the prefix are next to each other in order:
+            start = bisect_left(self._order, (name_key,))
+            matches: Iterable[tuple[str, UUID]] = takewhile(
+                lambda entry: entry[0].startswith(name_key),
+                (self._order[i] for i in range(start, len(self._order))),
+            )
+        elif ngrams := name_ngrams(name_key):
+            candidates = set.intersection(
+                *(self._by_ngram.get(ngram, set()) for ngram in ngrams)
+            )
+            matches = sorted(
+                (normalize_name(self._by_id[candidate].name), candidate)
+                for candidate in candidates
+            )
+        else:
+            matches = self._order
+        found = (
+            competition_format_id
+            for key, competition_format_id in matches
+            if name_key in key
+        )
+        return list(islice(found, limit or None))
+
+    def _get(self, ids: Iterable[UUID]) -> list[CompetitionFormatUnion]:
+        """Return copies of the stored competition_formats with the ids."""
+        return [
+            self._by_id[competition_format_id].model_copy(deep=True)
+            for competition_format_id in ids
+        ]
+
+    def _summarize(self, ids: Iterable[UUID]) -> list[CompetitionFormatSummary]:
+        """Return the summaries of the stored competition_formats with the ids."""
+        return [
+            CompetitionFormatSummary.of(self._by_id[competition_format_id])
+            for competition_format_id in ids
+        ]
+
+    @override
+    async def is_ready(self) -> bool:
+        return True
+
+    @override
+    async def get_all_competition_formats(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatUnion]:
+        return self._get(self._page(limit, after))
+
+    @override
+    async def get_all_competition_format_summaries(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatSummary]:
+        return self._summarize(self._page(limit, after))
+
+    @override
+    async def get_competition_format_revisions(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[tuple[UUID, int]]:
+        return [
+            (competition_format_id, self._by_id[competition_format_id].revision)
+            for competition_format_id in self._page(limit, after)
+        ]
+
+    @override
+    async def stream_competition_formats(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatUnion]:
+        """Iterate over the competition_formats stored when started.
+
+        Those deleted since are skipped. Other tasks get to run between
+        every batch.
+        """
+        ids = [competition_format_id for _, competition_format_id in self._order]
+        for start in range(0, len(ids), batch_size):
+            for competition_format in self._get(
+                competition_format_id
+                for competition_format_id in ids[start : start + batch_size]
+                if competition_format_id in self._by_id
+            ):
+                yield competition_format
+            await asyncio.sleep(0)
+
+    @override
+    async def stream_competition_format_summaries(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatSummary]:
+        async for competition_format in self.stream_competition_formats(batch_size):
+            yield CompetitionFormatSummary.of(competition_format)
+
+    @override
+    async def create_competition_format(
+        self, competition_format: CompetitionFormatUnion
+    ) -> UUID:
+        self._check_unique(competition_format, replacing=None)
+        self._insert(competition_format)
+        self._notify(competition_format.id)
+        return competition_format.id
+
+    @override
+    async def create_competition_formats(
+        self, competition_formats: list[CompetitionFormatUnion]
+    ) -> set[int]:
+        duplicates = set()
+        for position, competition_format in enumerate(competition_formats):
+            try:
+                self._check_unique(competition_format, replacing=None)
+            except DuplicateKeyError:
+                duplicates.add(position)
+                continue
+            self._insert(competition_format)
+            self._notify(competition_format.id)
+        return duplicates
+
+    @override
+    async def upsert_competition_formats(
+        self,
+        competition_formats: list[CompetitionFormatUnion],
+        *,
+        keep_revisions: bool = False,
+    ) -> tuple[int, int, dict[int, str]]:
+        created, replaced, errors = 0, 0, {}
+        for position, competition_format in enumerate(competition_formats):
+            try:
+                self._check_unique(competition_format, replacing=competition_format.id)
+            except DuplicateKeyError as e:
+                errors[position] = str(e)
+                continue
+            current = self._by_id.get(competition_format.id)
+            if current is not None:
+                self._remove(competition_format.id)
+                replaced += 1
+            else:
+                created += 1
+            revision = current.revision + 1 if current is not None else 1
+            self._insert(
+                competition_format
+                if keep_revisions
+                else competition_format.model_copy(update={"revision": revision})
+            )
+            self._notify(competition_format.id)
+        return created, replaced, errors
+
+    @override
+    async def get_competition_format_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatUnion | None:
+        if competition_format_id not in self._by_id:
+            return None
+        return self._get([competition_format_id])[0]
+
+    @override
+    async def get_competition_format_summary_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatSummary | None:
+        if competition_format_id not in self._by_id:
+            return None
+        return self._summarize([competition_format_id])[0]
+
+    @override
+    async def get_competition_format_revision(
+        self, competition_format_id: UUID
+    ) -> int | None:
+        competition_format = self._by_id.get(competition_format_id)
+        return competition_format.revision if competition_format else None
+
+    @override
+    async def get_competition_formats_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatUnion]:
+        return self._get(self._search(competition_format_name, mode, limit))
+
+    @override
+    async def get_competition_format_summaries_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatSummary]:
+        return self._summarize(self._search(competition_format_name, mode, limit))
+
+    @override
+    async def update_competition_format(
+        self,
+        competition_format_id: UUID,
+        competition_format: CompetitionFormatUnion,
+        expected_revision: int | None = None,
+    ) -> int | None:
+        current = self._by_id.get(competition_format_id)
+        if current is None or expected_revision not in {None, current.revision}:
+            return None
+        self._check_unique(competition_format, replacing=competition_format_id)
+        revision = current.revision + 1
+        self._remove(competition_format_id)
+        self._insert(
+            competition_format.model_copy(
+                update={"id": competition_format_id, "revision": revision}
+            )
+        )
+        self._notify(competition_format_id)
+        return revision
+
+    @override
+    async def delete_competition_format(self, competition_format_id: UUID) -> int:
+        """Delete a competition_format, returning the number deleted."""
+        if competition_format_id not in self._by_id:
+            return 0
+        self._remove(competition_format_id)
+        self._notify(competition_format_id)
+        return 1
+
+    @override
+    async def watch_competition_format_changes(
+        self, poll_interval: float
+    ) -> AsyncIterator[UUID | None]:
+        """Yield the id of every competition_format changed in this storage.
+
+        Changes are pushed to the watcher as they are made, so poll_interval
+        is not used.
+        """
+        queue: asyncio.Queue[UUID | None] = asyncio.Queue()
+        self._watchers.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._watchers.discard(queue)
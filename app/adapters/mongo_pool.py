@@ -0,0 +1,193 @@
+"""Module for the settings and monitoring of the mongo connection pool."""
+
+import asyncio
+import os
+import threading
+import warnings
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Annotated, Any, Literal, Self
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from pymongo.compression_support import validate_compressors
+from pymongo.monitoring import ConnectionPoolListener
+
+# The environment variable of every setting:
+ENV_VARS = {
+    "max_pool_size": "DB_MAX_POOL_SIZE",
+    "min_pool_size": "DB_MIN_POOL_SIZE",
+    "max_idle_time_ms": "DB_MAX_IDLE_TIME_MS",
+    "server_selection_timeout_ms": "DB_SERVER_SELECTION_TIMEOUT_MS",
+    "compressors": "DB_COMPRESSORS",
+    "read_preference": "DB_READ_PREFERENCE",
+}
+# Upper bounds, in seconds, of the buckets of the checkout wait histogram:
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class MongoClientSettings(BaseModel):
+    """Data class with the tuning settings of the mongo client.
+
+    The defaults are those of pymongo, except that no compressor is used
+    unless configured.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    max_pool_size: Annotated[int, Field(gt=0)] = 100
+    min_pool_size: Annotated[int, Field(ge=0)] = 0
+    max_idle_time_ms: Annotated[int, Field(gt=0)] | None = None
+    server_selection_timeout_ms: Annotated[int, Field(gt=0)] = 30000
+    compressors: list[Literal["zstd", "snappy", "zlib"]] = []
+    read_preference: Literal[
+        "primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"
+    ] = "primary"
+
+    @classmethod
+    def from_env(cls) -> Self:
+        """Read the settings from the environment, validating them.
+
+        Raises:
+            pydantic.ValidationError: a setting has an illegal value
+        """
+        return cls.model_validate(
+            {name: os.environ[env] for name, env in ENV_VARS.items() if os.getenv(env)}
+        )
+
+    @field_validator("compressors", mode="before")
+    @classmethod
+    def split_compressors(cls, value: Any) -> Any:
+        """Split a comma separated list of compressors."""
+        if isinstance(value, str):
+            return [compressor.strip() for compressor in value.split(",")]
+        return value
+
+    @field_validator("compressors")
+    @classmethod
+    def check_compressors_installed(cls, value: list[str]) -> list[str]:
+        """Check that the library of every compressor is installed.
+
+        pymongo only warns and skips a compressor without its library, which
+        would leave the connection uncompressed without anyone noticing.
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            try:
+                validate_compressors(None, value)
+            except UserWarning as e:
+                raise ValueError(str(e)) from e
+        return value
+
+    @model_validator(mode="after")
+    def check_pool_sizes(self) -> Self:
+        """Check that the min pool size is not greater than the max."""
+        if self.min_pool_size > self.max_pool_size:
+            msg = f"min_pool_size {self.min_pool_size} is greater than max_pool_size {self.max_pool_size}."
+            raise ValueError(msg)
+        return self
+
+    def client_options(self) -> dict[str, Any]:
+        """Return the settings as keyword arguments to the mongo client."""
+        options: dict[str, Any] = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "readPreference": self.read_preference,
+        }
+        if self.max_idle_time_ms is not None:
+            options["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.compressors:
+            options["compressors"] = ",".join(self.compressors)
+        return options
+
+
+@dataclass
+class PoolStats:
+    """Data class with the counters and gauges of the connection pool."""
+
+    connections_open: int = 0
+    connections_in_use: int = 0
+    checkouts: int = 0
+    checkout_failures: int = 0
+    checkout_wait_seconds: float = 0.0
+    checkout_wait_buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(WAIT_BUCKETS) + 1)
+    )
+
+
+class PoolMetricsListener(ConnectionPoolListener):
+    """Pool listener counting connections and checkout wait times.
+
+    The events are published from the threads running the db operations, so
+    the counters are only updated while holding a lock.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the listener with zeroed stats."""
+        self.stats = PoolStats()
+        self._lock = threading.Lock()
+
+    def _add_wait(self, duration: float) -> None:
+        """Add the wait time of a checkout to the histogram."""
+        self.stats.checkout_wait_seconds += duration
+        self.stats.checkout_wait_buckets[bisect_left(WAIT_BUCKETS, duration)] += 1
+
+    def connection_created(self, event: Any) -> None:  # noqa: ARG002
+        """Count a connection being opened."""
+        with self._lock:
+            self.stats.connections_open += 1
+
+    def connection_closed(self, event: Any) -> None:  # noqa: ARG002
+        """Count a connection being closed."""
+        with self._lock:
+            self.stats.connections_open -= 1
+
+    def connection_checked_out(self, event: Any) -> None:
+        """Count a connection being taken from the pool, and the wait for it."""
+        with self._lock:
+            self.stats.connections_in_use += 1
+            self.stats.checkouts += 1
+            self._add_wait(event.duration)
+
+    def connection_check_out_failed(self, event: Any) -> None:
+        """Count a failed wait for a connection."""
+        with self._lock:
+            self.stats.checkout_failures += 1
+            self._add_wait(event.duration)
+
+    def connection_checked_in(self, event: Any) -> None:  # noqa: ARG002
+        """Count a connection being returned to the pool."""
+        with self._lock:
+            self.stats.connections_in_use -= 1
+
+    def pool_created(self, event: Any) -> None:
+        """Ignore the event."""
+
+    def pool_ready(self, event: Any) -> None:
+        """Ignore the event."""
+
+    def pool_cleared(self, event: Any) -> None:
+        """Ignore the event."""
+
+    def pool_closed(self, event: Any) -> None:
+        """Ignore the event."""
+
+    def connection_ready(self, event: Any) -> None:
+        """Ignore the event."""
+
+    def connection_check_out_started(self, event: Any) -> None:
+        """Ignore the event."""
+
+
+pool_metrics_listener = PoolMetricsListener()
+
+
+async def open_min_pool(database: Any, min_pool_size: int) -> None:  # pragma: no cover
+    """Open min_pool_size connections, so that first requests need no handshake.
+
+    pymongo fills the pool to minPoolSize in the background. Running as many
+    concurrent pings makes sure the connections are open before serving.
+    """
+    await asyncio.gather(
+        *(database.command("ping") for _ in range(max(min_pool_size, 1)))
+    )
@@ -0,0 +1,571 @@
+"""Module for the mongo storage of competition_formats."""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from typing import Any, override
+from uuid import UUID
+
+from pymongo import (
+    ASCENDING,
+    DESCENDING,
+    InsertOne,
+    ReplaceOne,
+    ReturnDocument,
+    UpdateOne,
+)
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+
+from app.models import CompetitionFormatSummary, CompetitionFormatUnion
+
+from .documents import is_current, read_document, write_document
+from .name_index import NameSearchMode, name_ngrams, name_query, normalize_name
+from .storage import CompetitionFormatsStorage
+
+# Error code of a write violating a unique index:
+DUPLICATE_KEY = 11000
+# Error code of the $changeStream stage on a standalone server:
+CHANGE_STREAM_NOT_SUPPORTED = 40573
+# The most duplicate names reported when the unique name index cannot be made:
+MAX_DUPLICATES_REPORTED = 20
+# How far back the polling fallback looks, to allow for clock skew between writers:
+POLL_LOOKBACK = timedelta(seconds=5)
+# Projection reading only the fields of a CompetitionFormatSummary:
+SUMMARY_PROJECTION = {"_id": 0} | dict.fromkeys(
+    CompetitionFormatSummary.model_fields, 1
+)
+# Projection leaving out the capacity tables stored with formats for a while:
+FORMAT_PROJECTION = {"capacity": 0}
+
+
+class MongoCompetitionFormatsStorage(CompetitionFormatsStorage):
+    """Class representing the storage of competition_formats in mongo."""
+
+    def __init__(self, database: Any) -> None:  # pragma: no cover
+        """Initialize the storage on a database."""
+        self.database = database
+        self.logger = logging.getLogger("uvicorn.error")
+        self.resume_token: Any = None
+
+    @override
+    async def init(self) -> None:  # pragma: no cover
+        """Backfill missing name keys, and create the indexes.
+
+        Names that differ only by case or whitespace were allowed before the
+        name keys were introduced. If such names are stored, they are logged,
+        and the service starts without the unique name index, until they are
+        renamed and the service restarted.
+        """
+        collection = self.database.competition_formats_collection
+        # Backfill the name keys on documents written before they were introduced:
+        async for document in collection.find(
+            {"name_ngrams": {"$exists": False}}, {"_id": 1, "name": 1}
+        ):
+            await collection.update_one(
+                {"_id": document["_id"]},
+                {"$set": self.name_fields(document["name"])},
+            )
+        # Drop the capacity tables, which are made on read instead:
+        await collection.update_many(
+            {"capacity": {"$exists": True}}, {"$unset": {"capacity": ""}}
+        )
+        await collection.create_index([("id", ASCENDING)], unique=True)
+        try:
+            await collection.create_index([("name_key", ASCENDING)], unique=True)
+        except OperationFailure as e:
+            if e.code != DUPLICATE_KEY:
+                raise
+            duplicates = await self.duplicate_names()
+            self.logger.error(  # noqa: TRY400
+                "Competition_formats with names differing only by case or"
+                f" whitespace: {duplicates}. Names are not unique in the db"
+                " until they are renamed and the service restarted."
+            )
+        await collection.create_index([("name_ngrams", ASCENDING)])
+        await collection.create_index([("name_key", ASCENDING), ("id", ASCENDING)])
+        await collection.create_index([("updated_at", ASCENDING)])
+
+    async def duplicate_names(self) -> list[list[str]]:  # pragma: no cover
+        """Return the names of competition_formats sharing a name key."""
+        cursor = self.database.competition_formats_collection.aggregate(
+            [
+                {"$group": {"_id": "$name_key", "names": {"$push": "$name"}}},
+                {"$match": {"names.1": {"$exists": True}}},
+                {"$sort": {"_id": ASCENDING}},
+                {"$limit": MAX_DUPLICATES_REPORTED},
+            ]
+        )
+        return [document["names"] async for document in cursor]
+
+    @override
+    async def close(self) -> None:  # pragma: no cover
+        self.database.client.close()
+
+    @override
+    async def is_ready(self) -> bool:  # pragma: no cover
+        """Check if the database answers a ping."""
+        try:
+            result = await self.database.command("ping")
+        except Exception:
+            self.logger.exception("Error pinging database")
+            return False
+        self.logger.debug(f"result of db-ping: {result}")
+        return result["ok"] == 1
+
+    @classmethod
+    def name_fields(cls, name: str) -> dict:  # pragma: no cover
+        """Return the stored search fields for a competition_format name."""
+        name_key = normalize_name(name)
+        return {"name_key": name_key, "name_ngrams": name_ngrams(name_key)}
+
+    @classmethod
+    def to_document(
+        cls, competition_format: CompetitionFormatUnion
+    ) -> dict:  # pragma: no cover
+        """Dump a competition_format to the document stored in the collection."""
+        return (
+            write_document(competition_format)
+            | cls.name_fields(competition_format.name)
+            | {"updated_at": datetime.now(UTC)}
+        )
+
+    async def read_documents(
+        self, documents: list[dict]
+    ) -> list[CompetitionFormatUnion]:  # pragma: no cover
+        """Read competition_formats from documents, migrating outdated ones.
+
+        A document of an older schema version, or without a revision, is
+        written again as the current version, unless it was changed since it
+        was read. Its revision is kept, or set to the revision it was read
+        at, since the competition_format itself is not changed.
+        """
+        competition_formats = [read_document(document) for document in documents]
+        migrations = [
+            UpdateOne(
+                {
+                    "_id": document["_id"],
+                    "revision": document.get("revision"),
+                    "schema_version": document.get("schema_version"),
+                },
+                {
+                    "$set": write_document(competition_format)
+                    | self.name_fields(competition_format.name)
+                },
+            )
+            for document, competition_format in zip(
+                documents, competition_formats, strict=True
+            )
+            if not is_current(document)
+        ]
+        if migrations:
+            await self.database.competition_formats_collection.bulk_write(
+                migrations, ordered=False
+            )
+        return competition_formats
+
+    @classmethod
+    def replacement_pipeline(
+        cls, competition_format: CompetitionFormatUnion
+    ) -> list[dict]:  # pragma: no cover
+        """Return an update pipeline replacing a document and bumping its revision.
+
+        The new document is wrapped in $literal, so that values starting with
+        "$" are not read as field paths.
+        """
+        return [
+            {
+                "$replaceWith": {
+                    "$mergeObjects": [
+                        {"$literal": cls.to_document(competition_format)},
+                        {
+                            "_id": "$_id",
+                            "revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]},
+                            "updated_at": "$$NOW",
+                        },
+                    ]
+                }
+            }
+        ]
+
+    @classmethod
+    def page_query(cls, after: tuple[str, UUID] | None) -> dict:  # pragma: no cover
+        """Return the query for the competition_formats after a page cursor."""
+        if not after:
+            return {}
+        name_key, competition_format_id = after
+        return {
+            "$or": [
+                {"name_key": {"$gt": name_key}},
+                {"name_key": name_key, "id": {"$gt": competition_format_id}},
+            ]
+        }
+
+    @override
+    async def get_all_competition_formats(
+        self,
+        limit: int,
+        after: tuple[str, UUID] | None = None,
+    ) -> list[CompetitionFormatUnion]:  # pragma: no cover
+        """Get a page of competition_formats ordered by (name_key, id).
+
+        Args:
+            limit: the maximum number of competition_formats on the page
+            after: the (name_key, id) of the last item on the previous page
+        """
+        query = self.page_query(after)
+        cursor = (
+            self.database.competition_formats_collection.find(query, FORMAT_PROJECTION)
+            .sort([("name_key", ASCENDING), ("id", ASCENDING)])
+            .limit(limit)
+        )
+        return await self.read_documents(await cursor.to_list(None))
+
+    @override
+    async def get_competition_format_revisions(
+        self,
+        limit: int,
+        after: tuple[str, UUID] | None = None,
+    ) -> list[tuple[UUID, int]]:  # pragma: no cover
+        """Get the (id, revision) of a page of competition_formats.
+
+        The page is the same as from get_all_competition_formats, but only
+        the id and revision are read, from the index-ordered documents.
+        """
+        cursor = (
+            self.database.competition_formats_collection.find(
+                self.page_query(after), {"_id": 0, "id": 1, "revision": 1}
+            )
+            .sort([("name_key", ASCENDING), ("id", ASCENDING)])
+            .limit(limit)
+        )
+        return [
+            (document["id"], document.get("revision", 0))
+            for document in await cursor.to_list(None)
+        ]
+
+    @override
+    async def get_all_competition_format_summaries(
+        self,
+        limit: int,
+        after: tuple[str, UUID] | None = None,
+    ) -> list[CompetitionFormatSummary]:  # pragma: no cover
+        """Get a page of competition_formats as summaries, ordered by (name_key, id).
+
+        The page is the same as from get_all_competition_formats, but the race
+        configs and timings are not read from the db.
+        """
+        cursor = (
+            self.database.competition_formats_collection.find(
+                self.page_query(after), SUMMARY_PROJECTION
+            )
+            .sort([("name_key", ASCENDING), ("id", ASCENDING)])
+            .limit(limit)
+        )
+        return [
+            CompetitionFormatSummary.model_validate(document)
+            for document in await cursor.to_list(None)
+        ]
+
+    @override
+    async def stream_competition_format_summaries(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatSummary]:  # pragma: no cover
+        """Iterate over summaries of all competition_formats, batch_size at a time."""
+        cursor = (
+            self.database.competition_formats_collection.find({}, SUMMARY_PROJECTION)
+            .sort([("name_key", ASCENDING), ("id", ASCENDING)])
+            .batch_size(batch_size)
+        )
+        async for document in cursor:
+            yield CompetitionFormatSummary.model_validate(document)
+
+    @override
+    async def stream_competition_formats(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatUnion]:  # pragma: no cover
+        """Iterate over all competition_formats, fetching batch_size at a time."""
+        cursor = (
+            self.database.competition_formats_collection.find({}, FORMAT_PROJECTION)
+            .sort([("name_key", ASCENDING), ("id", ASCENDING)])
+            .batch_size(batch_size)
+        )
+        async for document in cursor:
+            (competition_format,) = await self.read_documents([document])
+            yield competition_format
+
+    @override
+    async def create_competition_format(
+        self, competition_format: CompetitionFormatUnion
+    ) -> str:  # pragma: no cover
+        """Create competition_format function.
+
+        Raises:
+            DuplicateKeyError: a format with the same id or name already exist
+        """
+        return await self.database.competition_formats_collection.insert_one(
+            self.to_document(competition_format)
+        )
+
+    @override
+    async def create_competition_formats(
+        self, competition_formats: list[CompetitionFormatUnion]
+    ) -> set[int]:  # pragma: no cover
+        """Create many competition_formats in one unordered bulk write.
+
+        Returns:
+            The positions in competition_formats of those that were not
+            created, because a format with the same id or name already exist.
+        """
+        if not competition_formats:
+            return set()
+        try:
+            await self.database.competition_formats_collection.bulk_write(
+                [
+                    InsertOne(self.to_document(competition_format))
+                    for competition_format in competition_formats
+                ],
+                ordered=False,
+            )
+        except BulkWriteError as e:
+            write_errors = e.details["writeErrors"]
+            if any(error["code"] != DUPLICATE_KEY for error in write_errors):
+                raise
+            return {error["index"] for error in write_errors}
+        return set()
+
+    @override
+    async def upsert_competition_formats(
+        self,
+        competition_formats: list[CompetitionFormatUnion],
+        *,
+        keep_revisions: bool = False,
+    ) -> tuple[int, int, dict[int, str]]:  # pragma: no cover
+        """Create or replace many competition_formats by id, in one bulk write.
+
+        Every document is replaced and its revision incremented atomically,
+        as on update, and created at the first revision. With keep_revisions,
+        the competition_formats are stored as given, revision included.
+
+        Returns:
+            The number of created and of replaced competition_formats, and the
+            error message for the position of every one that was not written.
+        """
+        if not competition_formats:
+            return 0, 0, {}
+        requests = [
+            ReplaceOne(
+                {"id": competition_format.id},
+                self.to_document(competition_format),
+                upsert=True,
+            )
+            if keep_revisions
+            else UpdateOne(
+                {"id": competition_format.id},
+                self.replacement_pipeline(competition_format),
+                upsert=True,
+            )
+            for competition_format in competition_formats
+        ]
+        try:
+            result = await self.database.competition_formats_collection.bulk_write(
+                requests, ordered=False
+            )
+        except BulkWriteError as e:
+            details = e.details
+            return (
+                details["nUpserted"],
+                details["nMatched"],
+                {error["index"]: error["errmsg"] for error in details["writeErrors"]},
+            )
+        return result.upserted_count, result.matched_count, {}
+
+    @override
+    async def get_competition_format_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatUnion | None:  # pragma: no cover
+        """Get competition_format by id function."""
+        result = await self.database.competition_formats_collection.find_one(
+            {"id": competition_format_id}, FORMAT_PROJECTION
+        )
+        if not result:
+            return None
+        (competition_format,) = await self.read_documents([result])
+        return competition_format
+
+    @override
+    async def get_competition_format_summary_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatSummary | None:  # pragma: no cover
+        """Get the summary of a competition_format by id."""
+        result = await self.database.competition_formats_collection.find_one(
+            {"id": competition_format_id}, SUMMARY_PROJECTION
+        )
+        return CompetitionFormatSummary.model_validate(result) if result else None
+
+    @override
+    async def get_competition_format_revision(
+        self, competition_format_id: UUID
+    ) -> int | None:  # pragma: no cover
+        """Get the revision of a competition_format, without reading the rest."""
+        result = await self.database.competition_formats_collection.find_one(
+            {"id": competition_format_id}, {"_id": 0, "revision": 1}
+        )
+        return result.get("revision", 0) if result is not None else None
+
+    @override
+    async def get_competition_formats_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatUnion]:  # pragma: no cover
+        """Get competition_formats by name function."""
+        query = name_query(competition_format_name, mode)
+        self.logger.debug(f"Query: {query}.")
+        cursor = (
+            self.database.competition_formats_collection.find(query, FORMAT_PROJECTION)
+            .sort("name_key", ASCENDING)
+            .limit(limit)
+        )
+        return await self.read_documents(await cursor.to_list(None))
+
+    @override
+    async def get_competition_format_summaries_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatSummary]:  # pragma: no cover
+        """Get summaries of competition_formats by name."""
+        cursor = (
+            self.database.competition_formats_collection.find(
+                name_query(competition_format_name, mode), SUMMARY_PROJECTION
+            )
+            .sort("name_key", ASCENDING)
+            .limit(limit)
+        )
+        return [
+            CompetitionFormatSummary.model_validate(document)
+            for document in await cursor.to_list(None)
+        ]
+
+    @override
+    async def update_competition_format(
+        self,
+        competition_format_id: UUID,
+        competition_format: CompetitionFormatUnion,
+        expected_revision: int | None = None,
+    ) -> int | None:  # pragma: no cover
+        """Update competition_format function.
+
+        The document is replaced and its revision incremented in one atomic
+        update, in a single round trip.
+
+        Args:
+            competition_format_id: the id of the competition_format
+            competition_format: the new competition_format
+            expected_revision: only update the document if at this revision
+
+        Returns:
+            The new revision, or None if no document matched.
+
+        Raises:
+            DuplicateKeyError: another format with the same name already exist
+        """
+        query: dict = {"id": competition_format_id}
+        if expected_revision is not None:
+            query["revision"] = (
+                {"$in": [expected_revision, None]}
+                if expected_revision == 0
+                else expected_revision
+            )
+        result = await self.database.competition_formats_collection.find_one_and_update(
+            query,
+            self.replacement_pipeline(competition_format),
+            projection={"_id": 0, "revision": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return result["revision"] if result is not None else None
+
+    @override
+    async def delete_competition_format(
+        self, competition_format_id: UUID
+    ) -> str | None:  # pragma: no cover
+        """Get competition_format function."""
+        return await self.database.competition_formats_collection.delete_one(
+            {"id": competition_format_id}
+        )
+
+    @override
+    async def watch_competition_format_changes(
+        self, poll_interval: float
+    ) -> AsyncIterator[UUID | None]:  # pragma: no cover
+        """Yield the id of every competition_format that is changed.
+
+        Changes are read from a change stream, resumed from the last seen
+        resume token if the stream fails. On a standalone server, which has no
+        change streams, the collection is polled every poll_interval seconds
+        for documents with a newer updated_at, and for deleted ids, instead.
+        None is yielded when the id of a change is unknown, as for deletes
+        in a change stream.
+        """
+        while True:
+            try:
+                async for competition_format_id in self._watch_change_stream():
+                    yield competition_format_id
+            except OperationFailure as e:
+                if e.code != CHANGE_STREAM_NOT_SUPPORTED:
+                    self.logger.exception("Error watching competition_formats")
+                    await asyncio.sleep(poll_interval)
+                    continue
+                self.logger.info("Change streams not supported, polling for changes")
+                async for competition_format_id in self._poll_changes(poll_interval):
+                    yield competition_format_id
+            except PyMongoError:
+                self.logger.exception("Error watching competition_formats")
+                await asyncio.sleep(poll_interval)
+
+    async def _watch_change_stream(
+        self,
+    ) -> AsyncIterator[UUID | None]:  # pragma: no cover
+        """Yield the ids of changed competition_formats from a change stream."""
+        pipeline = [{"$project": {"operationType": 1, "fullDocument.id": 1}}]
+        async with self.database.competition_formats_collection.watch(
+            pipeline, full_document="updateLookup", resume_after=self.resume_token
+        ) as stream:
+            async for change in stream:
+                self.resume_token = stream.resume_token
+                full_document = change.get("fullDocument") or {}
+                yield full_document.get("id")
+
+    async def _poll_changes(
+        self, poll_interval: float
+    ) -> AsyncIterator[UUID | None]:  # pragma: no cover
+        """Yield the ids of changed competition_formats by polling updated_at.
+
+        Deletes leave nothing to poll for, so the ids stored are read on
+        every poll, and those gone since the last poll are yielded.
+        """
+        collection = self.database.competition_formats_collection
+        watermark = datetime.now(UTC)
+        ids = await self._ids()
+        while True:
+            await asyncio.sleep(poll_interval)
+            cursor = collection.find(
+                {"updated_at": {"$gt": watermark - POLL_LOOKBACK}},
+                {"_id": 0, "id": 1, "updated_at": 1},
+            ).sort("updated_at", DESCENDING)
+            async for document in cursor:
+                watermark = max(watermark, document["updated_at"].replace(tzinfo=UTC))
+                yield document["id"]
+            previous_ids, ids = ids, await self._ids()
+            for competition_format_id in previous_ids - ids:
+                yield competition_format_id
+
+    async def _ids(self) -> set[UUID]:  # pragma: no cover
+        """Return the ids of all competition_formats, read from the id index."""
+        cursor = self.database.competition_formats_collection.find(
+            {}, {"_id": 0, "id": 1}
+        ).hint([("id", ASCENDING)])
+        return {document["id"] async for document in cursor}
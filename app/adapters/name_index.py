@@ -0,0 +1,49 @@
+"""Module for the normalized name keys of competition_formats."""
+
+import re
+from enum import StrEnum
+
+NGRAM_SIZE = 3
+
+
+class NameSearchMode(StrEnum):
+    """Modes for searching competition_formats by name."""
+
+    Prefix = "prefix"
+    Substring = "substring"
+
+
+def normalize_name(name: str) -> str:
+    """Fold a competition_format name to its unique lookup key.
+
+    Whitespace is collapsed and the name is casefolded, so that
+    "Individual  Sprint" and "individual sprint" map to the same key.
+    """
+    return " ".join(name.split()).casefold()
+
+
+def name_ngrams(name_key: str) -> list[str]:
+    """Return the distinct n-grams of a name key, in order of appearance."""
+    return list(
+        dict.fromkeys(
+            name_key[i : i + NGRAM_SIZE] for i in range(len(name_key) - NGRAM_SIZE + 1)
+        )
+    )
+
+
+def name_query(name: str, mode: NameSearchMode) -> dict:  # pragma: no cover
+    """Build an index-backed query matching names by prefix or substring.
+
+    The search term is normalized like the stored name key and escaped, so
+    regex metacharacters in the term are matched literally. A prefix search
+    is an anchored regex, which is answered from the name_key index. A
+    substring search narrows the candidates with the n-gram index first; terms
+    shorter than an n-gram fall back to a scan of the name_key index keys.
+    """
+    name_key = normalize_name(name)
+    if mode == NameSearchMode.Prefix:
+        return {"name_key": {"$regex": f"^{re.escape(name_key)}"}}
+    query: dict = {"name_key": {"$regex": re.escape(name_key)}}
+    if ngrams := name_ngrams(name_key):
+        query["name_ngrams"] = {"$all": ngrams}
+    return query
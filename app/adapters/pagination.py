@@ -0,0 +1,36 @@
+"""Module for keyset pagination of competition_formats."""
+
+import base64
+import binascii
+import json
+from uuid import UUID
+
+
+class InvalidCursorError(Exception):
+    """Class representing custom exception for malformed page cursors."""
+
+    def __init__(self, message: str) -> None:
+        """Initialize the error."""
+        # Call the base class constructor with the parameters it needs
+        super().__init__(message)
+
+
+def encode_cursor(name_key: str, competition_format_id: UUID) -> str:
+    """Encode the sort key of the last item on a page as an opaque cursor."""
+    payload = json.dumps([name_key, str(competition_format_id)]).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, UUID]:
+    """Decode an opaque cursor to the (name_key, id) sort key it was made from.
+
+    Raises:
+        InvalidCursorError: the cursor was not made by encode_cursor
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        name_key, competition_format_id = json.loads(payload)
+        return str(name_key), UUID(competition_format_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        msg = f"Invalid page cursor {cursor}."
+        raise InvalidCursorError(msg) from e
@@ -0,0 +1,379 @@
+"""Module for the in-memory replica of the competition_formats of a storage."""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from typing import Any, override
+from uuid import UUID
+
+from app.models import CompetitionFormatSummary, CompetitionFormatUnion
+
+from .memory_storage import InMemoryCompetitionFormatsStorage
+from .name_index import NameSearchMode
+from .storage import CompetitionFormatsStorage
+
+
+class ReplicaCompetitionFormatsStorage(CompetitionFormatsStorage):
+    """Class representing a storage serving reads from a replica of another.
+
+    The whole catalog of the primary storage is loaded into an in-memory
+    storage at init, and every read is served from it, so that reads never
+    touch the primary. Writes go to the primary, and what is written is
+    copied to the replica before they return.
+
+    The replica follows the changes watched on the primary, so that
+    changes made through other replicas of the service are seen, and is
+    reloaded in full every refresh_interval seconds, in case a change was
+    missed. Watchers of this storage see every change the replica follows,
+    and None after every full reload.
+    """
+
+    def __init__(
+        self,
+        primary: CompetitionFormatsStorage,
+        refresh_interval: float,
+        poll_interval: float,
+        batch_size: int = 100,
+    ) -> None:
+        """Initialize the storage on a primary storage, not yet loaded."""
+        self.primary = primary
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.replica = InMemoryCompetitionFormatsStorage()
+        self.loaded_at: float | None = None
+        self.logger = logging.getLogger("uvicorn.error")
+        self._lock = asyncio.Lock()
+        # The ids changed in the replica during every load in progress:
+        self._loading: list[set[UUID]] = []
+        self._tasks: set[asyncio.Task] = set()
+        self._watchers: set[asyncio.Queue[UUID | None]] = set()
+
+    @override
+    async def init(self) -> None:
+        """Prepare the primary, load the replica, and start keeping it fresh."""
+        await self.primary.init()
+        await self.load()
+        self._tasks = {
+            asyncio.create_task(self._follow_changes()),
+            asyncio.create_task(self._refresh_periodically()),
+        }
+
+    @override
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks.clear()
+        await self.primary.close()
+
+    @override
+    def replica_age(self) -> float | None:
+        """Return the seconds since the replica was last loaded in full."""
+        if self.loaded_at is None:
+            return None
+        return time.monotonic() - self.loaded_at
+
+    async def load(self) -> None:
+        """Load the whole catalog of the primary into a new replica.
+
+        The new replica is loaded without holding the lock, so that reads
+        are served from the old one, and writes copied to it, meanwhile. It
+        replaces the old one once it is complete, keeping what was changed
+        in the old one during the load, unless loaded at a higher revision.
+        """
+        changed: set[UUID] = set()
+        self._loading.append(changed)
+        try:
+            replica = InMemoryCompetitionFormatsStorage()
+            batch: list[CompetitionFormatUnion] = []
+            count = 0
+            competition_formats = self.primary.stream_competition_formats(
+                self.batch_size
+            )
+            async for competition_format in competition_formats:
+                batch.append(competition_format)
+                count += 1
+                if len(batch) >= self.batch_size:
+                    await replica.upsert_competition_formats(batch, keep_revisions=True)
+                    batch.clear()
+            await replica.upsert_competition_formats(batch, keep_revisions=True)
+            async with self._lock:
+                await self._merge(replica, changed)
+                self.replica = replica
+                self.loaded_at = time.monotonic()
+        finally:
+            self._loading.remove(changed)
+        self.logger.debug(f"Loaded {count} competition_formats into the replica")
+
+    async def _merge(
+        self, replica: InMemoryCompetitionFormatsStorage, changed: set[UUID]
+    ) -> None:
+        """Keep the changes made to the old replica during a load in the new one.
+
+        A changed competition_format is kept if it is at a higher revision
+        than loaded, or not loaded, and removed if it was deleted.
+        """
+        for competition_format_id in changed:
+            current = await self.replica.get_competition_format_by_id(
+                competition_format_id
+            )
+            loaded = await replica.get_competition_format_by_id(competition_format_id)
+            if current is None:
+                await replica.delete_competition_format(competition_format_id)
+            elif loaded is None or current.revision > loaded.revision:
+                await replica.upsert_competition_formats([current], keep_revisions=True)
+
+    def _changed(self, competition_format_ids: list[UUID]) -> None:
+        """Note competition_formats changed in the replica, for every load."""
+        for changed in self._loading:
+            changed.update(competition_format_ids)
+
+    async def _replace(self, competition_formats: list[CompetitionFormatUnion]) -> None:
+        """Copy written competition_formats to the replica.
+
+        A competition_format is only copied at the revision in the replica
+        or higher, so that a copy of a write is never put over a newer
+        revision already refreshed from the primary. If one cannot be
+        copied, because another format in the replica still has its name,
+        the replica is reloaded.
+        """
+        async with self._lock:
+            newer = [
+                competition_format
+                for competition_format in competition_formats
+                if competition_format.revision
+                >= (
+                    await self.replica.get_competition_format_revision(
+                        competition_format.id
+                    )
+                    or 0
+                )
+            ]
+            _, _, errors = await self.replica.upsert_competition_formats(
+                newer, keep_revisions=True
+            )
+            self._changed([competition_format.id for competition_format in newer])
+        if errors:
+            await self.load()
+
+    async def _refresh(self, competition_format_id: UUID | None) -> None:
+        """Read a changed competition_format from the primary into the replica.
+
+        An unknown change, as for deletes, reloads the whole replica.
+        """
+        if competition_format_id is None:
+            await self.load()
+            return
+        competition_format = await self.primary.get_competition_format_by_id(
+            competition_format_id
+        )
+        if competition_format is None:
+            async with self._lock:
+                await self.replica.delete_competition_format(competition_format_id)
+                self._changed([competition_format_id])
+        else:
+            await self._replace([competition_format])
+
+    def _notify(self, competition_format_id: UUID | None) -> None:
+        """Tell every watcher that a competition_format is changed."""
+        for queue in self._watchers:
+            queue.put_nowait(competition_format_id)
+
+    async def _follow_changes(self) -> None:
+        """Refresh the replica on every change of the primary, until cancelled."""
+        changes = self.primary.watch_competition_format_changes(self.poll_interval)
+        async for competition_format_id in changes:
+            try:
+                await self._refresh(competition_format_id)
+            except Exception:
+                self.logger.exception("Error refreshing the catalog replica")
+            self._notify(competition_format_id)
+
+    async def _refresh_periodically(self) -> None:
+        """Reload the replica every refresh_interval seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.load()
+            except Exception:
+                self.logger.exception("Error reloading the catalog replica")
+                continue
+            self._notify(None)
+
+    @override
+    async def is_ready(self) -> bool:
+        return self.loaded_at is not None and await self.primary.is_ready()
+
+    @override
+    async def get_all_competition_formats(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatUnion]:
+        return await self.replica.get_all_competition_formats(limit, after)
+
+    @override
+    async def get_all_competition_format_summaries(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatSummary]:
+        return await self.replica.get_all_competition_format_summaries(limit, after)
+
+    @override
+    async def get_competition_format_revisions(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[tuple[UUID, int]]:
+        return await self.replica.get_competition_format_revisions(limit, after)
+
+    @override
+    def stream_competition_formats(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatUnion]:
+        return self.replica.stream_competition_formats(batch_size)
+
+    @override
+    def stream_competition_format_summaries(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatSummary]:
+        return self.replica.stream_competition_format_summaries(batch_size)
+
+    @override
+    async def create_competition_format(
+        self, competition_format: CompetitionFormatUnion
+    ) -> Any:
+        result = await self.primary.create_competition_format(competition_format)
+        await self._replace([competition_format])
+        return result
+
+    @override
+    async def create_competition_formats(
+        self, competition_formats: list[CompetitionFormatUnion]
+    ) -> set[int]:
+        duplicates = await self.primary.create_competition_formats(competition_formats)
+        await self._replace(
+            [
+                competition_format
+                for position, competition_format in enumerate(competition_formats)
+                if position not in duplicates
+            ]
+        )
+        return duplicates
+
+    @override
+    async def upsert_competition_formats(
+        self,
+        competition_formats: list[CompetitionFormatUnion],
+        *,
+        keep_revisions: bool = False,
+    ) -> tuple[int, int, dict[int, str]]:
+        """Create or replace many competition_formats by id in the primary.
+
+        Unless keep_revisions, the primary gives the revisions, so the
+        written competition_formats are read back from it into the replica.
+        """
+        created, replaced, errors = await self.primary.upsert_competition_formats(
+            competition_formats, keep_revisions=keep_revisions
+        )
+        written = [
+            competition_format
+            for position, competition_format in enumerate(competition_formats)
+            if position not in errors
+        ]
+        if keep_revisions:
+            await self._replace(written)
+        else:
+            for competition_format in written:
+                await self._refresh(competition_format.id)
+        return created, replaced, errors
+
+    @override
+    async def get_competition_format_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatUnion | None:
+        return await self.replica.get_competition_format_by_id(competition_format_id)
+
+    @override
+    async def get_competition_format_summary_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatSummary | None:
+        return await self.replica.get_competition_format_summary_by_id(
+            competition_format_id
+        )
+
+    @override
+    async def get_competition_format_revision(
+        self, competition_format_id: UUID
+    ) -> int | None:
+        return await self.replica.get_competition_format_revision(competition_format_id)
+
+    @override
+    async def get_competition_formats_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatUnion]:
+        return await self.replica.get_competition_formats_by_name(
+            competition_format_name, mode=mode, limit=limit
+        )
+
+    @override
+    async def get_competition_format_summaries_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatSummary]:
+        return await self.replica.get_competition_format_summaries_by_name(
+            competition_format_name, mode=mode, limit=limit
+        )
+
+    @override
+    async def update_competition_format(
+        self,
+        competition_format_id: UUID,
+        competition_format: CompetitionFormatUnion,
+        expected_revision: int | None = None,
+    ) -> int | None:
+        revision = await self.primary.update_competition_format(
+            competition_format_id,
+            competition_format,
+            expected_revision=expected_revision,
+        )
+        if revision is not None:
+            await self._replace(
+                [
+                    competition_format.model_copy(
+                        update={"id": competition_format_id, "revision": revision}
+                    )
+                ]
+            )
+        return revision
+
+    @override
+    async def delete_competition_format(self, competition_format_id: UUID) -> Any:
+        result = await self.primary.delete_competition_format(competition_format_id)
+        async with self._lock:
+            await self.replica.delete_competition_format(competition_format_id)
+            self._changed([competition_format_id])
+        return result
+
+    @override
+    async def watch_competition_format_changes(
+        self, poll_interval: float
+    ) -> AsyncIterator[UUID | None]:
+        """Yield the id of every competition_format changed in the primary.
+
+        An id is yielded after the replica is refreshed, and None after
+        every full reload. The primary is watched by the replica itself, with
+        the poll_interval given at construction, so poll_interval is not used.
+        """
+        queue: asyncio.Queue[UUID | None] = asyncio.Queue()
+        self._watchers.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._watchers.discard(queue)
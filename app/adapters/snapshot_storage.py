@@ -0,0 +1,411 @@
+"""Module for the read-only snapshot storage of competition_formats.
+
+A snapshot is a file with every competition_format stored as its json and
+the json of its summary, as returned, each followed by a newline. They are
+followed by an index of where each one is, and a footer:
+
+    documents | index | index offset (8 bytes, little endian) | SNAPSHOT_MAGIC
+
+The index is a json array of [name_key, id, revision, offset, length,
+summary_offset, summary_length] entries ordered by (name_key, id), giving the
+position of the full and the summary document of every format, without its
+newline. The footer is last, so that a snapshot is written in one pass while
+streaming the catalog.
+
+Since the documents are stored as returned, responses are slices of the
+mapped file, without copying or encoding them. A line of newline delimited
+json is a document with its newline.
+"""
+
+import asyncio
+import json
+import mmap
+import struct
+from bisect import bisect_left, bisect_right
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from itertools import islice, takewhile
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, NoReturn, override
+from uuid import UUID
+
+from app.models import (
+    CompetitionFormatSummary,
+    CompetitionFormatUnion,
+    CompetitionFormatView,
+)
+
+from .documents import read_json_document
+from .name_index import NameSearchMode, normalize_name
+from .storage import CompetitionFormatsStorage, ReadOnlyStorageError
+
+SNAPSHOT_MAGIC = b"CFSNAP2\n"
+# The json of a format as returned is laid out as documents of this version:
+JSON_SCHEMA_VERSION = 1
+FOOTER = struct.Struct("<Q")
+
+
+class SnapshotEntry(NamedTuple):
+    """The position of a competition_format in a snapshot."""
+
+    name_key: str
+    revision: int
+    offset: int
+    length: int
+    summary_offset: int
+    summary_length: int
+
+
+async def write_snapshot(
+    file: BinaryIO, competition_formats: AsyncIterator[CompetitionFormatUnion]
+) -> int:
+    """Write competition_formats to a snapshot, returning the number written.
+
+    The competition_formats must come ordered by (name_key, id), as from
+    stream_competition_formats.
+    """
+    index = []
+    offset = 0
+    async for competition_format in competition_formats:
+        document = competition_format.model_dump_json().encode()
+        summary = (
+            CompetitionFormatSummary.of(competition_format).model_dump_json().encode()
+        )
+        file.write(document + b"\n")
+        file.write(summary + b"\n")
+        index.append(
+            [
+                normalize_name(competition_format.name),
+                str(competition_format.id),
+                competition_format.revision,
+                offset,
+                len(document),
+                offset + len(document) + 1,
+                len(summary),
+            ]
+        )
+        offset += len(document) + len(summary) + 2
+    file.write(json.dumps(index).encode())
+    file.write(FOOTER.pack(offset))
+    file.write(SNAPSHOT_MAGIC)
+    return len(index)
+
+
+class SnapshotCompetitionFormatsStorage(CompetitionFormatsStorage):
+    """Class representing a read-only storage of competition_formats in a snapshot.
+
+    The snapshot file is memory-mapped, and only its index is read at
+    startup. A document is read from the mapping when it is asked for, so
+    pages of the file that are never read are never loaded. Every write
+    raises ReadOnlyStorageError.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Initialize the storage on a snapshot file, not yet mapped."""
+        self.path = path
+        self._mapping: mmap.mmap | None = None
+        self._view = memoryview(b"")
+        self._entries: dict[UUID, SnapshotEntry] = {}
+        self._order: list[tuple[str, UUID]] = []
+
+    @override
+    async def init(self) -> None:
+        """Map the snapshot and read its index, off the event loop.
+
+        Raises:
+            ValueError: the file is not a snapshot
+        """
+        await asyncio.to_thread(self._map)
+
+    def _map(self) -> None:
+        """Map the snapshot and read its index.
+
+        Raises:
+            ValueError: the file is not a snapshot
+        """
+        with Path(self.path).open("rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        footer_size = FOOTER.size + len(SNAPSHOT_MAGIC)
+        if len(mapping) < footer_size or mapping[-len(SNAPSHOT_MAGIC) :] != (
+            SNAPSHOT_MAGIC
+        ):
+            mapping.close()
+            msg = (
+                f"{self.path} is not a snapshot of competition formats,"
+                " as written by this version of the service."
+            )
+            raise ValueError(msg)
+        (index_offset,) = FOOTER.unpack(mapping[-footer_size : -len(SNAPSHOT_MAGIC)])
+        for name_key, competition_format_id, *position in json.loads(
+            mapping[index_offset:-footer_size]
+        ):
+            entry = SnapshotEntry(name_key, *position)
+            self._entries[UUID(competition_format_id)] = entry
+            self._order.append((name_key, UUID(competition_format_id)))
+        self._mapping = mapping
+        self._view = memoryview(mapping)
+
+    @override
+    async def close(self) -> None:
+        """Unmap the snapshot.
+
+        The mapping is left to be unmapped when collected if slices of it
+        are still being sent.
+        """
+        self._view.release()
+        self._view = memoryview(b"")
+        if self._mapping is not None:
+            with suppress(BufferError):
+                self._mapping.close()
+            self._mapping = None
+
+    def _json(
+        self,
+        competition_format_id: UUID,
+        view: CompetitionFormatView,
+        *,
+        newline: bool = False,
+    ) -> memoryview:
+        """Return a slice of the mapping with the json of a view of a format."""
+        entry = self._entries[competition_format_id]
+        if view == CompetitionFormatView.Full:
+            offset, length = entry.offset, entry.length
+        else:
+            offset, length = entry.summary_offset, entry.summary_length
+        return self._view[offset : offset + length + newline]
+
+    def _document(self, competition_format_id: UUID) -> CompetitionFormatUnion:
+        """Read a competition_format from the mapping.
+
+        The snapshot was written by this service, so its documents are
+        trusted, and built into models without validation.
+        """
+        return read_json_document(
+            bytes(self._json(competition_format_id, CompetitionFormatView.Full)),
+            schema_version=JSON_SCHEMA_VERSION,
+        )
+
+    def _summary(self, competition_format_id: UUID) -> CompetitionFormatSummary:
+        """Read the summary of a competition_format from the mapping."""
+        return CompetitionFormatSummary.model_validate_json(
+            bytes(self._json(competition_format_id, CompetitionFormatView.Summary))
+        )
+
+    def _page(self, limit: int, after: tuple[str, UUID] | None) -> list[UUID]:
+        """Return the ids on a page ordered by (name_key, id)."""
+        start = bisect_right(self._order, after) if after else 0
+        return [
+            competition_format_id
+            for _, competition_format_id in self._order[start : start + limit]
+        ]
+
+    def _search(self, name: str, mode: NameSearchMode, limit: int) -> list[UUID]:
+        """Return the ids of the formats matching a name, ordered by name_key.
+
+        A prefix search is a range of the ordered keys. A substring search
+        scans the keys, which are all in the index.
+        """
+        name_key = normalize_name(name)
+        if mode == NameSearchMode.Prefix:
+            start = bisect_left(self._order, (name_key,))
+            matches = takewhile(
+                lambda entry: entry[0].startswith(name_key), self._order[start:]
+            )
+        else:
+            matches = (entry for entry in self._order if name_key in entry[0])
+        return [
+            competition_format_id
+            for _, competition_format_id in islice(matches, limit or None)
+        ]
+
+    @override
+    async def is_ready(self) -> bool:
+        return self._mapping is not None
+
+    @override
+    def serves_json(self) -> bool:
+        return True
+
+    @override
+    async def get_competition_format_json_by_id(
+        self, competition_format_id: UUID, view: CompetitionFormatView
+    ) -> tuple[int, memoryview] | None:
+        entry = self._entries.get(competition_format_id)
+        if entry is None:
+            return None
+        return entry.revision, self._json(competition_format_id, view)
+
+    @override
+    async def get_all_competition_format_json(
+        self,
+        limit: int,
+        view: CompetitionFormatView,
+        after: tuple[str, UUID] | None = None,
+    ) -> list[tuple[str, UUID, int, memoryview]]:
+        return [
+            (
+                self._entries[competition_format_id].name_key,
+                competition_format_id,
+                self._entries[competition_format_id].revision,
+                self._json(competition_format_id, view),
+            )
+            for competition_format_id in self._page(limit, after)
+        ]
+
+    @override
+    async def stream_competition_format_json(
+        self, batch_size: int, view: CompetitionFormatView
+    ) -> AsyncIterator[memoryview]:
+        """Iterate over the json lines of all competition_formats, as stored."""
+        for position, (_, competition_format_id) in enumerate(self._order, start=1):
+            yield self._json(competition_format_id, view, newline=True)
+            if position % batch_size == 0:
+                await asyncio.sleep(0)
+
+    @override
+    async def get_all_competition_formats(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatUnion]:
+        return [
+            self._document(competition_format_id)
+            for competition_format_id in self._page(limit, after)
+        ]
+
+    @override
+    async def get_all_competition_format_summaries(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatSummary]:
+        return [
+            self._summary(competition_format_id)
+            for competition_format_id in self._page(limit, after)
+        ]
+
+    @override
+    async def get_competition_format_revisions(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[tuple[UUID, int]]:
+        return [
+            (competition_format_id, self._entries[competition_format_id].revision)
+            for competition_format_id in self._page(limit, after)
+        ]
+
+    @override
+    async def stream_competition_formats(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatUnion]:
+        """Iterate over all competition_formats, letting other tasks run between batches."""
+        for position, (_, competition_format_id) in enumerate(self._order, start=1):
+            yield self._document(competition_format_id)
+            if position % batch_size == 0:
+                await asyncio.sleep(0)
+
+    @override
+    async def stream_competition_format_summaries(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatSummary]:
+        for position, (_, competition_format_id) in enumerate(self._order, start=1):
+            yield self._summary(competition_format_id)
+            if position % batch_size == 0:
+                await asyncio.sleep(0)
+
+    @override
+    async def get_competition_format_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatUnion | None:
+        if competition_format_id not in self._entries:
+            return None
+        return self._document(competition_format_id)
+
+    @override
+    async def get_competition_format_summary_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatSummary | None:
+        if competition_format_id not in self._entries:
+            return None
+        return self._summary(competition_format_id)
+
+    @override
+    async def get_competition_format_revision(
+        self, competition_format_id: UUID
+    ) -> int | None:
+        entry = self._entries.get(competition_format_id)
+        return entry.revision if entry else None
+
+    @override
+    async def get_competition_formats_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatUnion]:
+        return [
+            self._document(competition_format_id)
+            for competition_format_id in self._search(
+                competition_format_name, mode, limit
+            )
+        ]
+
+    @override
+    async def get_competition_format_summaries_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatSummary]:
+        return [
+            self._summary(competition_format_id)
+            for competition_format_id in self._search(
+                competition_format_name, mode, limit
+            )
+        ]
+
+    def _read_only(self) -> NoReturn:
+        """Refuse a write.
+
+        Raises:
+            ReadOnlyStorageError: always
+        """
+        msg = f"Competition formats are served read-only from the snapshot {self.path}."
+        raise ReadOnlyStorageError(msg)
+
+    @override
+    async def create_competition_format(
+        self, competition_format: CompetitionFormatUnion
+    ) -> NoReturn:
+        self._read_only()
+
+    @override
+    async def create_competition_formats(
+        self, competition_formats: list[CompetitionFormatUnion]
+    ) -> NoReturn:
+        self._read_only()
+
+    @override
+    async def upsert_competition_formats(
+        self,
+        competition_formats: list[CompetitionFormatUnion],
+        *,
+        keep_revisions: bool = False,
+    ) -> NoReturn:
+        self._read_only()
+
+    @override
+    async def update_competition_format(
+        self,
+        competition_format_id: UUID,
+        competition_format: CompetitionFormatUnion,
+        expected_revision: int | None = None,
+    ) -> NoReturn:
+        self._read_only()
+
+    @override
+    async def delete_competition_format(self, competition_format_id: UUID) -> NoReturn:
+        self._read_only()
+
+    @override
+    async def watch_competition_format_changes(
+        self, poll_interval: float
+    ) -> AsyncIterator[UUID | None]:
+        """Wait forever, since a snapshot never changes."""
+        await asyncio.Event().wait()
+        yield None  # pragma: no cover
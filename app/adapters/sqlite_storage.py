@@ -0,0 +1,555 @@
+"""Module for the sqlite storage of competition_formats."""
+
+import asyncio
+import json
+import sqlite3
+import sys
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, override
+from uuid import UUID
+
+from pymongo.errors import DuplicateKeyError
+
+from app.models import CompetitionFormatSummary, CompetitionFormatUnion
+
+from .documents import read_json_document, write_document
+from .name_index import NameSearchMode, name_ngrams, normalize_name
+from .storage import CompetitionFormatsStorage
+
+# Error code of a write violating a unique index, as from mongo:
+DUPLICATE_KEY = 11000
+# Expression reading only the fields of a CompetitionFormatSummary:
+SUMMARY_COLUMN = "json_object({})".format(
+    ", ".join(
+        f"'{field}', json_extract(document, '$.{field}')"
+        for field in CompetitionFormatSummary.model_fields
+    )
+)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS competition_formats (
+    id TEXT PRIMARY KEY,
+    name_key TEXT NOT NULL UNIQUE,
+    revision INTEGER NOT NULL DEFAULT 0,
+    document TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS competition_formats_name_key_id
+    ON competition_formats (name_key, id);
+CREATE TABLE IF NOT EXISTS competition_format_ngrams (
+    ngram TEXT NOT NULL,
+    id TEXT NOT NULL REFERENCES competition_formats (id) ON DELETE CASCADE,
+    PRIMARY KEY (ngram, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS competition_format_ngrams_id
+    ON competition_format_ngrams (id);
+"""
+
+
+def prefix_successor(prefix: str) -> str | None:
+    """Return the least string greater than every string starting with prefix.
+
+    None is returned if there is none, as for the empty prefix.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SqliteCompetitionFormatsStorage(CompetitionFormatsStorage):
+    """Class representing a storage of competition_formats in a sqlite file.
+
+    Every competition_format is stored as a json document, next to indexed
+    id, name_key and revision columns. The n-grams of the name_key are kept
+    in a side table, for substring search. The database is opened in WAL
+    mode, so that readers in other processes do not block the writer.
+
+    sqlite is blocking, so every call runs on a single worker thread owning
+    the connection, which also serializes the writes.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Initialize the storage on a database file, not yet opened."""
+        self.path = path
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite-storage"
+        )
+        self._connection: sqlite3.Connection | None = None
+        self._watchers: set[asyncio.Queue[UUID | None]] = set()
+
+    async def _run[T](self, function: Callable[..., T], *args: Any) -> T:
+        """Run a function on the worker thread owning the connection."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args
+        )
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Return the open connection."""
+        if self._connection is None:
+            msg = "The sqlite storage is not initialized."
+            raise RuntimeError(msg)
+        return self._connection
+
+    def _open(self) -> None:
+        """Open the database, and create the tables and indexes."""
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.executescript(SCHEMA)
+        self._connection = connection
+
+    def _close(self) -> None:
+        """Close the database."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @override
+    async def init(self) -> None:
+        await self._run(self._open)
+
+    @override
+    async def close(self) -> None:
+        await self._run(self._close)
+        # The worker is idle once closed, so there is nothing to wait for:
+        self._executor.shutdown(wait=False)
+
+    @classmethod
+    def to_row(cls, competition_format: CompetitionFormatUnion) -> tuple:
+        """Dump a competition_format to the (id, name_key, revision, document) row.
+
+        Documents written before durations were stored as seconds are read
+        as they are, and rewritten on their next write.
+        """
+        return (
+            str(competition_format.id),
+            normalize_name(competition_format.name),
+            competition_format.revision,
+            json.dumps(write_document(competition_format, mode="json")),
+        )
+
+    @classmethod
+    def to_competition_format(cls, document: str) -> CompetitionFormatUnion:
+        """Read a competition_format from a stored document.
+
+        The documents are written by this service, so they are trusted, and
+        built into models without validation.
+        """
+        return read_json_document(document)
+
+    def _select(self, sql: str, parameters: tuple = ()) -> list[Any]:
+        """Return the first column of every row a query returns."""
+        return [row[0] for row in self.connection.execute(sql, parameters)]
+
+    def _page(
+        self, column: str, limit: int, after: tuple[str, UUID] | None
+    ) -> list[Any]:
+        """Return a column of the formats on a page ordered by (name_key, id)."""
+        if after is None:
+            return self._select(
+                f"SELECT {column} FROM competition_formats"  # noqa: S608
+                " ORDER BY name_key, id LIMIT ?",
+                (limit,),
+            )
+        name_key, competition_format_id = after
+        return self._select(
+            f"SELECT {column} FROM competition_formats"  # noqa: S608
+            " WHERE (name_key, id) > (?, ?) ORDER BY name_key, id LIMIT ?",
+            (name_key, str(competition_format_id), limit),
+        )
+
+    def _search(
+        self, column: str, name: str, mode: NameSearchMode, limit: int
+    ) -> list[Any]:
+        """Return a column of the formats matching a name, ordered by name_key.
+
+        A prefix search is a range of the name_key index. A substring search
+        narrows the candidates with the n-gram table first; terms shorter
+        than an n-gram fall back to a scan of the name_key index.
+        """
+        name_key = normalize_name(name)
+        if mode == NameSearchMode.Prefix:
+            # The keys starting with the prefix are those between it and its successor:
+            sql = (
+                f"SELECT {column} FROM competition_formats"  # noqa: S608
+                " WHERE name_key >= ? AND (? IS NULL OR name_key < ?)"
+            )
+            successor = prefix_successor(name_key)
+            parameters: tuple = (name_key, successor, successor)
+        elif ngrams := name_ngrams(name_key):
+            sql = (
+                f"SELECT {column} FROM competition_formats"  # noqa: S608
+                " WHERE id IN (SELECT id FROM competition_format_ngrams"
+                f" WHERE ngram IN ({', '.join('?' * len(ngrams))})"
+                " GROUP BY id HAVING count(*) = ?)"
+                " AND instr(name_key, ?) > 0"
+            )
+            parameters = (*ngrams, len(ngrams), name_key)
+        else:
+            sql = (
+                f"SELECT {column} FROM competition_formats"  # noqa: S608
+                " WHERE instr(name_key, ?) > 0"
+            )
+            parameters = (name_key,)
+        # A negative limit means no limit to sqlite:
+        return self._select(
+            f"{sql} ORDER BY name_key, id LIMIT ?", (*parameters, limit or -1)
+        )
+
+    def _insert(self, competition_format: CompetitionFormatUnion) -> None:
+        """Insert a competition_format and its n-grams.
+
+        Raises:
+            sqlite3.IntegrityError: a format with the same id or name already exist
+        """
+        row = self.to_row(competition_format)
+        self.connection.execute(
+            "INSERT INTO competition_formats (id, name_key, revision, document)"
+            " VALUES (?, ?, ?, ?)",
+            row,
+        )
+        self._index_ngrams(row[0], row[1])
+
+    def _index_ngrams(self, competition_format_id: str, name_key: str) -> None:
+        """Replace the n-grams of a competition_format."""
+        self.connection.execute(
+            "DELETE FROM competition_format_ngrams WHERE id = ?",
+            (competition_format_id,),
+        )
+        self.connection.executemany(
+            "INSERT INTO competition_format_ngrams (ngram, id) VALUES (?, ?)",
+            [(ngram, competition_format_id) for ngram in name_ngrams(name_key)],
+        )
+
+    def _create(self, competition_format: CompetitionFormatUnion) -> None:
+        """Create a competition_format in its own transaction.
+
+        Raises:
+            DuplicateKeyError: a format with the same id or name already exist
+        """
+        try:
+            with self.connection:
+                self._insert(competition_format)
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(str(e), code=DUPLICATE_KEY) from e
+
+    def _create_many(
+        self, competition_formats: list[CompetitionFormatUnion]
+    ) -> set[int]:
+        """Create many competition_formats in one transaction, skipping duplicates.
+
+        A violated constraint only undoes the failing statement, and the
+        n-grams are inserted after the format, so a duplicate leaves nothing.
+        """
+        duplicates = set()
+        with self.connection:
+            for position, competition_format in enumerate(competition_formats):
+                try:
+                    self._insert(competition_format)
+                except sqlite3.IntegrityError:
+                    duplicates.add(position)
+        return duplicates
+
+    def _upsert_many(
+        self,
+        competition_formats: list[CompetitionFormatUnion],
+        keep_revisions: bool,  # noqa: FBT001
+    ) -> tuple[int, int, dict[int, str]]:
+        """Create or replace many competition_formats by id, in one transaction.
+
+        Unless keep_revisions, a created format is stored at revision 1, and
+        a replaced one at the next revision, in the same statement.
+        """
+        sql = (
+            "INSERT INTO competition_formats (id, name_key, revision, document)"
+            " VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (id) DO UPDATE SET name_key = excluded.name_key,"
+            " revision = excluded.revision, document = excluded.document"
+            if keep_revisions
+            else "INSERT INTO competition_formats (id, name_key, revision, document)"
+            " VALUES (?1, ?2, 1, json_set(?4, '$.revision', 1))"
+            " ON CONFLICT (id) DO UPDATE SET name_key = excluded.name_key,"
+            " revision = revision + 1,"
+            " document = json_set(?4, '$.revision', revision + 1)"
+        )
+        created, replaced, errors = 0, 0, {}
+        with self.connection:
+            for position, competition_format in enumerate(competition_formats):
+                row = self.to_row(competition_format)
+                exists = self._select(
+                    "SELECT count(*) FROM competition_formats WHERE id = ?", row[:1]
+                ) == [1]
+                try:
+                    self.connection.execute(sql, row)
+                except sqlite3.IntegrityError as e:
+                    errors[position] = f"E{DUPLICATE_KEY} duplicate key error: {e}"
+                    continue
+                self._index_ngrams(row[0], row[1])
+                if exists:
+                    replaced += 1
+                else:
+                    created += 1
+        return created, replaced, errors
+
+    def _update(
+        self,
+        competition_format_id: UUID,
+        competition_format: CompetitionFormatUnion,
+        expected_revision: int | None,
+    ) -> int | None:
+        """Replace a competition_format and increment its revision in one statement.
+
+        Raises:
+            DuplicateKeyError: another format with the same name already exist
+        """
+        _, name_key, _, document = self.to_row(competition_format)
+        try:
+            with self.connection:
+                result = self.connection.execute(
+                    "UPDATE competition_formats"
+                    " SET name_key = ?, revision = revision + 1,"
+                    " document = json_set(?, '$.id', id, '$.revision', revision + 1)"
+                    " WHERE id = ? AND (? IS NULL OR revision = ?)"
+                    " RETURNING revision",
+                    (
+                        name_key,
+                        document,
+                        str(competition_format_id),
+                        expected_revision,
+                        expected_revision,
+                    ),
+                ).fetchone()
+                if result is not None:
+                    self._index_ngrams(str(competition_format_id), name_key)
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(str(e), code=DUPLICATE_KEY) from e
+        return result[0] if result is not None else None
+
+    def _delete(self, competition_format_id: UUID) -> int:
+        """Delete a competition_format, and its n-grams by cascade."""
+        with self.connection:
+            return self.connection.execute(
+                "DELETE FROM competition_formats WHERE id = ?",
+                (str(competition_format_id),),
+            ).rowcount
+
+    def _data_version(self) -> int:
+        """Return a number that changes when another connection commits."""
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def _notify(self, competition_format_id: UUID) -> None:
+        """Tell every watcher that a competition_format is changed."""
+        for queue in self._watchers:
+            queue.put_nowait(competition_format_id)
+
+    @override
+    async def is_ready(self) -> bool:
+        return await self._run(self._select, "SELECT 1") == [1]
+
+    @override
+    async def get_all_competition_formats(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatUnion]:
+        documents = await self._run(self._page, "document", limit, after)
+        return [self.to_competition_format(document) for document in documents]
+
+    @override
+    async def get_all_competition_format_summaries(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatSummary]:
+        documents = await self._run(self._page, SUMMARY_COLUMN, limit, after)
+        return [
+            CompetitionFormatSummary.model_validate_json(document)
+            for document in documents
+        ]
+
+    @override
+    async def get_competition_format_revisions(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[tuple[UUID, int]]:
+        rows = await self._run(self._page, "json_array(id, revision)", limit, after)
+        return [
+            (UUID(competition_format_id), revision)
+            for competition_format_id, revision in map(json.loads, rows)
+        ]
+
+    @override
+    async def stream_competition_formats(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatUnion]:
+        """Iterate over all competition_formats, reading batch_size at a time.
+
+        Every batch is read as the next page, so no read is held open
+        between batches.
+        """
+        after = None
+        while competition_formats := await self.get_all_competition_formats(
+            batch_size, after
+        ):
+            for competition_format in competition_formats:
+                yield competition_format
+            last = competition_formats[-1]
+            after = (normalize_name(last.name), last.id)
+
+    @override
+    async def stream_competition_format_summaries(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatSummary]:
+        after = None
+        while summaries := await self.get_all_competition_format_summaries(
+            batch_size, after
+        ):
+            for summary in summaries:
+                yield summary
+            last = summaries[-1]
+            after = (normalize_name(last.name), last.id)
+
+    @override
+    async def create_competition_format(
+        self, competition_format: CompetitionFormatUnion
+    ) -> UUID:
+        await self._run(self._create, competition_format)
+        self._notify(competition_format.id)
+        return competition_format.id
+
+    @override
+    async def create_competition_formats(
+        self, competition_formats: list[CompetitionFormatUnion]
+    ) -> set[int]:
+        duplicates = await self._run(self._create_many, competition_formats)
+        for position, competition_format in enumerate(competition_formats):
+            if position not in duplicates:
+                self._notify(competition_format.id)
+        return duplicates
+
+    @override
+    async def upsert_competition_formats(
+        self,
+        competition_formats: list[CompetitionFormatUnion],
+        *,
+        keep_revisions: bool = False,
+    ) -> tuple[int, int, dict[int, str]]:
+        created, replaced, errors = await self._run(
+            self._upsert_many, competition_formats, keep_revisions
+        )
+        for position, competition_format in enumerate(competition_formats):
+            if position not in errors:
+                self._notify(competition_format.id)
+        return created, replaced, errors
+
+    @override
+    async def get_competition_format_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatUnion | None:
+        documents = await self._run(
+            self._select,
+            "SELECT document FROM competition_formats WHERE id = ?",
+            (str(competition_format_id),),
+        )
+        return self.to_competition_format(documents[0]) if documents else None
+
+    @override
+    async def get_competition_format_summary_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatSummary | None:
+        documents = await self._run(
+            self._select,
+            f"SELECT {SUMMARY_COLUMN} FROM competition_formats WHERE id = ?",  # noqa: S608
+            (str(competition_format_id),),
+        )
+        return (
+            CompetitionFormatSummary.model_validate_json(documents[0])
+            if documents
+            else None
+        )
+
+    @override
+    async def get_competition_format_revision(
+        self, competition_format_id: UUID
+    ) -> int | None:
+        revisions = await self._run(
+            self._select,
+            "SELECT revision FROM competition_formats WHERE id = ?",
+            (str(competition_format_id),),
+        )
+        return revisions[0] if revisions else None
+
+    @override
+    async def get_competition_formats_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatUnion]:
+        documents = await self._run(
+            self._search, "document", competition_format_name, mode, limit
+        )
+        return [self.to_competition_format(document) for document in documents]
+
+    @override
+    async def get_competition_format_summaries_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatSummary]:
+        documents = await self._run(
+            self._search, SUMMARY_COLUMN, competition_format_name, mode, limit
+        )
+        return [
+            CompetitionFormatSummary.model_validate_json(document)
+            for document in documents
+        ]
+
+    @override
+    async def update_competition_format(
+        self,
+        competition_format_id: UUID,
+        competition_format: CompetitionFormatUnion,
+        expected_revision: int | None = None,
+    ) -> int | None:
+        revision = await self._run(
+            self._update, competition_format_id, competition_format, expected_revision
+        )
+        if revision is not None:
+            self._notify(competition_format_id)
+        return revision
+
+    @override
+    async def delete_competition_format(self, competition_format_id: UUID) -> int:
+        """Delete a competition_format, returning the number deleted."""
+        deleted = await self._run(self._delete, competition_format_id)
+        if deleted:
+            self._notify(competition_format_id)
+        return deleted
+
+    @override
+    async def watch_competition_format_changes(
+        self, poll_interval: float
+    ) -> AsyncIterator[UUID | None]:
+        """Yield the id of every competition_format that is changed.
+
+        Changes made through this storage are pushed to the watcher as they
+        are made. Changes committed by other processes on the same file are
+        seen by polling the data version every poll_interval seconds, and
+        yield None, since their ids are unknown.
+        """
+        queue: asyncio.Queue[UUID | None] = asyncio.Queue()
+        self._watchers.add(queue)
+        try:
+            data_version = await self._run(self._data_version)
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=poll_interval)
+                except TimeoutError:
+                    previous_version, data_version = (
+                        data_version,
+                        await self._run(self._data_version),
+                    )
+                    if data_version != previous_version:
+                        yield None
+        finally:
+            self._watchers.discard(queue)
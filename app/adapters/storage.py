@@ -0,0 +1,250 @@
+"""Module for the storage contract of competition_formats."""
+
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from enum import StrEnum
+from typing import Any
+from uuid import UUID
+
+from app.models import (
+    CompetitionFormatSummary,
+    CompetitionFormatUnion,
+    CompetitionFormatView,
+)
+
+from .name_index import NameSearchMode
+
+
+class ReadOnlyStorageError(Exception):
+    """Class representing custom exception for writes to a read-only storage."""
+
+    def __init__(self, message: str) -> None:
+        """Initialize the error."""
+        # Call the base class constructor with the parameters it needs
+        super().__init__(message)
+
+
+class StorageBackend(StrEnum):
+    """The available storages of competition_formats."""
+
+    Mongo = "mongo"
+    Memory = "memory"
+    Sqlite = "sqlite"
+    Snapshot = "snapshot"
+
+
+class CompetitionFormatsStorage(ABC):
+    """Abstract class with the operations every storage of competition_formats has.
+
+    The adapters delegate to the storage chosen at startup. Formats are
+    ordered by (name_key, id), where name_key is the normalized name, which
+    is unique. A write violating the uniqueness of id or name_key raises
+    DuplicateKeyError, whatever the storage. Every write to a read-only
+    storage raises ReadOnlyStorageError.
+    """
+
+    async def init(self) -> None:  # noqa: B027
+        """Prepare the storage for use, e.g. by creating indexes."""
+
+    async def close(self) -> None:  # noqa: B027
+        """Release the resources of the storage."""
+
+    def replica_age(self) -> float | None:
+        """Return the seconds since an in-memory replica was loaded, if any."""
+        return None
+
+    def serves_json(self) -> bool:
+        """Check if the storage keeps every view of a format as json, as returned.
+
+        Such a storage has the json reads below, and its json is returned as
+        is, rather than encoded from the formats read.
+        """
+        return False
+
+    async def get_competition_format_json_by_id(
+        self, competition_format_id: UUID, view: CompetitionFormatView
+    ) -> tuple[int, bytes | memoryview] | None:
+        """Get the json of a view of a competition_format by id, with its revision.
+
+        Raises:
+            NotImplementedError: the storage does not serve json
+        """
+        raise NotImplementedError
+
+    async def get_all_competition_format_json(
+        self,
+        limit: int,
+        view: CompetitionFormatView,
+        after: tuple[str, UUID] | None = None,
+    ) -> list[tuple[str, UUID, int, bytes | memoryview]]:
+        """Get the page of get_all_competition_formats as json.
+
+        Returns:
+            The name_key, id, revision and json of every item on the page.
+
+        Raises:
+            NotImplementedError: the storage does not serve json
+        """
+        raise NotImplementedError
+
+    def stream_competition_format_json(
+        self, batch_size: int, view: CompetitionFormatView
+    ) -> AsyncIterator[bytes | memoryview]:
+        """Iterate over all competition_formats as lines of newline delimited json.
+
+        Raises:
+            NotImplementedError: the storage does not serve json
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def is_ready(self) -> bool:
+        """Check if the storage can serve requests."""
+
+    @abstractmethod
+    async def get_all_competition_formats(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatUnion]:
+        """Get a page of competition_formats ordered by (name_key, id).
+
+        Args:
+            limit: the maximum number of competition_formats on the page
+            after: the (name_key, id) of the last item on the previous page
+        """
+
+    @abstractmethod
+    async def get_all_competition_format_summaries(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[CompetitionFormatSummary]:
+        """Get the page of get_all_competition_formats, as summaries."""
+
+    @abstractmethod
+    async def get_competition_format_revisions(
+        self, limit: int, after: tuple[str, UUID] | None = None
+    ) -> list[tuple[UUID, int]]:
+        """Get the (id, revision) of the page of get_all_competition_formats."""
+
+    @abstractmethod
+    def stream_competition_formats(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatUnion]:
+        """Iterate over all competition_formats, fetching batch_size at a time."""
+
+    @abstractmethod
+    def stream_competition_format_summaries(
+        self, batch_size: int
+    ) -> AsyncIterator[CompetitionFormatSummary]:
+        """Iterate over summaries of all competition_formats, batch_size at a time."""
+
+    @abstractmethod
+    async def create_competition_format(
+        self, competition_format: CompetitionFormatUnion
+    ) -> Any:
+        """Create a competition_format, returning a truthy result.
+
+        Raises:
+            DuplicateKeyError: a format with the same id or name already exist
+        """
+
+    @abstractmethod
+    async def create_competition_formats(
+        self, competition_formats: list[CompetitionFormatUnion]
+    ) -> set[int]:
+        """Create many competition_formats, not stopping at duplicates.
+
+        Returns:
+            The positions in competition_formats of those that were not
+            created, because a format with the same id or name already exist.
+        """
+
+    @abstractmethod
+    async def upsert_competition_formats(
+        self,
+        competition_formats: list[CompetitionFormatUnion],
+        *,
+        keep_revisions: bool = False,
+    ) -> tuple[int, int, dict[int, str]]:
+        """Create or replace many competition_formats by id.
+
+        A created competition_format starts at the first revision, and a
+        replaced one is at the next revision of the one it replaces, as on
+        update. With keep_revisions, they are stored at the revision given,
+        as when copying from another storage.
+
+        Returns:
+            The number of created and of replaced competition_formats, and the
+            error message for the position of every one that was not written.
+        """
+
+    @abstractmethod
+    async def get_competition_format_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatUnion | None:
+        """Get a competition_format by id."""
+
+    @abstractmethod
+    async def get_competition_format_summary_by_id(
+        self, competition_format_id: UUID
+    ) -> CompetitionFormatSummary | None:
+        """Get the summary of a competition_format by id."""
+
+    @abstractmethod
+    async def get_competition_format_revision(
+        self, competition_format_id: UUID
+    ) -> int | None:
+        """Get the revision of a competition_format, without reading the rest."""
+
+    @abstractmethod
+    async def get_competition_formats_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatUnion]:
+        """Get competition_formats by normalized name, ordered by name_key.
+
+        A limit of 0 means no limit.
+        """
+
+    @abstractmethod
+    async def get_competition_format_summaries_by_name(
+        self,
+        competition_format_name: str,
+        mode: NameSearchMode = NameSearchMode.Substring,
+        limit: int = 0,
+    ) -> list[CompetitionFormatSummary]:
+        """Get summaries of competition_formats by name."""
+
+    @abstractmethod
+    async def update_competition_format(
+        self,
+        competition_format_id: UUID,
+        competition_format: CompetitionFormatUnion,
+        expected_revision: int | None = None,
+    ) -> int | None:
+        """Replace a competition_format and increment its revision atomically.
+
+        Args:
+            competition_format_id: the id of the competition_format
+            competition_format: the new competition_format
+            expected_revision: only update the competition_format if at this revision
+
+        Returns:
+            The new revision, or None if no competition_format matched.
+
+        Raises:
+            DuplicateKeyError: another format with the same name already exist
+        """
+
+    @abstractmethod
+    async def delete_competition_format(self, competition_format_id: UUID) -> Any:
+        """Delete a competition_format."""
+
+    @abstractmethod
+    def watch_competition_format_changes(
+        self, poll_interval: float
+    ) -> AsyncIterator[UUID | None]:
+        """Yield the id of every competition_format that is changed.
+
+        None is yielded when the id of a change is unknown, as for deletes.
+        """
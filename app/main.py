@@ -1,27 +1,51 @@
 """Module for admin of sporting events."""
 
+import asyncio
 import logging
 import os
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from http import HTTPStatus
+from typing import Any
 
 import motor.motor_asyncio
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
-from .adapters import CompetitionFormatsAdapter, LivenessAdapter
+from .adapters import (
+    CompetitionFormatsAdapter,
+    CompetitionFormatsStorage,
+    InMemoryCompetitionFormatsStorage,
+    LivenessAdapter,
+    MongoClientSettings,
+    MongoCompetitionFormatsStorage,
+    ReadOnlyStorageError,
+    ReplicaCompetitionFormatsStorage,
+    SnapshotCompetitionFormatsStorage,
+    SqliteCompetitionFormatsStorage,
+    StorageBackend,
+    open_min_pool,
+    pool_metrics_listener,
+)
 from .authorization import (
     TokenError,
     TokenMissingError,
     TokenValidationError,
 )
-from .routers import competition_formats, ping, ready
+from .routers import competition_formats, metrics, ping, ready
+from .services import CompetitionFormatsService
 
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = int(os.getenv("DB_PORT", "27017"))
 DB_NAME = os.getenv("DB_NAME", "competition_formats")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", StorageBackend.Mongo)
+SQLITE_PATH = os.getenv("SQLITE_PATH", "competition_formats.db")
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "competition_formats.snapshot")
+CHANGE_POLL_INTERVAL_SECONDS = float(os.getenv("CHANGE_POLL_INTERVAL_SECONDS", "5"))
+CATALOG_REPLICA = os.getenv("CATALOG_REPLICA", "false").lower() == "true"
+REPLICA_REFRESH_SECONDS = float(os.getenv("REPLICA_REFRESH_SECONDS", "300"))
 
 
 class EndpointFilter(logging.Filter):
@@ -53,27 +77,76 @@ excluded_endpoints = ["/health", "/metrics"]
 access_logger.addFilter(EndpointFilter(excluded_endpoints))
 
 
-@asynccontextmanager
-async def lifespan(api: FastAPI) -> AsyncGenerator[None]:  # noqa: ARG001  # pragma: no cover
-    """Start adapters and internal message consumer on app startup."""
-    # Initialize database:
-    logger.debug(f"Connecting to db at {DB_HOST}:{DB_PORT}")
-    mongo = motor.motor_asyncio.AsyncIOMotorClient(
+def create_mongo_client(
+    settings: MongoClientSettings | None = None,
+) -> Any:  # pragma: no cover
+    """Create a client for the db given by the environment.
+
+    Raises:
+        pydantic.ValidationError: a setting in the environment has an illegal value
+    """
+    settings = settings or MongoClientSettings.from_env()
+    logger.debug(f"Connecting to db at {DB_HOST}:{DB_PORT} with {settings}")
+    return motor.motor_asyncio.AsyncIOMotorClient(
         host=DB_HOST,
         port=DB_PORT,
         username=DB_USER,
         password=DB_PASSWORD,
         uuidRepresentation="standard",
+        event_listeners=[pool_metrics_listener],
+        **settings.client_options(),
     )
-    db = mongo[f"{DB_NAME}"]
 
-    await LivenessAdapter.init(db)
-    await CompetitionFormatsAdapter.init(db)
+
+async def create_storage() -> CompetitionFormatsStorage:  # pragma: no cover
+    """Create the storage given by STORAGE_BACKEND.
+
+    Raises:
+        ValueError: STORAGE_BACKEND is not a known storage
+    """
+    backend = StorageBackend(STORAGE_BACKEND)
+    logger.info(f"Using {backend} storage")
+    if backend == StorageBackend.Memory:
+        return InMemoryCompetitionFormatsStorage()
+    if backend == StorageBackend.Sqlite:
+        return SqliteCompetitionFormatsStorage(SQLITE_PATH)
+    if backend == StorageBackend.Snapshot:
+        return SnapshotCompetitionFormatsStorage(SNAPSHOT_PATH)
+    settings = MongoClientSettings.from_env()
+    db = create_mongo_client(settings)[DB_NAME]
+    await open_min_pool(db, settings.min_pool_size)
+    return MongoCompetitionFormatsStorage(db)
+
+
+@asynccontextmanager
+async def lifespan(api: FastAPI) -> AsyncGenerator[None]:  # noqa: ARG001  # pragma: no cover
+    """Start adapters and internal message consumer on app startup."""
+    # Initialize storage:
+    storage = await create_storage()
+    if CATALOG_REPLICA:
+        # Serve every read from a replica of the whole catalog in memory:
+        storage = ReplicaCompetitionFormatsStorage(
+            storage,
+            refresh_interval=REPLICA_REFRESH_SECONDS,
+            poll_interval=CHANGE_POLL_INTERVAL_SECONDS,
+        )
+    await LivenessAdapter.init(storage)
+    await CompetitionFormatsAdapter.init(storage)
+
+    # Keep the cache coherent with changes made through other replicas:
+    watcher = asyncio.create_task(
+        CompetitionFormatsService.watch_changes(
+            poll_interval=CHANGE_POLL_INTERVAL_SECONDS
+        )
+    )
 
     yield
 
     # Cleanup resources if needed
-    mongo.close()
+    watcher.cancel()
+    with suppress(asyncio.CancelledError):
+        await watcher
+    await storage.close()
 
 
 api = FastAPI(
@@ -107,7 +180,20 @@ async def unicorn_exception_handler(
     )
 
 
+@api.exception_handler(ReadOnlyStorageError)
+async def read_only_exception_handler(
+    request: Request, exc: ReadOnlyStorageError
+) -> JSONResponse:
+    """Handle writes to a read-only storage."""
+    _ = request  # Unused variable
+    return JSONResponse(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+    )
+
+
 # Set up routes:
 api.include_router(ping.router)
 api.include_router(ready.router)
+api.include_router(metrics.router)
 api.include_router(competition_formats.router)
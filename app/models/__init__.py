@@ -1,17 +1,52 @@
 """Package for all models."""
 
+from .bulk_model import BulkItemResult, BulkItemStatus, ImportResult
+from .capacity_model import Capacity, CapacityTable
 from .competition_format_model import (
     CompetitionFormat,
+    CompetitionFormatSummary,
     CompetitionFormatUnion,
+    CompetitionFormatUnionAdapter,
+    CompetitionFormatView,
     IndividualSprintFormat,
     IntervalStartFormat,
     RaceConfig,
 )
+from .progression_graph_model import QUOTA_ALL, QUOTA_REST, ProgressionGraph
+from .race_config_model import RaceConfigMatch, RaceConfigMatchesAdapter
+from .start_list_model import (
+    StartList,
+    StartListRaceclass,
+    StartListRequest,
+    StartListsAdapter,
+)
+from .timetable_model import Heat, HeatsAdapter, TimetableRaceclass, TimetableRequest
 
 __all__ = [
+    "QUOTA_ALL",
+    "QUOTA_REST",
+    "BulkItemResult",
+    "BulkItemStatus",
+    "Capacity",
+    "CapacityTable",
     "CompetitionFormat",
+    "CompetitionFormatSummary",
     "CompetitionFormatUnion",
+    "CompetitionFormatUnionAdapter",
+    "CompetitionFormatView",
+    "Heat",
+    "HeatsAdapter",
+    "ImportResult",
     "IndividualSprintFormat",
     "IntervalStartFormat",
+    "ProgressionGraph",
     "RaceConfig",
+    "RaceConfigMatch",
+    "RaceConfigMatchesAdapter",
+    "StartList",
+    "StartListRaceclass",
+    "StartListRequest",
+    "StartListsAdapter",
+    "TimetableRaceclass",
+    "TimetableRequest",
 ]
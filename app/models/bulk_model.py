@@ -0,0 +1,32 @@
+"""Bulk operation result data class module."""
+
+from enum import StrEnum
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class BulkItemStatus(StrEnum):
+    """Outcomes of one item in a bulk operation."""
+
+    Created = "created"
+    Duplicate = "duplicate"
+    Invalid = "invalid"
+
+
+class BulkItemResult(BaseModel):
+    """Data class with the outcome of one item in a bulk operation."""
+
+    index: int
+    status: BulkItemStatus
+    id: UUID | None = None
+    detail: str | None = None
+
+
+class ImportResult(BaseModel):
+    """Data class with the outcome of an import of competition_formats."""
+
+    created: int = 0
+    replaced: int = 0
+    invalid: int = 0
+    errors: list[str] = []
@@ -0,0 +1,24 @@
+"""Capacity table data class module."""
+
+from pydantic import BaseModel
+
+
+class Capacity(BaseModel):
+    """Data class with what the race configs give for every raceclass size.
+
+    Every array has an item for every number of contestants, from 1 to
+    max_no_of_contestants_in_raceclass, at index contestants - 1: the
+    max_no_of_contestants of the race config covering them, or None, the
+    number of heats in every round, and the size of the largest heat.
+    """
+
+    max_no_of_contestants: list[int | None]
+    no_of_heats: list[dict[str, int]]
+    largest_heat: list[int]
+
+
+class CapacityTable(BaseModel):
+    """Data class with the capacity of the ranked and non-ranked race configs."""
+
+    ranked: Capacity
+    non_ranked: Capacity
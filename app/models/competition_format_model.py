@@ -2,17 +2,17 @@
 
 from abc import ABC
 from datetime import timedelta
-from typing import Annotated, Literal
+from enum import StrEnum
+from typing import Annotated, Literal, Self
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, ConfigDict, Field, PlainSerializer
+from pydantic import BaseModel, ConfigDict, Field, PlainSerializer, TypeAdapter
 
 
 def serialize_timedelta(value: timedelta) -> str:
-    """Serialize timedelta to HH:MM:SS format."""
+    """Serialize timedelta to HH:MM:SS format, counting whole days as 24 hours."""
     total_seconds = int(value.total_seconds())
-    _, remainder = divmod(total_seconds, 86400)  # 24 * 60 * 60
-    hours, remainder = divmod(remainder, 3600)
+    hours, remainder = divmod(total_seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
@@ -31,6 +31,7 @@ class CompetitionFormat(BaseModel, ABC):
     )
 
     id: UUID = Field(default_factory=uuid4)
+    revision: Annotated[int, Field(ge=0)] = 0
     name: str
     start_procedure: str
     starting_order: str
@@ -72,3 +73,40 @@ class IndividualSprintFormat(CompetitionFormat):
 CompetitionFormatUnion = Annotated[
     IntervalStartFormat | IndividualSprintFormat, Field(discriminator="datatype")
 ]
+
+# Validates and serializes competition-formats of either datatype. Building
+# the validator is costly, so it is built once and shared:
+CompetitionFormatUnionAdapter: TypeAdapter[CompetitionFormatUnion] = TypeAdapter(
+    CompetitionFormatUnion
+)
+
+
+class CompetitionFormatView(StrEnum):
+    """Views of a competition-format in responses."""
+
+    Full = "full"
+    Summary = "summary"
+
+
+class CompetitionFormatSummary(BaseModel):
+    """Data class with the fields of a competition-format needed to list it.
+
+    The timings and race configs are left out, so that a summary is cheap to
+    read from the db, to send and to validate.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    id: UUID
+    revision: int = 0
+    name: str
+    datatype: Literal["interval_start", "individual_sprint"]
+    max_no_of_contestants_in_raceclass: int
+    max_no_of_contestants_in_race: int
+
+    @classmethod
+    def of(cls, competition_format: CompetitionFormat) -> Self:
+        """Return the summary of a competition-format."""
+        return cls.model_validate(
+            competition_format.model_dump(include=set(cls.model_fields))
+        )
@@ -0,0 +1,32 @@
+"""Progression graph data class module."""
+
+from pydantic import BaseModel
+
+# Quotas that are not a number of contestants:
+QUOTA_ALL = -1
+QUOTA_REST = -2
+
+
+class ProgressionGraph(BaseModel):
+    """Data class with the from_to of a race config, compiled to a graph.
+
+    Every (round, heat) of the race config is a node, and every quota in
+    from_to is an edge from the node contestants leave to the node they
+    progress to. Rounds and heats are interned, and referred to by their
+    position in rounds and heats.
+
+    The nodes are given as arrays indexed by node: its round, its heat, and
+    its number of heats. The edges of node i are edge_targets and
+    edge_quotas from edge_offsets[i] to edge_offsets[i + 1]. A quota is a
+    number of contestants, or QUOTA_ALL or QUOTA_REST.
+    """
+
+    max_no_of_contestants: int
+    rounds: list[str]
+    heats: list[str]
+    node_rounds: list[int]
+    node_heats: list[int]
+    node_no_of_heats: list[int]
+    edge_offsets: list[int]
+    edge_targets: list[int]
+    edge_quotas: list[int]
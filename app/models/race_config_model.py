@@ -0,0 +1,22 @@
+"""Race config selection data class module."""
+
+from pydantic import BaseModel, TypeAdapter
+
+from .competition_format_model import RaceConfig
+
+
+class RaceConfigMatch(BaseModel):
+    """Data class with the race config selected for the size of a raceclass.
+
+    The race_config is None when no config of the format covers as many
+    contestants.
+    """
+
+    contestants: int
+    ranked: bool
+    race_config: RaceConfig | None = None
+
+
+RaceConfigMatchesAdapter: TypeAdapter[list[RaceConfigMatch]] = TypeAdapter(
+    list[RaceConfigMatch]
+)
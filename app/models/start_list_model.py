@@ -0,0 +1,39 @@
+"""Interval start start list data class module."""
+
+import os
+from datetime import datetime
+from typing import Annotated
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+# Start-list and timetable requests need no login, so their size is bounded:
+MAX_RACECLASSES = int(os.getenv("MAX_RACECLASSES", "100"))
+MAX_RACECLASS_SIZE = int(os.getenv("MAX_RACECLASS_SIZE", "1000"))
+
+
+class StartListRaceclass(BaseModel):
+    """Data class with a raceclass to put in a start list."""
+
+    name: str
+    no_of_contestants: Annotated[int, Field(gt=0, le=MAX_RACECLASS_SIZE)]
+    group: int = 1
+
+
+class StartListRequest(BaseModel):
+    """Data class with the raceclasses of an event, in the order they start."""
+
+    start_time: datetime
+    raceclasses: Annotated[
+        list[StartListRaceclass], Field(min_length=1, max_length=MAX_RACECLASSES)
+    ]
+
+
+class StartList(BaseModel):
+    """Data class with the start time of every contestant in a raceclass."""
+
+    raceclass: str
+    group: int
+    start_times: list[datetime]
+
+
+StartListsAdapter: TypeAdapter[list[StartList]] = TypeAdapter(list[StartList])
@@ -0,0 +1,43 @@
+"""Heat timetable data class module."""
+
+from datetime import datetime
+from typing import Annotated
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from .start_list_model import MAX_RACECLASS_SIZE, MAX_RACECLASSES
+
+
+class TimetableRaceclass(BaseModel):
+    """Data class with a raceclass to put in a timetable."""
+
+    name: str
+    no_of_contestants: Annotated[int, Field(gt=0, le=MAX_RACECLASS_SIZE)]
+    ranked: bool = True
+    group: int = 1
+
+
+class TimetableRequest(BaseModel):
+    """Data class with the raceclasses of an event, in the order they start."""
+
+    start_time: datetime
+    raceclasses: Annotated[
+        list[TimetableRaceclass], Field(min_length=1, max_length=MAX_RACECLASSES)
+    ]
+
+
+class Heat(BaseModel):
+    """Data class with a heat in a timetable.
+
+    The index is the heat class of the round, as in no_of_heats, and heat
+    is the number of the heat within it, from 1.
+    """
+
+    raceclass: str
+    round: str
+    index: str
+    heat: int
+    start_time: datetime
+
+
+HeatsAdapter: TypeAdapter[list[Heat]] = TypeAdapter(list[Heat])
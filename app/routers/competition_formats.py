@@ -1,28 +1,93 @@
 """Resource module for competition_formats resources."""
 
+import hashlib
+import json
 import logging
 import os
+import zlib
+from collections.abc import AsyncIterator, Iterable
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import Field
+from pydantic import ValidationError as PydanticValidationError
 
-from app.adapters import CompetitionFormatsAdapter
+from app.adapters import (
+    CompetitionFormatsAdapter,
+    InvalidCursorError,
+    NameSearchMode,
+    decode_cursor,
+    encode_cursor,
+    normalize_name,
+)
 from app.authorization import RoleChecker, UserRole
-from app.models import CompetitionFormatUnion
+from app.models import (
+    BulkItemResult,
+    CapacityTable,
+    CompetitionFormatSummary,
+    CompetitionFormatUnion,
+    CompetitionFormatUnionAdapter,
+    CompetitionFormatView,
+    Heat,
+    HeatsAdapter,
+    ImportResult,
+    ProgressionGraph,
+    RaceConfigMatch,
+    RaceConfigMatchesAdapter,
+    StartList,
+    StartListRequest,
+    StartListsAdapter,
+    TimetableRequest,
+)
 from app.services import (
+    CatalogService,
     CompetitionFormatAlreadyExistError,
     CompetitionFormatNotFoundError,
+    CompetitionFormatRevisionConflictError,
     CompetitionFormatsService,
     IllegalValueError,
+    RaceConfigsService,
+    StartListService,
+    TimetableService,
     ValidationError,
 )
 
 HOST_SERVER = os.getenv("HOST_SERVER", "localhost")
 HOST_PORT = os.getenv("HOST_PORT", "8080")
 BASE_URL = f"http://{HOST_SERVER}:{HOST_PORT}"
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+MAX_BULK_SIZE = int(os.getenv("MAX_BULK_SIZE", "1000"))
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+GZIP_MEDIA_TYPE = "application/gzip"
+# The body of a post or put, documented as FastAPI would for a body parameter:
+COMPETITION_FORMAT_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            JSON_MEDIA_TYPE: {
+                "schema": {
+                    "oneOf": [
+                        {"$ref": "#/components/schemas/IntervalStartFormat"},
+                        {"$ref": "#/components/schemas/IndividualSprintFormat"},
+                    ],
+                    "discriminator": {
+                        "propertyName": "datatype",
+                        "mapping": {
+                            "interval_start": "#/components/schemas/IntervalStartFormat",
+                            "individual_sprint": "#/components/schemas/IndividualSprintFormat",
+                        },
+                    },
+                    "title": "Competition Format",
+                }
+            }
+        },
+    }
+}
 
 
 logger = logging.getLogger("uvicorn.error")
@@ -30,26 +95,252 @@ logger = logging.getLogger("uvicorn.error")
 router = APIRouter()
 
 
-@router.get("/competition-formats")
-async def get(
+def revision_etag(
+    revision: int, view: CompetitionFormatView = CompetitionFormatView.Full
+) -> str:
+    """Return the ETag of a view of a competition_format at a revision."""
+    if view == CompetitionFormatView.Full:
+        return f'"{revision}"'
+    return f'"{revision}-{view}"'
+
+
+def page_etag(
+    revisions: Iterable[tuple[UUID, int]],
+    view: CompetitionFormatView = CompetitionFormatView.Full,
+) -> str:
+    """Return the ETag of a view of a page, from the (id, revision) of its items."""
+    digest = hashlib.sha256()
+    if view != CompetitionFormatView.Full:
+        digest.update(f"{view};".encode())
+    for competition_format_id, revision in revisions:
+        digest.update(f"{competition_format_id}:{revision};".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check if an If-None-Match header matches the current ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    """Return a 304 Not Modified response for the ETag."""
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+
+
+async def competition_format_body(request: Request) -> CompetitionFormatUnion:
+    """Validate the body of a request as a competition_format.
+
+    The raw json is validated in one pass by pydantic, without parsing it
+    into python objects first.
+
+    Raises:
+        RequestValidationError: the body is not a valid competition_format
+    """
+    try:
+        return CompetitionFormatUnionAdapter.validate_json(await request.body())
+    except PydanticValidationError as e:
+        raise RequestValidationError(
+            [
+                error | {"loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ]
+        ) from e
+
+
+def parse_ndjson_line(line: bytes) -> Any:
+    """Parse one line of newline delimited json, leaving invalid json as text."""
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.decode(errors="replace")
+
+
+def json_array(
+    competition_formats: Iterable[CompetitionFormatUnion]
+    | Iterable[CompetitionFormatSummary],
+    view: CompetitionFormatView,
+) -> bytes:
+    """Encode competition_formats as a json array, from the json of each."""
+    return (
+        b"["
+        + b",".join(
+            CompetitionFormatsService.encode(competition_format, view)
+            for competition_format in competition_formats
+        )
+        + b"]"
+    )
+
+
+async def ndjson_lines(
+    competition_formats: AsyncIterator[CompetitionFormatUnion]
+    | AsyncIterator[CompetitionFormatSummary],
+) -> AsyncIterator[bytes]:
+    """Encode competition_formats as newline delimited json, one at a time."""
+    async for competition_format in competition_formats:
+        yield competition_format.model_dump_json().encode() + b"\n"
+
+
+async def json_page(
+    limit: int, view: CompetitionFormatView, after: tuple[str, UUID] | None
+) -> Response:
+    """Return a page of the json kept by the storage, as is."""
+    page = await CompetitionFormatsAdapter.get_all_competition_format_json(
+        limit=limit, view=view, after=after
+    )
+    headers = {
+        "ETag": page_etag(
+            (
+                (competition_format_id, revision)
+                for _, competition_format_id, revision, _ in page
+            ),
+            view,
+        )
+    }
+    if len(page) == limit:
+        name_key, competition_format_id, _, _ = page[-1]
+        headers["Next-Cursor"] = encode_cursor(name_key, competition_format_id)
+    return Response(
+        content=b"[" + b",".join(body for *_, body in page) + b"]",
+        media_type=JSON_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+@router.get(
+    "/competition-formats",
+    response_model=list[CompetitionFormatUnion] | list[CompetitionFormatSummary],
+    responses={
+        HTTPStatus.OK: {
+            "content": {NDJSON_MEDIA_TYPE: {}},
+            "description": f"With Accept: {NDJSON_MEDIA_TYPE}, all competition formats are streamed.",
+        }
+    },
+)
+async def get(  # noqa: PLR0913, PLR0917
     name: Annotated[
         str | None,
         Query(description="The name of the competition format"),
     ] = None,
-) -> list[CompetitionFormatUnion]:
-    """Get all competition formats."""
+    mode: Annotated[
+        NameSearchMode,
+        Query(description="Match the name by prefix or by substring"),
+    ] = NameSearchMode.Substring,
+    view: Annotated[
+        CompetitionFormatView,
+        Query(description="Return whole formats, or summaries without race configs"),
+    ] = CompetitionFormatView.Full,
+    limit: Annotated[
+        int,
+        Query(
+            gt=0,
+            description=f"The maximum number of formats to return, at most {MAX_PAGE_SIZE}",
+        ),
+    ] = MAX_PAGE_SIZE,
+    after: Annotated[
+        str | None,
+        Query(description="The cursor of the page to return, from Next-Cursor"),
+    ] = None,
+    batch_size: Annotated[
+        int,
+        Query(gt=0, le=1000, description="Documents fetched per db round trip"),
+    ] = 100,
+    accept: Annotated[str | None, Header()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get all competition formats, one page at a time.
+
+    When the client accepts newline delimited json, and does not search by
+    name, the whole catalog is streamed instead, one document per line as it
+    is read from the db.
+
+    A page carries an ETag made from the ids and revisions of its items. On
+    a matching If-None-Match only those are read, and 304 is returned.
+
+    With view=summary, only the fields needed to list the formats are read
+    from the db and returned, leaving out the timings and race configs.
+
+    The json of every format on a page is cached by id and revision, so a
+    page is returned without encoding the formats again. A storage keeping
+    the json of formats, as a snapshot, returns it as is for pages and
+    streams.
+    """
+    summary = view == CompetitionFormatView.Summary
+    if not name and accept and NDJSON_MEDIA_TYPE in accept:
+        if CompetitionFormatsAdapter.serves_json():
+            lines = CompetitionFormatsAdapter.stream_competition_format_json(
+                batch_size=batch_size, view=view
+            )
+        else:
+            stream = (
+                CompetitionFormatsAdapter.stream_competition_format_summaries
+                if summary
+                else CompetitionFormatsAdapter.stream_competition_formats
+            )
+            lines = ndjson_lines(stream(batch_size=batch_size))
+        return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+
+    limit = min(limit, MAX_PAGE_SIZE)
     if name:
-        return await CompetitionFormatsAdapter.get_competition_formats_by_name(name)
+        search = (
+            CompetitionFormatsAdapter.get_competition_format_summaries_by_name
+            if summary
+            else CompetitionFormatsAdapter.get_competition_formats_by_name
+        )
+        return Response(
+            content=json_array(await search(name, mode=mode, limit=limit), view),
+            media_type=JSON_MEDIA_TYPE,
+        )
 
-    return await CompetitionFormatsAdapter.get_all_competition_formats()
+    try:
+        after_key = decode_cursor(after) if after else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e)) from e
+    if if_none_match:
+        revisions = await CompetitionFormatsAdapter.get_competition_format_revisions(
+            limit=limit, after=after_key
+        )
+        etag = page_etag(revisions, view)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    if CompetitionFormatsAdapter.serves_json():
+        return await json_page(limit, view, after_key)
+    get_page = (
+        CompetitionFormatsAdapter.get_all_competition_format_summaries
+        if summary
+        else CompetitionFormatsAdapter.get_all_competition_formats
+    )
+    competition_formats = await get_page(limit=limit, after=after_key)
+    headers = {
+        "ETag": page_etag(
+            (
+                (competition_format.id, competition_format.revision)
+                for competition_format in competition_formats
+            ),
+            view,
+        )
+    }
+    if len(competition_formats) == limit:
+        last = competition_formats[-1]
+        headers["Next-Cursor"] = encode_cursor(normalize_name(last.name), last.id)
+    return Response(
+        content=json_array(competition_formats, view),
+        media_type=JSON_MEDIA_TYPE,
+        headers=headers,
+    )
 
 
 @router.post(
     "/competition-formats",
     dependencies=[Depends(RoleChecker([UserRole.Admin]))],
+    openapi_extra=COMPETITION_FORMAT_BODY,
 )
 async def post(
-    competition_format: CompetitionFormatUnion,
+    competition_format: Annotated[
+        CompetitionFormatUnion, Depends(competition_format_body)
+    ],
 ) -> Response:
     """Post route function."""
     logger.debug(
@@ -79,47 +370,458 @@ async def post(
     ) from None
 
 
-@router.get("/competition-formats/{competition_format_id}")
+@router.post(
+    "/competition-formats:bulk",
+    dependencies=[Depends(RoleChecker([UserRole.Admin]))],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": {}}},
+                NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def post_bulk(request: Request) -> list[BulkItemResult]:
+    """Create many competition formats, given as a json array or as ndjson.
+
+    Every item gets its own status in the response: created, duplicate, or
+    invalid. Invalid items and duplicates do not stop the others.
+    """
+    body = await request.body()
+    if NDJSON_MEDIA_TYPE in request.headers.get("Content-Type", ""):
+        items = [parse_ndjson_line(line) for line in body.splitlines() if line.strip()]
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f"Body is not valid json: {e}",
+            ) from e
+        if not isinstance(items, list):
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail="Body must be a json array of competition formats.",
+            )
+    if len(items) > MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_SIZE} competition formats can be created at once.",
+        )
+    logger.debug(f"Got bulk create request for {len(items)} competition_formats")
+    return await CompetitionFormatsService.create_competition_formats(items)
+
+
+@router.get(
+    "/competition-formats:export",
+    dependencies=[Depends(RoleChecker([UserRole.Admin]))],
+    responses={
+        HTTPStatus.OK: {
+            "content": {NDJSON_MEDIA_TYPE: {}, GZIP_MEDIA_TYPE: {}},
+            "description": "All competition formats, one per line.",
+        }
+    },
+)
+async def export_catalog(
+    gzip: Annotated[bool, Query(description="Compress the export with gzip")] = False,  # noqa: FBT002
+    batch_size: Annotated[
+        int,
+        Query(gt=0, le=1000, description="Documents fetched per db round trip"),
+    ] = 100,
+) -> StreamingResponse:
+    """Export the whole catalog as newline delimited json, optionally gzipped.
+
+    The export is streamed in batches as it is read from the db, so it can be
+    fed back to the import endpoint of this or another environment.
+    """
+    chunks = CatalogService.export_competition_formats(
+        batch_size=batch_size, compress=gzip
+    )
+    if gzip:
+        return StreamingResponse(
+            chunks,
+            media_type=GZIP_MEDIA_TYPE,
+            headers={
+                "Content-Disposition": 'attachment; filename="competition-formats.ndjson.gz"'
+            },
+        )
+    return StreamingResponse(chunks, media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post(
+    "/competition-formats:import",
+    dependencies=[Depends(RoleChecker([UserRole.Admin]))],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+                GZIP_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+async def import_catalog(
+    request: Request,
+    batch_size: Annotated[
+        int,
+        Query(gt=0, le=MAX_BULK_SIZE, description="Formats written per db round trip"),
+    ] = 100,
+) -> ImportResult:
+    """Import competition formats from an export, creating or replacing by id.
+
+    The body is read and written in batches as it arrives. It is gunzipped
+    when sent with Content-Encoding: gzip or as application/gzip. Invalid
+    lines are counted and reported, and do not stop the import.
+    """
+    compressed = request.headers.get(
+        "Content-Encoding", ""
+    ).strip() == "gzip" or GZIP_MEDIA_TYPE in request.headers.get("Content-Type", "")
+    try:
+        return await CatalogService.import_competition_formats(
+            request.stream(), batch_size=batch_size, compressed=compressed
+        )
+    except zlib.error as e:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=f"Body is not valid gzip: {e}",
+        ) from e
+
+
+@router.get(
+    "/competition-formats/{competition_format_id}",
+    response_model=CompetitionFormatUnion | CompetitionFormatSummary,
+)
 async def get_by_id(
     competition_format_id: UUID,
-) -> CompetitionFormatUnion:
-    """Get competition-format by id function."""
+    view: Annotated[
+        CompetitionFormatView,
+        Query(description="Return the whole format, or a summary without race configs"),
+    ] = CompetitionFormatView.Full,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get competition-format by id function.
+
+    On a matching If-None-Match, only the revision is looked up and 304 is
+    returned, without reading the document. Otherwise the json cached for
+    the revision is returned as is, without validating or encoding it again.
+    """
     logger.debug(f"Got get request for competition_format {competition_format_id.hex}")
-    competition_format = await CompetitionFormatsAdapter.get_competition_format_by_id(
-        competition_format_id
+    if if_none_match:
+        revision = await CompetitionFormatsService.get_competition_format_revision(
+            competition_format_id
+        )
+        if revision is not None and etag_matches(
+            if_none_match, revision_etag(revision, view)
+        ):
+            return not_modified(revision_etag(revision, view))
+    encoded = await CompetitionFormatsService.get_encoded_competition_format_by_id(
+        competition_format_id, view
     )
-    if not competition_format:
+    if not encoded:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail=f"Competition-format with id {competition_format_id} is not found.",
         )
-    logger.debug(f"Got competition_format: {competition_format}")
-    return competition_format
+    revision, body = encoded
+    return Response(
+        content=body,
+        media_type=JSON_MEDIA_TYPE,
+        headers={"ETag": revision_etag(revision, view)},
+    )
+
+
+@router.get(
+    "/competition-formats/{competition_format_id}/race-config",
+    response_model=list[RaceConfigMatch],
+)
+async def get_race_configs(
+    competition_format_id: UUID,
+    contestants: Annotated[
+        list[Annotated[int, Field(gt=0)]],
+        Query(
+            min_length=1,
+            max_length=MAX_BULK_SIZE,
+            description="The number of contestants in every raceclass",
+        ),
+    ],
+    ranked: Annotated[
+        list[bool],
+        Query(
+            description="Whether every raceclass is ranked, or one value for all of them"
+        ),
+    ] = [True],  # noqa: B006
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get the race config of every raceclass of an event, in one request.
+
+    The config of a raceclass is the one with the smallest
+    max_no_of_contestants covering its contestants, among the ranked or
+    non-ranked configs of the individual sprint format. Its race_config is
+    null when no config covers that many contestants.
+
+    The response carries the revision of the format as ETag.
+    """
+    if len(ranked) not in {1, len(contestants)}:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail="Give ranked once, or once for every value of contestants.",
+        )
+    if if_none_match:
+        revision = await CompetitionFormatsService.get_competition_format_revision(
+            competition_format_id
+        )
+        if revision is not None and etag_matches(
+            if_none_match, revision_etag(revision)
+        ):
+            return not_modified(revision_etag(revision))
+    try:
+        revision, matches = await RaceConfigsService.select_race_configs(
+            competition_format_id,
+            list(
+                zip(
+                    contestants,
+                    ranked if len(ranked) > 1 else ranked * len(contestants),
+                    strict=True,
+                )
+            ),
+        )
+    except CompetitionFormatNotFoundError as e:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e)) from e
+    return Response(
+        content=RaceConfigMatchesAdapter.dump_json(matches),
+        media_type=JSON_MEDIA_TYPE,
+        headers={"ETag": revision_etag(revision)},
+    )
+
+
+@router.get(
+    "/competition-formats/{competition_format_id}/race-configs/{contestants}/graph",
+    response_model=ProgressionGraph,
+)
+async def get_progression_graph(
+    competition_format_id: UUID,
+    contestants: Annotated[
+        int, Path(gt=0, description="The number of contestants in the raceclass")
+    ],
+    ranked: Annotated[bool, Query(description="Use the ranked configs")] = True,  # noqa: FBT002
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get the from_to of the race config of a raceclass, compiled to a graph.
+
+    The race config is the one covering the contestants, as for race-config,
+    so its max_no_of_contestants also refers to it. The graph is compiled
+    once per revision of the format, which is the ETag of the response.
+    """
+    if if_none_match:
+        revision = await CompetitionFormatsService.get_competition_format_revision(
+            competition_format_id
+        )
+        if revision is not None and etag_matches(
+            if_none_match, revision_etag(revision)
+        ):
+            return not_modified(revision_etag(revision))
+    try:
+        revision, graph = await RaceConfigsService.get_progression_graph(
+            competition_format_id, contestants, ranked=ranked
+        )
+    except CompetitionFormatNotFoundError as e:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e)) from e
+    except IllegalValueError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e)
+        ) from e
+    return Response(
+        content=graph.model_dump_json(),
+        media_type=JSON_MEDIA_TYPE,
+        headers={"ETag": revision_etag(revision)},
+    )
+
+
+@router.get(
+    "/competition-formats/{competition_format_id}/capacity",
+    response_model=CapacityTable,
+)
+async def get_capacity(
+    competition_format_id: UUID,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get what the race configs give for every raceclass size, up to the max.
+
+    Item contestants - 1 of every array is for a raceclass of that many
+    contestants: the max_no_of_contestants of the race config covering it,
+    the number of heats in every round, and the size of the largest heat.
+    The table is made on read, for raceclasses of up to
+    MAX_CAPACITY_CONTESTANTS. The revision of the format is the ETag of
+    the response.
+    """
+    if if_none_match:
+        revision = await CompetitionFormatsService.get_competition_format_revision(
+            competition_format_id
+        )
+        if revision is not None and etag_matches(
+            if_none_match, revision_etag(revision)
+        ):
+            return not_modified(revision_etag(revision))
+    try:
+        revision, capacity = await RaceConfigsService.get_capacity(
+            competition_format_id
+        )
+    except CompetitionFormatNotFoundError as e:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e)) from e
+    except IllegalValueError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e)
+        ) from e
+    return Response(
+        content=capacity.model_dump_json(),
+        media_type=JSON_MEDIA_TYPE,
+        headers={"ETag": revision_etag(revision)},
+    )
+
+
+@router.post(
+    "/competition-formats/{competition_format_id}/timetable",
+    response_model=list[Heat],
+    responses={
+        HTTPStatus.OK: {
+            "content": {NDJSON_MEDIA_TYPE: {}},
+            "description": f"With Accept: {NDJSON_MEDIA_TYPE}, the heats are streamed.",
+        }
+    },
+)
+async def post_timetable(
+    competition_format_id: UUID,
+    timetable: TimetableRequest,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Generate the start time of every heat of an individual sprint event.
+
+    The race config of every raceclass is selected as for race-config. The
+    raceclasses of a group run round by round, and groups one after another.
+    When the client accepts newline delimited json, the heats are streamed,
+    one per line. The revision of the format is the ETag of the response.
+    """
+    try:
+        revision, heats = await TimetableService.generate_timetable(
+            competition_format_id, timetable
+        )
+    except CompetitionFormatNotFoundError as e:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e)) from e
+    except IllegalValueError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e)
+        ) from e
+    headers = {"ETag": revision_etag(revision)}
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return StreamingResponse(
+            (heat.model_dump_json().encode() + b"\n" for heat in heats),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers,
+        )
+    return Response(
+        content=HeatsAdapter.dump_json(list(heats)),
+        media_type=JSON_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+@router.post(
+    "/competition-formats/{competition_format_id}/start-list",
+    response_model=list[StartList],
+    responses={
+        HTTPStatus.OK: {
+            "content": {NDJSON_MEDIA_TYPE: {}},
+            "description": f"With Accept: {NDJSON_MEDIA_TYPE}, one raceclass per line is streamed.",
+        }
+    },
+)
+async def post_start_list(
+    competition_format_id: UUID,
+    start_list: StartListRequest,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Generate the start time of every contestant of an interval start event.
+
+    The contestants of a group start intervals apart, raceclass after
+    raceclass, and groups time_between_groups apart. When the client accepts
+    newline delimited json, the start list of every raceclass is streamed as
+    it is made, one per line. The revision of the format is the ETag of the
+    response.
+    """
+    try:
+        revision, start_lists = await StartListService.generate_start_lists(
+            competition_format_id, start_list
+        )
+    except CompetitionFormatNotFoundError as e:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e)) from e
+    headers = {"ETag": revision_etag(revision)}
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return StreamingResponse(
+            (raceclass.model_dump_json().encode() + b"\n" for raceclass in start_lists),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers,
+        )
+    return Response(
+        content=StartListsAdapter.dump_json(list(start_lists)),
+        media_type=JSON_MEDIA_TYPE,
+        headers=headers,
+    )
 
 
 @router.put(
     "/competition-formats/{competition_format_id}",
     dependencies=[Depends(RoleChecker([UserRole.Admin]))],
+    openapi_extra=COMPETITION_FORMAT_BODY,
 )
 async def put(
     competition_format_id: UUID,
-    competition_format: CompetitionFormatUnion,
+    competition_format: Annotated[
+        CompetitionFormatUnion, Depends(competition_format_body)
+    ],
+    if_match: Annotated[str | None, Header()] = None,
 ) -> Response:
-    """Put route function."""
+    """Put route function.
+
+    The update is conditional on the revision in If-Match, or else on a
+    revision given in the body. Without either, the update is unconditional.
+    """
     logger.debug(
         f"Got request-body {competition_format} for {competition_format_id.hex} of type {type(competition_format)}"
     )
+    expected_revision = competition_format.revision or None
+    if if_match and if_match.strip() != "*":
+        try:
+            expected_revision = int(if_match.strip().strip('"'))
+        except ValueError as e:
+            # Weak or malformed ETags can never match a revision:
+            raise HTTPException(
+                status_code=HTTPStatus.PRECONDITION_FAILED,
+                detail=f"If-Match {if_match} does not match any revision.",
+            ) from e
     try:
-        await CompetitionFormatsService.update_competition_format(
-            competition_format_id, competition_format
+        revision = await CompetitionFormatsService.update_competition_format(
+            competition_format_id,
+            competition_format,
+            expected_revision=expected_revision,
         )
+    except CompetitionFormatAlreadyExistError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e)) from e
     except (ValidationError, IllegalValueError) as e:
         raise HTTPException(
             status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e)
         ) from e
     except CompetitionFormatNotFoundError as e:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e)) from e
-    return Response(status_code=HTTPStatus.NO_CONTENT)
+    except CompetitionFormatRevisionConflictError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.PRECONDITION_FAILED, detail=str(e)
+        ) from e
+    return Response(
+        status_code=HTTPStatus.NO_CONTENT, headers={"ETag": revision_etag(revision)}
+    )
 
 
 @router.delete(
@@ -0,0 +1,53 @@
+"""Resource module for metrics resources."""
+
+import logging
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.adapters import pool_metrics_listener
+from app.adapters.mongo_pool import WAIT_BUCKETS
+from app.services import CompetitionFormatsService
+
+logger = logging.getLogger("uvicorn.error")
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+)
+async def metrics() -> str:
+    """Metrics route function, in the Prometheus text format."""
+    cache = CompetitionFormatsService.cache
+    samples = {
+        "competition_formats_cache_hits_total": cache.stats.hits,
+        "competition_formats_cache_misses_total": cache.stats.misses,
+        "competition_formats_cache_evictions_total": cache.stats.evictions,
+        "competition_formats_cache_expirations_total": cache.stats.expirations,
+        "competition_formats_cache_size": len(cache),
+    }
+    encoded = CompetitionFormatsService.encoded
+    samples |= {
+        "competition_formats_response_cache_hits_total": encoded.stats.hits,
+        "competition_formats_response_cache_misses_total": encoded.stats.misses,
+        "competition_formats_response_cache_size": len(encoded),
+    }
+    pool = pool_metrics_listener.stats
+    samples |= {
+        "mongo_pool_connections_open": pool.connections_open,
+        "mongo_pool_connections_in_use": pool.connections_in_use,
+        "mongo_pool_checkouts_total": pool.checkouts,
+        "mongo_pool_checkout_failures_total": pool.checkout_failures,
+    }
+    # The checkout wait times as a cumulative histogram:
+    count = 0
+    for bound, bucket in zip(
+        (*WAIT_BUCKETS, "+Inf"), pool.checkout_wait_buckets, strict=True
+    ):
+        count += bucket
+        samples[f'mongo_pool_checkout_wait_seconds_bucket{{le="{bound}"}}'] = count
+    samples["mongo_pool_checkout_wait_seconds_sum"] = pool.checkout_wait_seconds
+    samples["mongo_pool_checkout_wait_seconds_count"] = count
+    return "".join(f"{name} {value}\n" for name, value in samples.items())
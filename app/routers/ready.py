@@ -3,7 +3,7 @@
 import logging
 import os
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from fastapi.responses import PlainTextResponse
 
 from app.adapters import LivenessAdapter
@@ -19,8 +19,12 @@ router = APIRouter()
     "/ready",
     response_class=PlainTextResponse,
 )
-async def ready() -> str:
-    """Ready route function."""
+async def ready(response: Response) -> str:
+    """Ready route function.
+
+    When the catalog is served from an in-memory replica, the seconds since
+    it was loaded are given in the Age header.
+    """
     if CONFIG in {"test", "dev"}:
         pass
     elif CONFIG == "production":  # pragma: no cover
@@ -29,4 +33,7 @@ async def ready() -> str:
         else:
             raise HTTPException(status_code=500, detail="Database not ready")
 
+    age = LivenessAdapter.catalog_age()
+    if age is not None:
+        response.headers["Age"] = str(int(age))
     return "OK"
@@ -1,19 +1,37 @@
 """Package for all services."""
 
+from .cache import CacheStats, LRUCache
+from .capacity import capacity_table
+from .catalog_service import CatalogService
 from .competition_formats_service import (
     CompetitionFormatsService,
 )
 from .exceptions import (
     CompetitionFormatAlreadyExistError,
     CompetitionFormatNotFoundError,
+    CompetitionFormatRevisionConflictError,
     IllegalValueError,
     ValidationError,
 )
+from .progression_graph import compile_race_config
+from .race_configs_service import RaceConfigIndex, RaceConfigsService
+from .start_list_service import StartListService
+from .timetable_service import TimetableService
 
 __all__ = [
+    "CacheStats",
+    "CatalogService",
     "CompetitionFormatAlreadyExistError",
     "CompetitionFormatNotFoundError",
+    "CompetitionFormatRevisionConflictError",
     "CompetitionFormatsService",
     "IllegalValueError",
+    "LRUCache",
+    "RaceConfigIndex",
+    "RaceConfigsService",
+    "StartListService",
+    "TimetableService",
     "ValidationError",
+    "capacity_table",
+    "compile_race_config",
 ]
@@ -0,0 +1,132 @@
+"""Module for the capacity tables of individual sprint formats."""
+
+import os
+from math import ceil
+
+from app.models import (
+    QUOTA_ALL,
+    QUOTA_REST,
+    Capacity,
+    CapacityTable,
+    IndividualSprintFormat,
+    ProgressionGraph,
+    RaceConfig,
+)
+
+from .exceptions import IllegalValueError
+from .progression_graph import compile_race_config
+
+# The most contestants in a raceclass that a capacity table is made for:
+MAX_CAPACITY_CONTESTANTS = int(os.getenv("MAX_CAPACITY_CONTESTANTS", "1000"))
+
+
+def largest_heat(graph: ProgressionGraph, contestants: int) -> int:
+    """Return the size of the largest heat when contestants run a race config.
+
+    The contestants are spread evenly over the heats of the first round.
+    From every heat class, a number quota takes that many from each of its
+    heats, REST takes who is left after the number quotas, and ALL takes
+    every contestant. A heat class without heats is not run, but passes on
+    the contestants it is given, as if from a single heat, so that they are
+    counted in the heats they go on to.
+    """
+    entered = [0] * len(graph.node_rounds)
+    first_round = [
+        node
+        for node, race_round in enumerate(graph.node_rounds)
+        if race_round == 0 and graph.node_no_of_heats[node]
+    ]
+    per_heat, extra = divmod(
+        contestants, sum(graph.node_no_of_heats[node] for node in first_round) or 1
+    )
+    for node in first_round:
+        no_of_heats = graph.node_no_of_heats[node]
+        entered[node] = per_heat * no_of_heats + min(extra, no_of_heats)
+        extra -= min(extra, no_of_heats)
+    largest = 0
+    for node in sorted(range(len(entered)), key=graph.node_rounds.__getitem__):
+        no_of_heats = graph.node_no_of_heats[node]
+        if no_of_heats:
+            largest = max(largest, ceil(entered[node] / no_of_heats))
+        edges = range(graph.edge_offsets[node], graph.edge_offsets[node + 1])
+        left = entered[node]
+        for edge in edges:
+            quota = graph.edge_quotas[edge]
+            if quota >= 0:
+                moved = min(quota * (no_of_heats or 1), left)
+                entered[graph.edge_targets[edge]] += moved
+                left -= moved
+        for edge in edges:
+            quota = graph.edge_quotas[edge]
+            if quota == QUOTA_ALL:
+                entered[graph.edge_targets[edge]] += entered[node]
+            elif quota == QUOTA_REST:
+                entered[graph.edge_targets[edge]] += left
+                left = 0
+    return largest
+
+
+def capacity(race_configs: list[RaceConfig], max_no_of_contestants: int) -> Capacity:
+    """Return the capacity of race configs, from 1 to max_no_of_contestants.
+
+    The configs are walked in the order of the contestants they cover,
+    along with the number of contestants.
+
+    Raises:
+        IllegalValueError: the from_to of a config has an illegal quota
+    """
+    race_configs = sorted(
+        race_configs, key=lambda race_config: race_config.max_no_of_contestants
+    )
+    graphs = [compile_race_config(race_config) for race_config in race_configs]
+    table = Capacity(max_no_of_contestants=[], no_of_heats=[], largest_heat=[])
+    position = 0
+    for contestants in range(1, max_no_of_contestants + 1):
+        while (
+            position < len(race_configs)
+            and race_configs[position].max_no_of_contestants < contestants
+        ):
+            position += 1
+        if position == len(race_configs):
+            table.max_no_of_contestants.append(None)
+            table.no_of_heats.append({})
+            table.largest_heat.append(0)
+            continue
+        race_config = race_configs[position]
+        table.max_no_of_contestants.append(race_config.max_no_of_contestants)
+        table.no_of_heats.append(
+            {
+                race_round: sum(heats.values())
+                for race_round, heats in race_config.no_of_heats.items()
+            }
+        )
+        table.largest_heat.append(largest_heat(graphs[position], contestants))
+    return table
+
+
+def capacity_table(competition_format: IndividualSprintFormat) -> CapacityTable:
+    """Return the capacity of the race configs of an individual sprint format.
+
+    The table has a row for every raceclass size, so it is only made up to
+    MAX_CAPACITY_CONTESTANTS contestants.
+
+    Raises:
+        IllegalValueError: the from_to of a config has an illegal quota, or
+            max_no_of_contestants_in_raceclass is above MAX_CAPACITY_CONTESTANTS
+    """
+    if competition_format.max_no_of_contestants_in_raceclass > MAX_CAPACITY_CONTESTANTS:
+        msg = (
+            "Capacity tables are only made for up to"
+            f" {MAX_CAPACITY_CONTESTANTS} contestants in raceclass."
+        )
+        raise IllegalValueError(msg) from None
+    return CapacityTable(
+        ranked=capacity(
+            competition_format.race_config_ranked,
+            competition_format.max_no_of_contestants_in_raceclass,
+        ),
+        non_ranked=capacity(
+            competition_format.race_config_non_ranked,
+            competition_format.max_no_of_contestants_in_raceclass,
+        ),
+    )
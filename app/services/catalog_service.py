@@ -0,0 +1,158 @@
+"""Module for the catalog export and import service."""
+
+import logging
+import zlib
+from collections.abc import AsyncIterator
+from typing import Any
+
+from pydantic import ValidationError as PydanticValidationError
+
+from app.adapters import CompetitionFormatsAdapter
+from app.models import (
+    CompetitionFormatUnion,
+    CompetitionFormatUnionAdapter,
+    ImportResult,
+)
+
+from .competition_formats_service import CompetitionFormatsService
+from .exceptions import ValidationError
+
+# wbits for zlib to write and read the gzip format:
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+# The most error messages kept in an ImportResult:
+MAX_IMPORT_ERRORS = 100
+
+
+class CatalogService:
+    """Class representing a service for exporting and importing the catalog.
+
+    The catalog is exchanged as newline delimited json, one competition_format
+    per line, optionally gzip compressed. Both directions work in batches, so
+    memory use does not depend on the size of the catalog.
+    """
+
+    logger = logging.getLogger("uvicorn.error")
+
+    @classmethod
+    async def export_competition_formats(
+        cls: Any, batch_size: int, *, compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Export all competition_formats as ndjson, one chunk per batch.
+
+        Args:
+            batch_size (int): the number of competition_formats per chunk
+            compress (bool): gzip compress the chunks
+
+        Yields:
+            bytes: The next chunk of the export.
+        """
+        compressor = zlib.compressobj(wbits=GZIP_WBITS) if compress else None
+        batch: list[bytes] = []
+        competition_formats = CompetitionFormatsAdapter.stream_competition_formats(
+            batch_size=batch_size
+        )
+        async for competition_format in competition_formats:
+            batch.append(competition_format.model_dump_json().encode() + b"\n")
+            if len(batch) >= batch_size:
+                chunk = b"".join(batch)
+                batch.clear()
+                yield compressor.compress(chunk) if compressor else chunk
+        chunk = b"".join(batch)
+        if compressor:
+            yield compressor.compress(chunk) + compressor.flush()
+        elif chunk:
+            yield chunk
+
+    @classmethod
+    async def import_competition_formats(
+        cls: Any,
+        chunks: AsyncIterator[bytes],
+        batch_size: int,
+        *,
+        compressed: bool = False,
+    ) -> ImportResult:
+        """Create or replace competition_formats by id, from an ndjson export.
+
+        Every line is validated as a competition_format, and its race_configs
+        sorted, before it is written. Valid lines are written batch_size at a
+        time. The revision of a line is not kept: a created competition_format
+        starts at the first revision, and a replaced one is at the next.
+
+        Args:
+            chunks (AsyncIterator[bytes]): the export, in chunks of any size
+            batch_size (int): the number of competition_formats per write
+            compressed (bool): the chunks are gzip compressed
+
+        Returns:
+            ImportResult: The number of created, replaced and invalid lines.
+        """
+        result = ImportResult()
+        decompressor = zlib.decompressobj(wbits=GZIP_WBITS) if compressed else None
+        batch: list[tuple[int, CompetitionFormatUnion]] = []
+        line_no = 0
+        rest = b""
+        async for chunk in chunks:
+            data = rest + (decompressor.decompress(chunk) if decompressor else chunk)
+            *lines, rest = data.split(b"\n")
+            for line in lines:
+                line_no += 1
+                await cls._import_line(result, batch, line_no, line)
+                if len(batch) >= batch_size:
+                    await cls._write_batch(result, batch)
+        if decompressor:
+            rest += decompressor.flush()
+        await cls._import_line(result, batch, line_no + 1, rest)
+        await cls._write_batch(result, batch)
+        CompetitionFormatsService.invalidate(None)
+        return result
+
+    @classmethod
+    async def _import_line(
+        cls: Any,
+        result: ImportResult,
+        batch: list[tuple[int, CompetitionFormatUnion]],
+        line_no: int,
+        line: bytes,
+    ) -> None:
+        """Validate one line of an import, and add it to the batch if valid."""
+        if not line.strip():
+            return
+        try:
+            competition_format = CompetitionFormatUnionAdapter.validate_json(line)
+            await CompetitionFormatsService.validate_competition_format(
+                competition_format
+            )
+        except (PydanticValidationError, ValidationError) as e:
+            cls._add_error(result, f"Line {line_no}: {e}")
+            return
+        CompetitionFormatsService.sort_race_configs(competition_format)
+        batch.append((line_no, competition_format))
+
+    @classmethod
+    async def _write_batch(
+        cls: Any,
+        result: ImportResult,
+        batch: list[tuple[int, CompetitionFormatUnion]],
+    ) -> None:
+        """Write a batch of imported competition_formats, and empty it."""
+        if not batch:
+            return
+        (
+            created,
+            replaced,
+            errors,
+        ) = await CompetitionFormatsAdapter.upsert_competition_formats(
+            [competition_format for _, competition_format in batch]
+        )
+        result.created += created
+        result.replaced += replaced
+        for position, error in sorted(errors.items()):
+            cls._add_error(result, f"Line {batch[position][0]}: {error}")
+        batch.clear()
+
+    @classmethod
+    def _add_error(cls: Any, result: ImportResult, error: str) -> None:
+        """Count an invalid line, keeping the first MAX_IMPORT_ERRORS messages."""
+        result.invalid += 1
+        if len(result.errors) < MAX_IMPORT_ERRORS:
+            result.errors.append(error)
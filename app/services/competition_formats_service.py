@@ -1,28 +1,192 @@
 """Module for competition_formats service."""
 
 import logging
+import os
 from typing import Any
 from uuid import UUID
 
+from pydantic import ValidationError as PydanticValidationError
+from pymongo.errors import DuplicateKeyError
+
 from app.adapters import CompetitionFormatsAdapter
 from app.models import (
+    BulkItemResult,
+    BulkItemStatus,
+    CompetitionFormatSummary,
     CompetitionFormatUnion,
+    CompetitionFormatUnionAdapter,
+    CompetitionFormatView,
     IndividualSprintFormat,
     RaceConfig,
 )
 
+from .cache import LRUCache
+from .capacity import capacity_table
 from .exceptions import (
     CompetitionFormatAlreadyExistError,
     CompetitionFormatNotFoundError,
+    CompetitionFormatRevisionConflictError,
     IllegalValueError,
     ValidationError,
 )
+from .progression_graph import validate_quotas
+
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "4096"))
+CHECK_CAPACITY = os.getenv("CHECK_CAPACITY", "false").lower() == "true"
 
 
 class CompetitionFormatsService:
     """Class representing a service for competition_formats."""
 
     logger = logging.getLogger("uvicorn.error")
+    cache: LRUCache[UUID, CompetitionFormatUnion] = LRUCache(
+        maxsize=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS
+    )
+    # The json of every view of a competition_format, with the revision encoded:
+    encoded: LRUCache[tuple[UUID, CompetitionFormatView], tuple[int, bytes]] = LRUCache(
+        maxsize=RESPONSE_CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS
+    )
+
+    @classmethod
+    def invalidate(cls: Any, competition_format_id: UUID | None) -> None:
+        """Drop a competition_format from the caches, or all of them on None."""
+        if competition_format_id is None:
+            cls.cache.clear()
+            cls.encoded.clear()
+            return
+        cls.cache.invalidate(competition_format_id)
+        for view in CompetitionFormatView:
+            cls.encoded.invalidate((competition_format_id, view))
+
+    @classmethod
+    def encode(
+        cls: Any,
+        competition_format: CompetitionFormatUnion | CompetitionFormatSummary,
+        view: CompetitionFormatView = CompetitionFormatView.Full,
+    ) -> bytes:
+        """Encode a view of a competition_format as json, once per revision.
+
+        Args:
+            competition_format: the competition_format, or its summary
+            view (CompetitionFormatView): the view the competition_format is in
+
+        Returns:
+            bytes: The json of the competition_format.
+        """
+        key = (competition_format.id, view)
+        encoded = cls.encoded.get(key)
+        if encoded is not None and encoded[0] == competition_format.revision:
+            return encoded[1]
+        body = competition_format.model_dump_json().encode()
+        cls.encoded.set(key, (competition_format.revision, body))
+        return body
+
+    @classmethod
+    async def get_encoded_competition_format_by_id(
+        cls: Any,
+        competition_format_id: UUID,
+        view: CompetitionFormatView = CompetitionFormatView.Full,
+    ) -> tuple[int, bytes | memoryview] | None:
+        """Get a view of a competition_format by id as json, with its revision.
+
+        The competition_format is read through the cache, and its json is
+        only encoded once per revision. The summary of a cached
+        competition_format is only made when its json is not cached. A
+        storage keeping the json of formats returns it as is, uncached.
+
+        Args:
+            competition_format_id (UUID): the id of the competition_format
+            view (CompetitionFormatView): the view to return
+
+        Returns:
+            Optional[tuple[int, bytes | memoryview]]: The revision and the json.
+                None if not found.
+        """
+        if CompetitionFormatsAdapter.serves_json():
+            return await CompetitionFormatsAdapter.get_competition_format_json_by_id(
+                competition_format_id, view
+            )
+        if view == CompetitionFormatView.Full:
+            competition_format = await cls.get_competition_format_by_id(
+                competition_format_id
+            )
+            if competition_format is None:
+                return None
+            return competition_format.revision, cls.encode(competition_format)
+
+        competition_format = cls.cache.get(competition_format_id)
+        if competition_format is None:
+            summary = (
+                await CompetitionFormatsAdapter.get_competition_format_summary_by_id(
+                    competition_format_id
+                )
+            )
+            if summary is None:
+                return None
+            return summary.revision, cls.encode(summary, view)
+        encoded = cls.encoded.get((competition_format_id, view))
+        if encoded is None or encoded[0] != competition_format.revision:
+            summary = CompetitionFormatSummary.of(competition_format)
+            encoded = (summary.revision, summary.model_dump_json().encode())
+            cls.encoded.set((competition_format_id, view), encoded)
+        return encoded
+
+    @classmethod
+    async def get_competition_format_by_id(
+        cls: Any, competition_format_id: UUID
+    ) -> CompetitionFormatUnion | None:
+        """Get competition_format by id, reading through the cache.
+
+        Args:
+            competition_format_id (UUID): the id of the competition_format
+
+        Returns:
+            Optional[CompetitionFormatUnion]: The competition_format. None if not found.
+        """
+        competition_format = cls.cache.get(competition_format_id)
+        if competition_format is None:
+            competition_format = (
+                await CompetitionFormatsAdapter.get_competition_format_by_id(
+                    competition_format_id
+                )
+            )
+            if competition_format:
+                cls.cache.set(competition_format_id, competition_format)
+        return competition_format
+
+    @classmethod
+    async def get_competition_format_revision(
+        cls: Any, competition_format_id: UUID
+    ) -> int | None:
+        """Get the revision of a competition_format, from the cache if possible.
+
+        Args:
+            competition_format_id (UUID): the id of the competition_format
+
+        Returns:
+            Optional[int]: The revision of the competition_format. None if not found.
+        """
+        competition_format = cls.cache.get(competition_format_id)
+        if competition_format is not None:
+            return competition_format.revision
+        return await CompetitionFormatsAdapter.get_competition_format_revision(
+            competition_format_id
+        )
+
+    @classmethod
+    async def watch_changes(cls: Any, poll_interval: float) -> None:
+        """Invalidate cached competition_formats changed by any replica.
+
+        Runs until cancelled. Since every change is seen here, the cache TTL
+        only bounds staleness if the watch itself falls behind.
+        """
+        changes = CompetitionFormatsAdapter.watch_competition_format_changes(
+            poll_interval=poll_interval
+        )
+        async for competition_format_id in changes:
+            cls.invalidate(competition_format_id)
 
     @classmethod
     async def create_competition_format(
@@ -39,28 +203,90 @@ class CompetitionFormatsService:
             Optional[str]: The id of the created competition_format. None otherwise.
 
         Raises:
-            CompetitionFormatAlreadyExistError: A format with the same name already exist
+            CompetitionFormatAlreadyExistError: A format with the same id or name already exist
             ValidationError: input object has illegal values
         """
-        # Check if it exists:
-        _competition_formats = (
-            await CompetitionFormatsAdapter.get_competition_formats_by_name(
-                competition_format.name
+        await cls.prepare_new_competition_format(competition_format)
+
+        # insert new competition_format, uniqueness is enforced by the db indexes:
+        try:
+            result = await CompetitionFormatsAdapter.create_competition_format(
+                competition_format
             )
+        except DuplicateKeyError as e:
+            msg = await cls.duplicate_message(competition_format)
+            raise CompetitionFormatAlreadyExistError(msg) from e
+        cls.logger.debug(
+            f"inserted competition_format with id: {competition_format.id.hex} and result: {result}"
         )
-        if _competition_formats:
-            msg = (
-                f"Competition-format with name {competition_format.name} already exist."
+        if result:
+            return competition_format.id
+        return None
+
+    @classmethod
+    async def duplicate_message(
+        cls: Any, competition_format: CompetitionFormatUnion
+    ) -> str:
+        """Tell whether the id or the name of a format not created is taken."""
+        if (
+            await CompetitionFormatsAdapter.get_competition_format_revision(
+                competition_format.id
             )
-            raise CompetitionFormatAlreadyExistError(msg) from None
+            is not None
+        ):
+            return f"Competition-format with id {competition_format.id} already exist."
+        return f"Competition-format with name {competition_format.name} already exist."
 
-        # Validation:
-        try:
-            await cls.validate_competition_format(competition_format)
-        except ValidationError as e:
-            raise e from e
+    @classmethod
+    async def create_competition_formats(
+        cls: Any,
+        items: list[Any],
+    ) -> list[BulkItemResult]:
+        """Create many competition_formats in one write.
+
+        Every item is validated as in create_competition_format. The valid
+        ones are written together, and a duplicate does not stop the others.
+
+        Args:
+            items (list[Any]): the competition_formats to be created, as parsed json
 
-        # Sort the race_configs:
+        Returns:
+            list[BulkItemResult]: The outcome of every item, in the order given.
+        """
+        results: list[BulkItemResult] = []
+        valid: list[CompetitionFormatUnion] = []
+        for index, item in enumerate(items):
+            try:
+                competition_format = CompetitionFormatUnionAdapter.validate_python(item)
+                await cls.prepare_new_competition_format(competition_format)
+            except (PydanticValidationError, ValidationError) as e:
+                results.append(
+                    BulkItemResult(
+                        index=index, status=BulkItemStatus.Invalid, detail=str(e)
+                    )
+                )
+                continue
+            results.append(
+                BulkItemResult(
+                    index=index,
+                    status=BulkItemStatus.Created,
+                    id=competition_format.id,
+                )
+            )
+            valid.append(competition_format)
+
+        duplicates = await CompetitionFormatsAdapter.create_competition_formats(valid)
+        created = [
+            result for result in results if result.status == BulkItemStatus.Created
+        ]
+        for position in duplicates:
+            created[position].status = BulkItemStatus.Duplicate
+            created[position].detail = await cls.duplicate_message(valid[position])
+        return results
+
+    @classmethod
+    def sort_race_configs(cls: Any, competition_format: CompetitionFormatUnion) -> None:
+        """Sort the race_configs of a competition_format by max_no_of_contestants."""
         if isinstance(competition_format, IndividualSprintFormat):
             competition_format.race_config_non_ranked.sort(
                 key=lambda k: (k.max_no_of_contestants,),
@@ -71,51 +297,95 @@ class CompetitionFormatsService:
                 reverse=False,
             )
 
-        # insert new competition_format
-        result = await CompetitionFormatsAdapter.create_competition_format(
-            competition_format
-        )
-        cls.logger.debug(
-            f"inserted competition_format with id: {competition_format.id.hex} and result: {result}"
-        )
-        if result:
-            return competition_format.id
-        return None
+    @classmethod
+    async def prepare_new_competition_format(
+        cls: Any,
+        competition_format: CompetitionFormatUnion,
+    ) -> None:
+        """Validate a competition_format to be created, and prepare it for storage.
+
+        Raises:
+            IllegalValueError: a heat of the competition_format is too big
+            ValidationError: input object has illegal values
+        """
+        # Validation:
+        await cls.validate_competition_format(competition_format)
+        if CHECK_CAPACITY and isinstance(competition_format, IndividualSprintFormat):
+            await cls.validate_capacity(competition_format)
+
+        cls.sort_race_configs(competition_format)
+
+        # A new competition_format always starts at the first revision:
+        competition_format.revision = 1
 
     @classmethod
     async def update_competition_format(
         cls: Any,
         competition_format_id: UUID,
         competition_format: CompetitionFormatUnion,
-    ) -> str | None:
-        """Get competition_format function."""
+        expected_revision: int | None = None,
+    ) -> int:
+        """Update competition_format function.
+
+        The update is a single conditional write, without reading the old
+        document first. The db is only read again to tell why a write failed.
+
+        Args:
+            competition_format_id (UUID): the id of the competition_format
+            competition_format (CompetitionFormat): the new competition_format
+            expected_revision (Optional[int]): only update if at this revision
+
+        Returns:
+            int: The new revision of the competition_format.
+
+        Raises:
+            CompetitionFormatAlreadyExistError: A format with the same name already exist
+            CompetitionFormatNotFoundError: The competition_format is not found
+            CompetitionFormatRevisionConflictError: The competition_format is at another revision
+            IllegalValueError: The id of the competition_format is changed, or
+                its race configs are changed so that a heat is too big
+            ValidationError: input object has illegal values
+        """
         # Validate:
         await cls.validate_competition_format(competition_format)
-        # get old document
-        old_competition_format = (
-            await CompetitionFormatsAdapter.get_competition_format_by_id(
+        if competition_format.id != competition_format_id:
+            if await CompetitionFormatsAdapter.get_competition_format_by_id(
                 competition_format_id
-            )
-        )
-        # update the competition_format if found:
-        if old_competition_format:
-            if competition_format.id != old_competition_format.id:
+            ):
                 msg = "Cannot change id for competition_format."
                 raise IllegalValueError(msg) from None
-            # Sort the race_configs:
-            if isinstance(competition_format, IndividualSprintFormat):
-                competition_format.race_config_non_ranked.sort(
-                    key=lambda k: (k.max_no_of_contestants,),
-                    reverse=False,
-                )
-                competition_format.race_config_ranked.sort(
-                    key=lambda k: (k.max_no_of_contestants,),
-                    reverse=False,
-                )
-            return await CompetitionFormatsAdapter.update_competition_format(
-                competition_format_id, competition_format
+            msg = f"CompetitionFormat with id {competition_format_id.hex} not found."
+            raise CompetitionFormatNotFoundError(msg) from None
+        cls.sort_race_configs(competition_format)
+        if CHECK_CAPACITY and isinstance(competition_format, IndividualSprintFormat):
+            await cls.validate_capacity_of_update(competition_format)
+        # update the competition_format if found, and at the expected revision:
+        try:
+            revision = await CompetitionFormatsAdapter.update_competition_format(
+                competition_format_id,
+                competition_format,
+                expected_revision=expected_revision,
             )
+        except DuplicateKeyError as e:
+            msg = (
+                f"Competition-format with name {competition_format.name} already exist."
+            )
+            raise CompetitionFormatAlreadyExistError(msg) from e
+        cls.invalidate(competition_format_id)
+        if revision is not None:
+            return revision
 
+        if expected_revision is not None and (
+            await CompetitionFormatsAdapter.get_competition_format_revision(
+                competition_format_id
+            )
+            is not None
+        ):
+            msg = (
+                f"CompetitionFormat with id {competition_format_id.hex}"
+                f" is not at revision {expected_revision}."
+            )
+            raise CompetitionFormatRevisionConflictError(msg) from None
         msg = f"CompetitionFormat with id {competition_format_id.hex} not found."
         raise CompetitionFormatNotFoundError(msg) from None
 
@@ -132,9 +402,11 @@ class CompetitionFormatsService:
         )
         # delete the document if found:
         if competition_format:
-            return await CompetitionFormatsAdapter.delete_competition_format(
+            result = await CompetitionFormatsAdapter.delete_competition_format(
                 competition_format_id
             )
+            cls.invalidate(competition_format_id)
+            return result
 
         msg = f"CompetitionFormat with id {competition_format_id.hex} not found."
         raise CompetitionFormatNotFoundError(msg) from None
@@ -184,6 +456,8 @@ class CompetitionFormatsService:
                             " Number of heats must not be less than zero."
                         )
                         raise IllegalValueError(msg) from None
+            # Every quota in from_to must be a number, ALL or REST:
+            validate_quotas(race_config)
 
     @classmethod
     async def validate_individual_sprint_format(
@@ -233,3 +507,70 @@ class CompetitionFormatsService:
         else:
             msg = "Mandatory attbribute 'race_config_ranked' missing."
             raise ValidationError(msg) from None
+
+    @classmethod
+    async def validate_capacity(
+        cls: Any, competition_format: IndividualSprintFormat
+    ) -> None:
+        """Check the capacity table of a validated IndividualSprintFormat.
+
+        The check is only made on create and update when CHECK_CAPACITY is
+        set, since formats stored before it was made may not pass it.
+
+        Raises:
+            IllegalValueError: a heat gets more than max_no_of_contestants_in_race
+                for some number of contestants, or the raceclass is too big
+                for a table
+        """
+        table = capacity_table(competition_format)
+        for ranked, capacity in [
+            ("ranked", table.ranked),
+            ("non-ranked", table.non_ranked),
+        ]:
+            for contestants, largest_heat in enumerate(capacity.largest_heat, start=1):
+                if largest_heat > competition_format.max_no_of_contestants_in_race:
+                    msg = (
+                        f"A {ranked} raceclass of {contestants} contestants gets a heat"
+                        f" of {largest_heat}, more than max number of contestants in race."
+                    )
+                    raise IllegalValueError(msg) from None
+
+    @classmethod
+    async def validate_capacity_of_update(
+        cls: Any, competition_format: IndividualSprintFormat
+    ) -> None:
+        """Check the capacity of an updated IndividualSprintFormat.
+
+        A format that does not pass the check may still be updated, as long
+        as its race configs and limits are kept as stored.
+
+        Raises:
+            IllegalValueError: the race configs or limits are changed, and a
+                heat gets more than max_no_of_contestants_in_race
+        """
+        try:
+            await cls.validate_capacity(competition_format)
+        except IllegalValueError:
+            current = await cls.get_competition_format_by_id(competition_format.id)
+            if not isinstance(current, IndividualSprintFormat) or (
+                cls.race_limits(current) != cls.race_limits(competition_format)
+            ):
+                raise
+
+    @classmethod
+    def race_limits(cls: Any, competition_format: IndividualSprintFormat) -> tuple:
+        """Return what the capacity of an IndividualSprintFormat depends on."""
+        return (
+            competition_format.max_no_of_contestants_in_race,
+            competition_format.max_no_of_contestants_in_raceclass,
+            *(
+                sorted(
+                    race_configs,
+                    key=lambda race_config: race_config.max_no_of_contestants,
+                )
+                for race_configs in (
+                    competition_format.race_config_ranked,
+                    competition_format.race_config_non_ranked,
+                )
+            ),
+        )
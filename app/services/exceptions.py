@@ -19,6 +19,15 @@ class CompetitionFormatAlreadyExistError(Exception):
         super().__init__(message)
 
 
+class CompetitionFormatRevisionConflictError(Exception):
+    """Class representing custom exception for conditional update method."""
+
+    def __init__(self, message: str) -> None:
+        """Initialize the error."""
+        # Call the base class constructor with the parameters it needs
+        super().__init__(message)
+
+
 class ValidationError(Exception):
     """Class representing custom exception for create method."""
 
@@ -0,0 +1,114 @@
+"""Module for compiling the from_to of race configs to progression graphs."""
+
+from itertools import accumulate
+
+from app.models import QUOTA_ALL, QUOTA_REST, ProgressionGraph, RaceConfig
+
+from .exceptions import IllegalValueError
+
+
+def intern(names: list[str], ids: dict[str, int], name: str) -> int:
+    """Return the id of a name, giving it the next id if it has none."""
+    if name not in ids:
+        ids[name] = len(names)
+        names.append(name)
+    return ids[name]
+
+
+def compile_quota(quota: int | str) -> int:
+    """Return a quota of from_to as a number, or QUOTA_ALL or QUOTA_REST.
+
+    A number may also be given as a string of digits, and is read as the
+    number.
+
+    Raises:
+        IllegalValueError: the quota is not a number of at least zero,
+            "ALL" or "REST"
+    """
+    if isinstance(quota, int):
+        if quota >= 0:
+            return quota
+    elif quota == "ALL":
+        return QUOTA_ALL
+    elif quota == "REST":
+        return QUOTA_REST
+    elif quota.isdecimal():
+        return int(quota)
+    msg = f"Quota {quota} must be a number of contestants, ALL or REST."
+    raise IllegalValueError(msg) from None
+
+
+def validate_quotas(race_config: RaceConfig) -> None:
+    """Check that every quota of from_to compiles.
+
+    Raises:
+        IllegalValueError: a quota is not a number of at least zero, "ALL"
+            or "REST"
+    """
+    for from_heats in race_config.from_to.values():
+        for to_rounds in from_heats.values():
+            for to_heats in to_rounds.values():
+                for quota in to_heats.values():
+                    compile_quota(quota)
+
+
+def compile_race_config(race_config: RaceConfig) -> ProgressionGraph:
+    """Compile the from_to of a race config to a progression graph.
+
+    The nodes are the heats of every round in no_of_heats, in the order of
+    rounds, followed by any other (round, heat) found in from_to. A node
+    only found in from_to has no heats.
+
+    Raises:
+        IllegalValueError: a quota is not a number of at least zero, "ALL"
+            or "REST"
+    """
+    rounds: list[str] = []
+    round_ids: dict[str, int] = {}
+    heats: list[str] = []
+    heat_ids: dict[str, int] = {}
+    nodes: dict[tuple[int, int], int] = {}
+    no_of_heats: list[int] = []
+
+    def node(race_round: str, heat: str) -> int:
+        key = (intern(rounds, round_ids, race_round), intern(heats, heat_ids, heat))
+        if key not in nodes:
+            nodes[key] = len(nodes)
+            no_of_heats.append(0)
+        return nodes[key]
+
+    for race_round in race_config.rounds:
+        intern(rounds, round_ids, race_round)
+    for race_round, round_heats in sorted(
+        race_config.no_of_heats.items(),
+        key=lambda item: round_ids.get(item[0], len(rounds)),
+    ):
+        for heat, count in round_heats.items():
+            no_of_heats[node(race_round, heat)] = count
+
+    edges: list[tuple[int, int, int]] = []
+    for race_round, from_heats in race_config.from_to.items():
+        for heat, to_rounds in from_heats.items():
+            source = node(race_round, heat)
+            edges.extend(
+                (source, node(to_round, to_heat), compile_quota(quota))
+                for to_round, to_heats in to_rounds.items()
+                for to_heat, quota in to_heats.items()
+            )
+    # Group the edges by node, keeping the order of from_to within a node:
+    edges.sort(key=lambda edge: edge[0])
+    counts = [0] * len(nodes)
+    for source, _, _ in edges:
+        counts[source] += 1
+
+    return ProgressionGraph(
+        max_no_of_contestants=race_config.max_no_of_contestants,
+        rounds=rounds,
+        heats=heats,
+        node_rounds=[race_round for race_round, _ in nodes],
+        node_heats=[heat for _, heat in nodes],
+        node_no_of_heats=no_of_heats,
+        edge_offsets=list(accumulate(counts, initial=0)),
+        edge_targets=[target for _, target, _ in edges],
+        edge_quotas=[quota for _, _, quota in edges],
+    )
@@ -0,0 +1,225 @@
+"""Module for the race config selection service."""
+
+import logging
+from bisect import bisect_left
+from typing import Any
+from uuid import UUID
+
+from app.models import (
+    CapacityTable,
+    CompetitionFormatUnion,
+    IndividualSprintFormat,
+    ProgressionGraph,
+    RaceConfig,
+    RaceConfigMatch,
+)
+
+from .cache import LRUCache
+from .capacity import capacity_table
+from .competition_formats_service import (
+    CACHE_MAX_SIZE,
+    CACHE_TTL_SECONDS,
+    CompetitionFormatsService,
+)
+from .exceptions import CompetitionFormatNotFoundError
+from .progression_graph import compile_race_config
+
+
+class RaceConfigIndex:
+    """The race configs of a format, ordered by the contestants they cover.
+
+    The max_no_of_contestants of every config is kept in a sorted array of
+    thresholds, so that the config for a raceclass is found by binary search.
+    The progression graph of a config is compiled the first time it is
+    asked for, and kept with the index.
+    """
+
+    __slots__ = ("graphs", "race_configs", "thresholds")
+
+    def __init__(self, race_configs: list[RaceConfig]) -> None:
+        """Index race_configs, in any order."""
+        self.race_configs = sorted(
+            race_configs, key=lambda race_config: race_config.max_no_of_contestants
+        )
+        self.thresholds = [
+            race_config.max_no_of_contestants for race_config in self.race_configs
+        ]
+        self.graphs: list[ProgressionGraph | None] = [None] * len(self.race_configs)
+
+    def position(self, contestants: int) -> int | None:
+        """Return the position of the smallest config covering the contestants."""
+        position = bisect_left(self.thresholds, contestants)
+        if position == len(self.thresholds):
+            return None
+        return position
+
+    def select(self, contestants: int) -> RaceConfig | None:
+        """Return the smallest config covering the contestants, if any."""
+        position = self.position(contestants)
+        return None if position is None else self.race_configs[position]
+
+    def graph(self, contestants: int) -> ProgressionGraph | None:
+        """Return the progression graph of the config covering the contestants.
+
+        Raises:
+            IllegalValueError: the from_to of the config has an illegal quota
+        """
+        position = self.position(contestants)
+        if position is None:
+            return None
+        graph = self.graphs[position]
+        if graph is None:
+            graph = compile_race_config(self.race_configs[position])
+            self.graphs[position] = graph
+        return graph
+
+
+class RaceConfigsService:
+    """Class representing a service selecting the race configs of raceclasses."""
+
+    logger = logging.getLogger("uvicorn.error")
+    # The ranked and non-ranked index of every format, with the format indexed.
+    # An index is only used for the very format it was made from, so that it
+    # is made again whenever the format is read again into the cache:
+    indexes: LRUCache[
+        UUID, tuple[IndividualSprintFormat, RaceConfigIndex, RaceConfigIndex]
+    ] = LRUCache(maxsize=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS)
+    # The capacity table of every format, with the format it was made from:
+    capacities: LRUCache[UUID, tuple[IndividualSprintFormat, CapacityTable]] = LRUCache(
+        maxsize=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS
+    )
+
+    @classmethod
+    def index(
+        cls: Any, competition_format: IndividualSprintFormat
+    ) -> tuple[RaceConfigIndex, RaceConfigIndex]:
+        """Return the ranked and non-ranked index of an individual sprint format."""
+        entry = cls.indexes.get(competition_format.id)
+        if entry is not None and entry[0] is competition_format:
+            return entry[1], entry[2]
+        ranked = RaceConfigIndex(competition_format.race_config_ranked)
+        non_ranked = RaceConfigIndex(competition_format.race_config_non_ranked)
+        cls.indexes.set(competition_format.id, (competition_format, ranked, non_ranked))
+        return ranked, non_ranked
+
+    @classmethod
+    async def get_individual_sprint_format(
+        cls: Any, competition_format_id: UUID
+    ) -> IndividualSprintFormat:
+        """Get an individual sprint format by id, reading through the cache.
+
+        Raises:
+            CompetitionFormatNotFoundError: no individual sprint format has the id
+        """
+        competition_format: (
+            CompetitionFormatUnion | None
+        ) = await CompetitionFormatsService.get_competition_format_by_id(
+            competition_format_id
+        )
+        if competition_format is None:
+            msg = f"CompetitionFormat with id {competition_format_id.hex} not found."
+            raise CompetitionFormatNotFoundError(msg) from None
+        if not isinstance(competition_format, IndividualSprintFormat):
+            msg = (
+                f"CompetitionFormat with id {competition_format_id.hex}"
+                f" is a {competition_format.datatype} format, without race configs."
+            )
+            raise CompetitionFormatNotFoundError(msg) from None
+        return competition_format
+
+    @classmethod
+    async def select_race_configs(
+        cls: Any,
+        competition_format_id: UUID,
+        raceclasses: list[tuple[int, bool]],
+    ) -> tuple[int, list[RaceConfigMatch]]:
+        """Select the race config of every raceclass of an event.
+
+        Args:
+            competition_format_id (UUID): the id of an individual sprint format
+            raceclasses (list[tuple[int, bool]]): the number of contestants in
+                every raceclass, and whether it is ranked
+
+        Returns:
+            tuple[int, list[RaceConfigMatch]]: The revision of the format, and
+                the config selected for every raceclass, in the order given.
+
+        Raises:
+            CompetitionFormatNotFoundError: no individual sprint format has the id
+        """
+        competition_format = await cls.get_individual_sprint_format(
+            competition_format_id
+        )
+        ranked_index, non_ranked_index = cls.index(competition_format)
+        return competition_format.revision, [
+            RaceConfigMatch(
+                contestants=contestants,
+                ranked=ranked,
+                race_config=(ranked_index if ranked else non_ranked_index).select(
+                    contestants
+                ),
+            )
+            for contestants, ranked in raceclasses
+        ]
+
+    @classmethod
+    async def get_progression_graph(
+        cls: Any, competition_format_id: UUID, contestants: int, *, ranked: bool
+    ) -> tuple[int, ProgressionGraph]:
+        """Get the progression graph of the race config of a raceclass.
+
+        The graph is compiled once per format and revision.
+
+        Args:
+            competition_format_id (UUID): the id of an individual sprint format
+            contestants (int): the number of contestants in the raceclass
+            ranked (bool): the raceclass is ranked
+
+        Returns:
+            tuple[int, ProgressionGraph]: The revision of the format, and the
+                graph of the config covering the contestants.
+
+        Raises:
+            CompetitionFormatNotFoundError: no individual sprint format has
+                the id, or no config of it covers the contestants
+            IllegalValueError: the from_to of the config has an illegal quota
+        """
+        competition_format = await cls.get_individual_sprint_format(
+            competition_format_id
+        )
+        ranked_index, non_ranked_index = cls.index(competition_format)
+        graph = (ranked_index if ranked else non_ranked_index).graph(contestants)
+        if graph is None:
+            msg = (
+                f"CompetitionFormat with id {competition_format_id.hex}"
+                f" has no race config for {contestants} contestants."
+            )
+            raise CompetitionFormatNotFoundError(msg) from None
+        return competition_format.revision, graph
+
+    @classmethod
+    async def get_capacity(
+        cls: Any, competition_format_id: UUID
+    ) -> tuple[int, CapacityTable]:
+        """Get the capacity table of an individual sprint format.
+
+        The table is made the first time it is asked for, and kept for as
+        long as the format is cached.
+
+        Returns:
+            tuple[int, CapacityTable]: The revision of the format, and its table.
+
+        Raises:
+            CompetitionFormatNotFoundError: no individual sprint format has the id
+            IllegalValueError: the from_to of a race config has an illegal
+                quota, or the raceclass is too big for a table
+        """
+        competition_format = await cls.get_individual_sprint_format(
+            competition_format_id
+        )
+        entry = cls.capacities.get(competition_format_id)
+        if entry is not None and entry[0] is competition_format:
+            return competition_format.revision, entry[1]
+        table = capacity_table(competition_format)
+        cls.capacities.set(competition_format_id, (competition_format, table))
+        return competition_format.revision, table
@@ -0,0 +1,105 @@
+"""Module for the interval start start list service."""
+
+import logging
+from collections.abc import Iterator
+from datetime import timedelta
+from itertools import accumulate, repeat
+from typing import Any
+from uuid import UUID
+
+from app.models import (
+    CompetitionFormatUnion,
+    IntervalStartFormat,
+    StartList,
+    StartListRaceclass,
+    StartListRequest,
+)
+
+from .competition_formats_service import CompetitionFormatsService
+from .exceptions import CompetitionFormatNotFoundError
+
+
+class StartListService:
+    """Class representing a service planning the starts of interval start events."""
+
+    logger = logging.getLogger("uvicorn.error")
+
+    @classmethod
+    async def get_interval_start_format(
+        cls: Any, competition_format_id: UUID
+    ) -> IntervalStartFormat:
+        """Get an interval start format by id, reading through the cache.
+
+        Raises:
+            CompetitionFormatNotFoundError: no interval start format has the id
+        """
+        competition_format: (
+            CompetitionFormatUnion | None
+        ) = await CompetitionFormatsService.get_competition_format_by_id(
+            competition_format_id
+        )
+        if competition_format is None:
+            msg = f"CompetitionFormat with id {competition_format_id.hex} not found."
+            raise CompetitionFormatNotFoundError(msg) from None
+        if not isinstance(competition_format, IntervalStartFormat):
+            msg = (
+                f"CompetitionFormat with id {competition_format_id.hex}"
+                f" is a {competition_format.datatype} format, without intervals."
+            )
+            raise CompetitionFormatNotFoundError(msg) from None
+        return competition_format
+
+    @classmethod
+    async def generate_start_lists(
+        cls: Any, competition_format_id: UUID, start_list: StartListRequest
+    ) -> tuple[int, Iterator[StartList]]:
+        """Generate the start time of every contestant of an interval start event.
+
+        The contestants of a group start intervals apart, raceclass after
+        raceclass in the order given. Groups start one after another, in the
+        order they are first given, time_between_groups after the last start
+        of the group before.
+
+        The offset of the first start of every raceclass is found first. The
+        start times of a raceclass are then made as its start list is
+        iterated, by adding up intervals, so only one raceclass is held in
+        memory when streaming.
+
+        Args:
+            competition_format_id (UUID): the id of an interval start format
+            start_list (StartListRequest): the start time and the raceclasses
+
+        Returns:
+            tuple[int, Iterator[StartList]]: The revision of the format, and
+                the start list of every raceclass in the order they start.
+
+        Raises:
+            CompetitionFormatNotFoundError: no interval start format has the id
+        """
+        competition_format = await cls.get_interval_start_format(competition_format_id)
+        groups: dict[int, list[StartListRaceclass]] = {}
+        for raceclass in start_list.raceclasses:
+            groups.setdefault(raceclass.group, []).append(raceclass)
+
+        intervals = competition_format.intervals
+        offsets: list[tuple[StartListRaceclass, timedelta]] = []
+        offset = timedelta(0)
+        for members in groups.values():
+            for raceclass in members:
+                offsets.append((raceclass, offset))
+                offset += intervals * raceclass.no_of_contestants
+            offset += competition_format.time_between_groups - intervals
+
+        return competition_format.revision, (
+            StartList(
+                raceclass=raceclass.name,
+                group=raceclass.group,
+                start_times=list(
+                    accumulate(
+                        repeat(intervals, raceclass.no_of_contestants - 1),
+                        initial=start_list.start_time + offset,
+                    )
+                ),
+            )
+            for raceclass, offset in offsets
+        )
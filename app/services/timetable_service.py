@@ -0,0 +1,123 @@
+"""Module for the heat timetable service."""
+
+import logging
+from collections.abc import Iterator
+from datetime import timedelta
+from itertools import accumulate
+from typing import Any
+from uuid import UUID
+
+from app.models import (
+    Heat,
+    IndividualSprintFormat,
+    RaceConfig,
+    TimetableRaceclass,
+    TimetableRequest,
+)
+
+from .exceptions import IllegalValueError
+from .race_configs_service import RaceConfigsService
+
+
+class TimetableService:
+    """Class representing a service planning the heats of sprint events."""
+
+    logger = logging.getLogger("uvicorn.error")
+
+    @classmethod
+    def group_raceclasses(
+        cls: Any,
+        competition_format: IndividualSprintFormat,
+        raceclasses: list[TimetableRaceclass],
+    ) -> dict[int, list[tuple[TimetableRaceclass, RaceConfig]]]:
+        """Select the race config of every raceclass, and group the raceclasses.
+
+        Raises:
+            IllegalValueError: no race config covers the size of a raceclass
+        """
+        ranked_index, non_ranked_index = RaceConfigsService.index(competition_format)
+        groups: dict[int, list[tuple[TimetableRaceclass, RaceConfig]]] = {}
+        for raceclass in raceclasses:
+            index = ranked_index if raceclass.ranked else non_ranked_index
+            race_config = index.select(raceclass.no_of_contestants)
+            if race_config is None:
+                msg = (
+                    f"No race config covers the {raceclass.no_of_contestants}"
+                    f" contestants of raceclass {raceclass.name}."
+                )
+                raise IllegalValueError(msg) from None
+            groups.setdefault(raceclass.group, []).append((raceclass, race_config))
+        return groups
+
+    @classmethod
+    async def generate_timetable(
+        cls: Any, competition_format_id: UUID, timetable: TimetableRequest
+    ) -> tuple[int, Iterator[Heat]]:
+        """Generate the start time of every heat of an individual sprint event.
+
+        The raceclasses of a group run together, round by round: the first
+        round of every raceclass in the group, in the order given, then the
+        second round, and so on. Groups run one after another, in the order
+        they are first given. Heats are time_between_heats apart, rounds
+        time_between_rounds, and groups time_between_groups.
+
+        The heats are laid out first, with the gap before each of them, and
+        the start times are then found by summing the gaps in one pass. The
+        heats are made as they are iterated, so a large event can be streamed.
+
+        Args:
+            competition_format_id (UUID): the id of an individual sprint format
+            timetable (TimetableRequest): the start time and the raceclasses
+
+        Returns:
+            tuple[int, Iterator[Heat]]: The revision of the format, and every
+                heat in the order they start.
+
+        Raises:
+            CompetitionFormatNotFoundError: no individual sprint format has the id
+            IllegalValueError: no race config covers the size of a raceclass
+        """
+        competition_format = await RaceConfigsService.get_individual_sprint_format(
+            competition_format_id
+        )
+        groups = cls.group_raceclasses(competition_format, timetable.raceclasses)
+        between_heats = int(competition_format.time_between_heats.total_seconds())
+        between_rounds = int(competition_format.time_between_rounds.total_seconds())
+        between_groups = int(competition_format.time_between_groups.total_seconds())
+        heats: list[tuple[str, str, str, int]] = []
+        gaps: list[int] = []
+        gap = 0
+        for members in groups.values():
+            no_of_rounds = max(len(race_config.rounds) for _, race_config in members)
+            for round_position in range(no_of_rounds):
+                round_start = len(heats)
+                for raceclass, race_config in members:
+                    if round_position >= len(race_config.rounds):
+                        continue
+                    race_round = race_config.rounds[round_position]
+                    for index, count in race_config.no_of_heats.get(
+                        race_round, {}
+                    ).items():
+                        for heat in range(1, count + 1):
+                            heats.append((raceclass.name, race_round, index, heat))
+                            gaps.append(gap)
+                            gap = between_heats
+                if len(heats) > round_start:
+                    gap = between_rounds
+            if heats:
+                gap = between_groups
+
+        offsets = accumulate(gaps)
+        start_time = timetable.start_time
+        return competition_format.revision, (
+            Heat(
+                raceclass=raceclass,
+                round=race_round,
+                index=index,
+                heat=heat,
+                start_time=start_time + timedelta(seconds=offset),
+            )
+            for (raceclass, race_round, index, heat), offset in zip(
+                heats, offsets, strict=True
+            )
+        )
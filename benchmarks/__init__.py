@@ -0,0 +1 @@
+"""Package for benchmarks, run with python -m benchmarks.<name>."""
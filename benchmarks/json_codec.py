@@ -0,0 +1,62 @@
+"""Benchmark of decoding and encoding competition_formats as json.
+
+Compares the default path of FastAPI, parsing the body into python objects
+before validating them, and encoding responses with jsonable_encoder and
+json.dumps, with the fast path of validating and dumping the raw json by
+pydantic. Every path is run on the competition_formats in tests/files:
+
+    uv run python -m benchmarks.json_codec
+"""
+
+import argparse
+import json
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models import CompetitionFormatUnion, CompetitionFormatUnionAdapter
+
+FILES = Path(__file__).parent.parent / "tests" / "files"
+
+
+def paths(body: bytes) -> dict[str, Callable[[], Any]]:
+    """Return every path to benchmark on one body."""
+    competition_format = CompetitionFormatUnionAdapter.validate_json(body)
+    return {
+        "decode: json.loads + new TypeAdapter": lambda: TypeAdapter(
+            CompetitionFormatUnion
+        ).validate_python(json.loads(body)),
+        "decode: json.loads + validate_python": lambda: (
+            CompetitionFormatUnionAdapter.validate_python(json.loads(body))
+        ),
+        "decode: validate_json": lambda: CompetitionFormatUnionAdapter.validate_json(
+            body
+        ),
+        "encode: jsonable_encoder + json.dumps": lambda: json.dumps(
+            jsonable_encoder(competition_format)
+        ).encode(),
+        "encode: dump_json": lambda: CompetitionFormatUnionAdapter.dump_json(
+            competition_format
+        ),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark, printing microseconds per call of every path."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    for file in sorted(FILES.glob("*.json")):
+        print(f"{file.name} ({file.stat().st_size} bytes)")
+        for name, path in paths(file.read_bytes()).items():
+            best = min(timeit.repeat(path, number=args.number, repeat=5))
+            print(f"  {name:40} {best / args.number * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark of reading stored competition_format documents.
+
+Compares validating every document read from the db, as the mongo storage
+did before, with building the models of trusted documents without
+validation. Every path is run on the documents the mongo storage would
+store for the sprint formats in tests/files:
+
+    uv run python -m benchmarks.trusted_read
+"""
+
+import argparse
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from app.adapters import SCHEMA_VERSION, MongoCompetitionFormatsStorage, read_document
+from app.models import CompetitionFormatUnion, CompetitionFormatUnionAdapter
+
+FILES = Path(__file__).parent.parent / "tests" / "files"
+
+
+def paths(document: dict[str, Any]) -> dict[str, Callable[[], Any]]:
+    """Return every path to benchmark on one stored document."""
+    untrusted = document | {"schema_version": None}
+    return {
+        "new TypeAdapter + validate_python": lambda: TypeAdapter(
+            CompetitionFormatUnion
+        ).validate_python(document),
+        "validate_python": lambda: CompetitionFormatUnionAdapter.validate_python(
+            document
+        ),
+        "read_document, untrusted": lambda: read_document(untrusted),
+        "read_document, trusted": lambda: read_document(document),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark, printing microseconds per document of every path."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    for file in sorted(FILES.glob("*sprint*.json")):
+        competition_format = CompetitionFormatUnionAdapter.validate_json(
+            file.read_bytes()
+        )
+        document = MongoCompetitionFormatsStorage.to_document(competition_format)
+        assert document["schema_version"] == SCHEMA_VERSION  # noqa: S101
+        print(file.name)
+        for name, path in paths(document).items():
+            best = min(timeit.repeat(path, number=args.number, repeat=5))
+            print(f"  {name:40} {best / args.number * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
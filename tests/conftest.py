@@ -6,6 +6,7 @@ from http import HTTPStatus
 from os import environ as env
 from typing import Any
 
+import jwt
 import pytest
 import requests
 from requests.exceptions import ConnectionError  # noqa: A004
@@ -47,3 +48,14 @@ def docker_compose_file(pytestconfig: Any) -> Any:
 def docker_cleanup(pytestconfig: Any) -> Any:
     """Override default location of docker-compose.yml file."""
     return "stop"
+
+
+@pytest.fixture
+def headers() -> dict[str, str]:
+    """Create the headers of an admin."""
+    token = jwt.encode(
+        {"username": os.getenv("ADMIN_USERNAME"), "role": "admin", "exp": 9999999999},
+        os.getenv("JWT_SECRET"),
+        "HS256",
+    )
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,27 @@
+"""Helpers shared by the test modules."""
+
+import json
+from http import HTTPStatus
+from typing import Any
+
+from fastapi.testclient import TestClient
+
+from app.models import CompetitionFormatUnion, CompetitionFormatUnionAdapter
+
+
+def load(name: str) -> dict[str, Any]:
+    """Load a competition_format from the test files."""
+    with open(f"tests/files/{name}.json") as file:
+        return json.load(file)
+
+
+def load_competition_format(name: str, /, **changes: Any) -> CompetitionFormatUnion:
+    """Load a competition_format from the test files, with changes, as a model."""
+    return CompetitionFormatUnionAdapter.validate_python(load(name) | changes)
+
+
+def create(client: TestClient, headers: dict, body: dict) -> str:
+    """Create a competition_format, returning its id."""
+    resp = client.post("/competition-formats", headers=headers, json=body)
+    assert resp.status_code == HTTPStatus.CREATED, resp.text
+    return resp.headers["Location"].split("/")[-1]
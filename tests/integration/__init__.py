@@ -1,7 +1,14 @@
 """Integration test package.
 
 Modules:
+    test_catalog
     test_factory
+    test_memory_storage
+    test_metrics
+    test_mongo_pool
     test_ping
     test_ready
+    test_replica_storage
+    test_snapshot_storage
+    test_sqlite_storage
 """
@@ -0,0 +1,322 @@
+"""Integration test cases for exporting and importing the catalog."""
+
+import gzip
+import io
+import json
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from pytest_mock import MockFixture
+
+from app import api
+from app.__main__ import main
+from app.models import CompetitionFormatUnion
+from app.services import CompetitionFormatsService
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """Fixture to create a test client for the FastAPI application."""
+    return TestClient(api)
+
+
+@pytest.fixture
+def competition_formats() -> list[CompetitionFormatUnion]:
+    """Two competition_formats for testing."""
+    return [
+        TypeAdapter(CompetitionFormatUnion).validate_python(competition_format)
+        for competition_format in (
+            {
+                "datatype": "interval_start",
+                "id": "290e70d5-0933-4af0-bb53-1d705ba7eb95",
+                "name": "Interval Start",
+                "revision": 3,
+                "starting_order": "Draw",
+                "start_procedure": "Interval Start",
+                "time_between_groups": "00:10:00",
+                "intervals": "00:00:30",
+                "max_no_of_contestants_in_raceclass": 9999,
+                "max_no_of_contestants_in_race": 9999,
+            },
+            {
+                "datatype": "interval_start",
+                "id": "5d6e6c3f-5d6b-4b6e-9a8c-6e4f3c2b1a00",
+                "name": "Interval Start 15s",
+                "revision": 1,
+                "starting_order": "Draw",
+                "start_procedure": "Interval Start",
+                "time_between_groups": "00:10:00",
+                "intervals": "00:00:15",
+                "max_no_of_contestants_in_raceclass": 9999,
+                "max_no_of_contestants_in_race": 9999,
+            },
+        )
+    ]
+
+
+def to_ndjson(competition_formats: list[CompetitionFormatUnion]) -> bytes:
+    """Encode competition_formats as an export."""
+    return b"".join(
+        competition_format.model_dump_json().encode() + b"\n"
+        for competition_format in competition_formats
+    )
+
+
+def mock_stream(
+    mocker: MockFixture, competition_formats: list[CompetitionFormatUnion]
+) -> Any:
+    """Mock the adapter to stream the competition_formats."""
+
+    async def stream() -> AsyncIterator[CompetitionFormatUnion]:
+        for competition_format in competition_formats:
+            yield competition_format
+
+    return mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.stream_competition_formats",
+        return_value=stream(),
+    )
+
+
+def mock_upsert(mocker: MockFixture, **kwargs: Any) -> Any:
+    """Mock the adapter bulk upsert."""
+    return mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.upsert_competition_formats",
+        **kwargs,
+    )
+
+
+@pytest.mark.integration
+async def test_export_catalog(
+    client: TestClient,
+    mocker: MockFixture,
+    headers: dict,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should return all competition_formats as ndjson."""
+    stream_competition_formats = mock_stream(mocker, competition_formats)
+
+    resp = client.get(
+        "/competition-formats:export?batch_size=1",
+        headers=headers,
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert "application/x-ndjson" in resp.headers["Content-Type"]
+    assert resp.content == to_ndjson(competition_formats)
+    assert json.loads(resp.content.splitlines()[0])["revision"] == 3  # noqa: PLR2004
+    stream_competition_formats.assert_called_once_with(batch_size=1)
+
+
+@pytest.mark.integration
+async def test_export_catalog_gzip(
+    client: TestClient,
+    mocker: MockFixture,
+    headers: dict,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should return all competition_formats as gzipped ndjson."""
+    mock_stream(mocker, competition_formats)
+
+    resp = client.get(
+        "/competition-formats:export?gzip=true",
+        headers={**headers, "Accept-Encoding": "identity"},
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["Content-Type"] == "application/gzip"
+    assert "attachment" in resp.headers["Content-Disposition"]
+    assert gzip.decompress(resp.content) == to_ndjson(competition_formats)
+
+
+@pytest.mark.integration
+async def test_export_catalog_empty(
+    client: TestClient,
+    mocker: MockFixture,
+    headers: dict,
+) -> None:
+    """Should return an empty body when there are no competition_formats."""
+    mock_stream(mocker, [])
+
+    resp = client.get(
+        "/competition-formats:export",
+        headers=headers,
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.content == b""
+
+
+@pytest.mark.integration
+async def test_import_catalog(
+    client: TestClient,
+    mocker: MockFixture,
+    headers: dict,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should upsert the valid lines in batches, and report the others."""
+    upsert = mock_upsert(
+        mocker, side_effect=[(1, 0, {}), (0, 0, {0: "E11000 duplicate key"})]
+    )
+    CompetitionFormatsService.cache.set(
+        competition_formats[0].id, competition_formats[0]
+    )
+    body = (
+        to_ndjson(competition_formats[:1])
+        + b"not json\n\n"
+        + b'{"datatype": "interval_start", "name": "No intervals"}\n'
+        + to_ndjson(competition_formats[1:]).rstrip(b"\n")
+    )
+
+    resp = client.post(
+        "/competition-formats:import?batch_size=1",
+        headers={
+            **headers,
+            "Content-Type": "application/x-ndjson",
+        },
+        content=body,
+    )
+    assert resp.status_code == HTTPStatus.OK
+    result = resp.json()
+    assert result["created"] == 1
+    assert result["replaced"] == 0
+    assert result["invalid"] == 3  # noqa: PLR2004
+    assert [error.split(":")[0] for error in result["errors"]] == [
+        "Line 2",
+        "Line 4",
+        "Line 5",
+    ]
+    assert [call.args[0] for call in upsert.call_args_list] == [
+        competition_formats[:1],
+        competition_formats[1:],
+    ]
+    assert len(CompetitionFormatsService.cache) == 0
+
+
+@pytest.mark.integration
+async def test_import_catalog_gzip(
+    client: TestClient,
+    mocker: MockFixture,
+    headers: dict,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should gunzip a body sent with Content-Encoding gzip."""
+    upsert = mock_upsert(mocker, return_value=(1, 1, {}))
+
+    resp = client.post(
+        "/competition-formats:import",
+        headers={
+            **headers,
+            "Content-Type": "application/x-ndjson",
+            "Content-Encoding": "gzip",
+        },
+        content=gzip.compress(to_ndjson(competition_formats)),
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json() == {"created": 1, "replaced": 1, "invalid": 0, "errors": []}
+    upsert.assert_called_once_with(competition_formats)
+
+
+@pytest.mark.integration
+async def test_import_catalog_errors_are_capped(
+    client: TestClient,
+    mocker: MockFixture,
+    headers: dict,
+) -> None:
+    """Should count every invalid line, but only report the first ones."""
+    mocker.patch("app.services.catalog_service.MAX_IMPORT_ERRORS", 2)
+    upsert = mock_upsert(mocker)
+
+    resp = client.post(
+        "/competition-formats:import",
+        headers=headers,
+        content=b"{}\n" * 5,
+    )
+    assert resp.status_code == HTTPStatus.OK
+    result = resp.json()
+    assert result["invalid"] == 5  # noqa: PLR2004
+    assert len(result["errors"]) == 2  # noqa: PLR2004
+    upsert.assert_not_called()
+
+
+@pytest.mark.integration
+async def test_import_catalog_invalid_gzip(
+    client: TestClient,
+    mocker: MockFixture,
+    headers: dict,
+) -> None:
+    """Should return 422 Unprocessable Entity."""
+    upsert = mock_upsert(mocker)
+
+    resp = client.post(
+        "/competition-formats:import",
+        headers={
+            **headers,
+            "Content-Type": "application/gzip",
+        },
+        content=b"not gzip",
+    )
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    upsert.assert_not_called()
+
+
+@pytest.mark.integration
+async def test_import_catalog_no_authorization(client: TestClient) -> None:
+    """Should return 401 Unauthorized."""
+    resp = client.post("/competition-formats:import", content=b"")
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.integration
+def test_cli_export_and_import(
+    mocker: MockFixture,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should export to a gzipped file, and import it again."""
+    storage = mocker.patch("app.__main__.create_storage").return_value
+    init = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.init"
+    )
+    mock_stream(mocker, competition_formats)
+    upsert = mock_upsert(mocker, return_value=(0, 2, {}))
+    path = tmp_path / "catalog.ndjson.gz"
+
+    main(["export", "-o", str(path), "--batch-size", "10"])
+    assert gzip.decompress(path.read_bytes()) == to_ndjson(competition_formats)
+
+    main(["import", "-i", str(path)])
+    upsert.assert_called_once_with(competition_formats)
+    assert "Created 0, replaced 2, invalid 0." in capsys.readouterr().err
+    assert init.call_count == 2  # noqa: PLR2004
+    assert storage.close.call_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.integration
+def test_cli_stdin_and_stdout(
+    mocker: MockFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    capsysbinary: pytest.CaptureFixture,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should export to stdout and import from stdin, reporting invalid lines."""
+    mocker.patch("app.__main__.create_storage")
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.init"
+    )
+    mock_stream(mocker, competition_formats)
+    mock_upsert(mocker, return_value=(2, 0, {}))
+
+    main(["export"])
+    exported = capsysbinary.readouterr().out
+    assert exported == to_ndjson(competition_formats)
+
+    monkeypatch.setattr(
+        "sys.stdin", io.TextIOWrapper(io.BytesIO(exported + b"not json\n"))
+    )
+    main(["import"])
+    err = capsysbinary.readouterr().err.decode()
+    assert "Line 3:" in err
+    assert "Created 2, replaced 0, invalid 1." in err
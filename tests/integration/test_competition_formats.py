@@ -1,7 +1,9 @@
 """Integration test cases for the competition_formats route."""
 
+import json
 import os
 import uuid
+from collections.abc import AsyncIterator
 from copy import deepcopy
 from http import HTTPStatus
 from typing import Any
@@ -10,10 +12,16 @@ import jwt
 import pytest
 from fastapi.testclient import TestClient
 from pydantic import TypeAdapter
+from pymongo.errors import DuplicateKeyError
 from pytest_mock import MockFixture
 
 from app import api
-from app.models import CompetitionFormatUnion
+from app.adapters import NameSearchMode, decode_cursor, encode_cursor
+from app.adapters.documents import write_document
+from app.models import CompetitionFormatSummary, CompetitionFormatUnion
+from app.models.start_list_model import MAX_RACECLASS_SIZE, MAX_RACECLASSES
+from app.routers.competition_formats import MAX_PAGE_SIZE
+from app.services import CompetitionFormatsService, capacity_table
 
 USERS_HOST_SERVER = os.getenv("USERS_HOST_SERVER")
 USERS_HOST_PORT = os.getenv("USERS_HOST_PORT")
@@ -25,6 +33,12 @@ def client() -> TestClient:
     return TestClient(api)
 
 
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    """Start every test with an empty competition_format cache."""
+    CompetitionFormatsService.invalidate(None)
+
+
 @pytest.fixture
 def token() -> str:
     """Create a valid token."""
@@ -286,12 +300,12 @@ async def test_create_competition_format_interval_start(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_formats_by_name",
         return_value=[],
     )
-    mocker.patch(
+    create_competition_format = mocker.patch(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.create_competition_format",
         return_value=competition_format_interval_start["id"],
     )
 
-    request_body = competition_format_interval_start
+    request_body = competition_format_interval_start | {"revision": 7}
 
     headers = {
         "Content-Type": "application/json",
@@ -304,6 +318,7 @@ async def test_create_competition_format_interval_start(
         f"/competition-formats/{competition_format_interval_start['id']}"
         in resp.headers["Location"]
     )
+    assert create_competition_format.call_args.args[0].revision == 1
 
 
 @pytest.mark.integration
@@ -338,6 +353,110 @@ async def test_create_competition_format_individual_sprint(
     )
 
 
+@pytest.mark.integration
+async def test_create_competition_format_quotas(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should accept numbers given as strings, and return 422 for other quotas."""
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.create_competition_format",
+        return_value=competition_format_individual_sprint["id"],
+    )
+    race_config = competition_format_individual_sprint["race_config_ranked"][0]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for quota, status in [
+        ("8", HTTPStatus.CREATED),
+        (-1, HTTPStatus.UNPROCESSABLE_ENTITY),
+        ("SOME", HTTPStatus.UNPROCESSABLE_ENTITY),
+    ]:
+        request_body = competition_format_individual_sprint | {
+            "race_config_ranked": [
+                race_config | {"from_to": {"Q": {"A": {"F": {"A": quota}}}}}
+            ]
+        }
+        resp = client.post("/competition-formats", headers=headers, json=request_body)
+        assert resp.status_code == status, quota
+
+
+@pytest.mark.integration
+async def test_create_competition_formats_bulk(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return OK and the status of every item."""
+    individual_sprint = competition_format_individual_sprint | {"id": str(uuid.uuid4())}
+    create_competition_formats = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.create_competition_formats",
+        return_value={1},
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=None,
+    )
+    request_body = [
+        competition_format_interval_start,
+        competition_format_interval_start | {"datatype": "unknown"},
+        individual_sprint | {"rounds_ranked_classes": []},
+        individual_sprint,
+    ]
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+
+    resp = client.post("/competition-formats:bulk", headers=headers, json=request_body)
+    assert resp.status_code == HTTPStatus.OK
+    body = resp.json()
+    assert [item["index"] for item in body] == [0, 1, 2, 3]
+    assert [item["status"] for item in body] == [
+        "created",
+        "invalid",
+        "invalid",
+        "duplicate",
+    ]
+    assert body[0]["id"] == competition_format_interval_start["id"]
+    assert "rounds_ranked_classes" in body[2]["detail"]
+    assert individual_sprint["name"] in body[3]["detail"]
+    written = create_competition_formats.call_args.args[0]
+    assert [str(competition_format.id) for competition_format in written] == [
+        competition_format_interval_start["id"],
+        individual_sprint["id"],
+    ]
+    assert all(competition_format.revision == 1 for competition_format in written)
+
+
+@pytest.mark.integration
+async def test_create_competition_formats_bulk_ndjson(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return OK, and report lines that are not json as invalid."""
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.create_competition_formats",
+        return_value=set(),
+    )
+    content = (
+        json.dumps(competition_format_interval_start) + "\n\n{not json\n"
+    ).encode()
+    headers = {
+        "Content-Type": "application/x-ndjson",
+        "Authorization": f"Bearer {token}",
+    }
+
+    resp = client.post("/competition-formats:bulk", headers=headers, content=content)
+    assert resp.status_code == HTTPStatus.OK
+    assert [item["status"] for item in resp.json()] == ["created", "invalid"]
+
+
 @pytest.mark.integration
 async def test_get_competition_format_interval_start_by_id(
     client: TestClient,
@@ -348,7 +467,9 @@ async def test_get_competition_format_interval_start_by_id(
     competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
     mocker.patch(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
-        return_value=competition_format_interval_start,
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_interval_start
+        ),
     )
 
     resp = client.get(f"/competition-formats/{competition_format_id}")
@@ -388,8 +509,9 @@ async def test_get_competition_format_individual_sprint_by_id(
     competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
     mocker.patch(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
-        return_value={"id": competition_format_id}
-        | competition_format_individual_sprint,
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            {"id": competition_format_id} | competition_format_individual_sprint
+        ),
     )
 
     resp = client.get(f"/competition-formats/{competition_format_id}")
@@ -438,203 +560,1408 @@ async def test_get_competition_format_individual_sprint_by_id(
 
 
 @pytest.mark.integration
-async def test_get_competition_formats_by_name(
+async def test_get_competition_format_by_id_is_cached(
     client: TestClient,
     mocker: MockFixture,
     competition_format_interval_start: dict,
 ) -> None:
-    """Should return OK, and a body containing one competition_format."""
-    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
-    competition_format_name = competition_format_interval_start["name"]
+    """Should only read the competition_format from the db once."""
+    competition_format_id = competition_format_interval_start["id"]
+    get_competition_format_by_id = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_interval_start
+        ),
+    )
+
+    first = client.get(f"/competition-formats/{competition_format_id}")
+    second = client.get(f"/competition-formats/{competition_format_id}")
+    assert first.status_code == second.status_code == HTTPStatus.OK
+    assert first.json() == second.json()
+    get_competition_format_by_id.assert_called_once()
+
+
+@pytest.mark.integration
+async def test_get_competition_format_by_id_etag(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return OK and the revision as ETag."""
+    competition_format_id = competition_format_interval_start["id"]
     mocker.patch(
-        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_formats_by_name",
-        return_value=[
-            {"id": competition_format_id} | competition_format_interval_start
-        ],
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_interval_start | {"revision": 3}
+        ),
     )
 
-    resp = client.get(f"/competition-formats?name={competition_format_name}")
+    resp = client.get(f"/competition-formats/{competition_format_id}")
     assert resp.status_code == HTTPStatus.OK
-    assert "application/json" in resp.headers["Content-Type"]
-    body = resp.json()
-    assert type(body) is list
-    assert body[0]["id"] == competition_format_id
-    assert body[0]["name"] == competition_format_interval_start["name"]
-    assert (
-        body[0]["starting_order"] == competition_format_interval_start["starting_order"]
+    assert resp.headers["ETag"] == '"3"'
+    assert resp.json()["revision"] == 3  # noqa: PLR2004
+
+
+@pytest.mark.integration
+async def test_get_competition_format_by_id_not_modified(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return 304 Not Modified without reading the document."""
+    competition_format_id = competition_format_interval_start["id"]
+    get_competition_format_revision = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=3,
     )
-    assert (
-        body[0]["start_procedure"]
-        == competition_format_interval_start["start_procedure"]
+    get_competition_format_by_id = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
     )
-    assert body[0]["intervals"] == competition_format_interval_start["intervals"]
+
+    resp = client.get(
+        f"/competition-formats/{competition_format_id}",
+        headers={"If-None-Match": '"2", "3"'},
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    assert resp.headers["ETag"] == '"3"'
+    assert not resp.content
+    get_competition_format_revision.assert_called_once()
+    get_competition_format_by_id.assert_not_called()
 
 
 @pytest.mark.integration
-async def test_get_competition_formats_by_name_individual_sprint(
+async def test_get_competition_format_by_id_not_modified_from_cache(
     client: TestClient,
     mocker: MockFixture,
-    competition_format_individual_sprint: dict,
+    competition_format_interval_start: dict,
 ) -> None:
-    """Should return OK, and a body containing one competition_format."""
-    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
-    competition_format_name = competition_format_individual_sprint["name"]
+    """Should return 304 Not Modified from the cached revision."""
+    competition_format = TypeAdapter(CompetitionFormatUnion).validate_python(
+        competition_format_interval_start | {"revision": 3}
+    )
+    CompetitionFormatsService.cache.set(competition_format.id, competition_format)
+    get_competition_format_revision = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+    )
+
+    resp = client.get(
+        f"/competition-formats/{competition_format.id}",
+        headers={"If-None-Match": 'W/"3"'},
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    resp = client.get(
+        f"/competition-formats/{competition_format.id}",
+        headers={"If-None-Match": "*"},
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    get_competition_format_revision.assert_not_called()
+
+
+@pytest.mark.integration
+async def test_get_competition_format_by_id_modified(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return OK and the document when the ETag does not match."""
+    competition_format_id = competition_format_interval_start["id"]
     mocker.patch(
-        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_formats_by_name",
-        return_value=[
-            {"id": competition_format_id} | competition_format_individual_sprint
-        ],
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=4,
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_interval_start | {"revision": 4}
+        ),
     )
 
-    resp = client.get(f"/competition-formats?name={competition_format_name}")
+    resp = client.get(
+        f"/competition-formats/{competition_format_id}",
+        headers={"If-None-Match": '"3"'},
+    )
     assert resp.status_code == HTTPStatus.OK
-    assert "application/json" in resp.headers["Content-Type"]
+    assert resp.headers["ETag"] == '"4"'
+    assert resp.json()["id"] == competition_format_id
+
+
+@pytest.mark.integration
+async def test_get_race_configs(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return the race config covering every raceclass, in one request."""
+    competition_format_id = competition_format_individual_sprint["id"]
+    get_competition_format_by_id = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_individual_sprint | {"revision": 2}
+        ),
+    )
+
+    resp = client.get(
+        f"/competition-formats/{competition_format_id}/race-config"
+        "?contestants=16&contestants=17&contestants=7&contestants=81"
+        "&ranked=true&ranked=true&ranked=false&ranked=false"
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["ETag"] == '"2"'
     body = resp.json()
-    assert type(body) is list
-    assert body[0]["id"] == competition_format_id
-    assert body[0]["name"] == competition_format_individual_sprint["name"]
+    assert [(item["contestants"], item["ranked"]) for item in body] == [
+        (16, True),
+        (17, True),
+        (7, False),
+        (81, False),
+    ]
     assert (
-        body[0]["starting_order"]
-        == competition_format_individual_sprint["starting_order"]
+        body[0]["race_config"]
+        == (competition_format_individual_sprint["race_config_ranked"][1])
     )
+    assert body[1]["race_config"]["max_no_of_contestants"] == 24  # noqa: PLR2004
     assert (
-        body[0]["start_procedure"]
-        == competition_format_individual_sprint["start_procedure"]
+        body[2]["race_config"]
+        == (competition_format_individual_sprint["race_config_non_ranked"][0])
     )
-    assert (
-        body[0]["time_between_rounds"]
-        == competition_format_individual_sprint["time_between_rounds"]
+    assert body[3]["race_config"] is None
+
+    # One value of ranked is for every raceclass:
+    resp = client.get(
+        f"/competition-formats/{competition_format_id}/race-config"
+        "?contestants=40&contestants=41&ranked=false"
     )
-    assert (
-        body[0]["time_between_heats"]
-        == competition_format_individual_sprint["time_between_heats"]
+    assert [
+        (item["ranked"], item["race_config"]["max_no_of_contestants"])
+        for item in resp.json()
+    ] == [(False, 40), (False, 48)]
+    get_competition_format_by_id.assert_called_once()
+
+
+@pytest.mark.integration
+async def test_get_race_configs_not_modified(
+    client: TestClient, mocker: MockFixture
+) -> None:
+    """Should return 304 Not Modified without reading the document."""
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=3,
     )
-    assert (
-        body[0]["max_no_of_contestants_in_raceclass"]
-        == competition_format_individual_sprint["max_no_of_contestants_in_raceclass"]
+    get_competition_format_by_id = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
     )
-    assert (
-        body[0]["max_no_of_contestants_in_race"]
-        == competition_format_individual_sprint["max_no_of_contestants_in_race"]
+
+    resp = client.get(
+        f"/competition-formats/{uuid.uuid4()}/race-config?contestants=10",
+        headers={"If-None-Match": '"3"'},
     )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    get_competition_format_by_id.assert_not_called()
 
 
 @pytest.mark.integration
-async def test_update_competition_format_interval_start(
+async def test_get_race_configs_not_found(
     client: TestClient,
     mocker: MockFixture,
-    token: MockFixture,
     competition_format_interval_start: dict,
 ) -> None:
-    """Should return No Content."""
-    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    """Should return 404 Not Found for a missing or interval start format."""
+    competition_format_id = competition_format_interval_start["id"]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=None,
+    )
     mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        side_effect=[
+            None,
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_interval_start
+            ),
+        ],
+    )
+
+    url = f"/competition-formats/{competition_format_id}/race-config?contestants=10"
+    resp = client.get(url, headers={"If-None-Match": '"1"'})
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    resp = client.get(url)
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    assert "interval_start" in resp.json()["detail"]
+
+
+@pytest.mark.integration
+async def test_get_progression_graph(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return the graph of the race config covering the contestants."""
+    competition_format_id = competition_format_individual_sprint["id"]
+    get_competition_format_by_id = mocker.patch(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
         return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
-            competition_format_interval_start
+            competition_format_individual_sprint | {"revision": 2}
         ),
     )
     mocker.patch(
-        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
-        return_value=competition_format_interval_start["id"],
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=2,
     )
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}",
-    }
-    new_name = "Oslo Skagen competition-format"
-    request_body = deepcopy(competition_format_interval_start)
-    request_body["id"] = competition_format_id
-    request_body["name"] = new_name
-
-    resp = client.put(
-        f"/competition-formats/{competition_format_id}",
-        headers=headers,
-        json=request_body,
-    )
-    assert resp.status_code == HTTPStatus.NO_CONTENT
+    url = f"/competition-formats/{competition_format_id}/race-configs"
+    resp = client.get(f"{url}/20/graph")
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["ETag"] == '"2"'
+    graph = resp.json()
+    assert graph["max_no_of_contestants"] == 24  # noqa: PLR2004
+    assert graph["rounds"] == ["Q", "S", "F"]
+    assert client.get(f"{url}/24/graph").json() == graph
+    resp = client.get(f"{url}/24/graph", headers={"If-None-Match": '"2"'})
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+
+    resp = client.get(f"{url}/7/graph?ranked=false")
+    assert resp.json()["rounds"] == ["R1", "R2"]
+    resp = client.get(f"{url}/81/graph")
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    assert "81 contestants" in resp.json()["detail"]
+    get_competition_format_by_id.assert_called_once()
 
 
 @pytest.mark.integration
-async def test_update_competition_format_individual_sprint(
+async def test_get_progression_graph_illegal_quota(
     client: TestClient,
     mocker: MockFixture,
-    token: MockFixture,
     competition_format_individual_sprint: dict,
 ) -> None:
-    """Should return No Content."""
-    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    """Should return 422 Unprocessable Entity."""
+    competition_format_id = competition_format_individual_sprint["id"]
+    race_config = competition_format_individual_sprint["race_config_non_ranked"][0]
     mocker.patch(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
         return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
             competition_format_individual_sprint
+            | {
+                "race_config_non_ranked": [
+                    race_config | {"from_to": {"R1": {"A": {"R2": {"A": "SOME"}}}}}
+                ]
+            }
         ),
     )
-    mocker.patch(
-        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
-        return_value=competition_format_individual_sprint["id"],
+
+    resp = client.get(
+        f"/competition-formats/{competition_format_id}/race-configs/7/graph?ranked=false"
     )
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}",
-    }
-    new_name = "Oslo Skagen competition-format"
-    request_body = deepcopy(competition_format_individual_sprint)
-    request_body["id"] = competition_format_id
-    request_body["name"] = new_name
 
-    resp = client.put(
-        f"/competition-formats/{competition_format_id}",
-        headers=headers,
-        json=request_body,
+@pytest.mark.integration
+async def test_get_capacity(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should make the capacity table on read, and not store it with the format."""
+    competition_format_id = competition_format_individual_sprint["id"]
+    create_competition_format = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.create_competition_format",
+        return_value=competition_format_id,
+    )
+    resp = client.post(
+        "/competition-formats",
+        headers={"Authorization": f"Bearer {token}"},
+        json=competition_format_individual_sprint,
+    )
+    assert resp.status_code == HTTPStatus.CREATED
+    (created,) = create_competition_format.call_args.args
+    assert "capacity" not in write_document(created)
+    get_competition_format_by_id = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=created,
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=1,
+    )
+
+    url = f"/competition-formats/{competition_format_id}/capacity"
+    resp = client.get(url)
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["ETag"] == '"1"'
+    capacity = resp.json()
+    assert capacity == capacity_table(created).model_dump(mode="json")
+    ranked = capacity["ranked"]
+    assert len(ranked["largest_heat"]) == 80  # noqa: PLR2004
+    # 17 contestants run the config for 24, with 3 quarterfinals of 6 or 5:
+    assert ranked["max_no_of_contestants"][16] == 24  # noqa: PLR2004
+    assert ranked["no_of_heats"][16] == {"Q": 3, "S": 2, "F": 3}
+    assert max(ranked["largest_heat"]) <= 12  # noqa: PLR2004
+    assert client.get(url).json() == capacity
+    get_competition_format_by_id.assert_called_once()
+    assert (
+        "capacity"
+        not in client.get(f"/competition-formats/{competition_format_id}").json()
+    )
+    resp = client.get(url, headers={"If-None-Match": '"1"'})
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.integration
+async def test_get_capacity_of_big_raceclass(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return 422 rather than make a table too big."""
+    mocker.patch("app.services.capacity.MAX_CAPACITY_CONTESTANTS", new=79)
+    competition_format_id = competition_format_individual_sprint["id"]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_individual_sprint
+        ),
+    )
+
+    resp = client.get(f"/competition-formats/{competition_format_id}/capacity")
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert "up to 79 contestants" in resp.json()["detail"]
+
+
+@pytest.mark.integration
+async def test_get_capacity_errors(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return 404 for a missing format, and 422 for an illegal quota."""
+    competition_format_id = competition_format_individual_sprint["id"]
+    race_config = competition_format_individual_sprint["race_config_non_ranked"][0]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=None,
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        side_effect=[
+            None,
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_individual_sprint
+                | {
+                    "race_config_non_ranked": [
+                        race_config | {"from_to": {"R1": {"A": {"R2": {"A": "SOME"}}}}}
+                    ]
+                }
+            ),
+        ],
+    )
+
+    url = f"/competition-formats/{competition_format_id}/capacity"
+    resp = client.get(url, headers={"If-None-Match": '"1"'})
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    resp = client.get(url)
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.integration
+async def test_create_competition_format_heat_too_big(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return 422 when some raceclass size gives a heat too big, if checked."""
+    create_competition_format = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.create_competition_format",
+    )
+    mocker.patch("app.services.competition_formats_service.CHECK_CAPACITY", new=True)
+
+    resp = client.post(
+        "/competition-formats",
+        headers={"Authorization": f"Bearer {token}"},
+        json=competition_format_individual_sprint,
+    )
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert "73 contestants gets a heat of 11" in resp.json()["detail"]
+    create_competition_format.assert_not_called()
+
+    resp = client.post(
+        "/competition-formats",
+        headers={"Authorization": f"Bearer {token}"},
+        json=competition_format_individual_sprint
+        | {"max_no_of_contestants_in_race": 12},
+    )
+    assert resp.status_code == HTTPStatus.CREATED
+
+
+@pytest.mark.integration
+async def test_post_timetable(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return every heat of the event with its start time."""
+    competition_format_id = competition_format_individual_sprint["id"]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_individual_sprint | {"revision": 2}
+        ),
+    )
+    timetable = {
+        "start_time": "2026-01-10T09:00:00",
+        "raceclasses": [
+            {"name": "G16", "no_of_contestants": 16},
+            {"name": "J10", "no_of_contestants": 7, "ranked": False},
+            {"name": "M17", "no_of_contestants": 17, "group": 2},
+            {"name": "J11", "no_of_contestants": 8, "ranked": False, "group": 2},
+        ],
+    }
+
+    resp = client.post(
+        f"/competition-formats/{competition_format_id}/timetable", json=timetable
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["ETag"] == '"2"'
+    heats = [
+        (
+            heat["raceclass"],
+            heat["round"],
+            heat["index"],
+            heat["heat"],
+            heat["start_time"],
+        )
+        for heat in resp.json()
+    ]
+    # Heats 2:30 apart, rounds 5:00 apart, and groups 10:00 apart:
+    assert heats[:7] == [
+        ("G16", "Q", "A", 1, "2026-01-10T09:00:00"),
+        ("G16", "Q", "A", 2, "2026-01-10T09:02:30"),
+        ("J10", "R1", "A", 1, "2026-01-10T09:05:00"),
+        ("G16", "F", "A", 1, "2026-01-10T09:10:00"),
+        ("G16", "F", "B", 1, "2026-01-10T09:12:30"),
+        ("J10", "R2", "A", 1, "2026-01-10T09:15:00"),
+        ("M17", "Q", "A", 1, "2026-01-10T09:25:00"),
+    ]
+    # J11 has no third round, so M17 runs its final alone:
+    assert [heat[:2] for heat in heats[-3:]] == [("M17", "F")] * 3
+
+    resp = client.post(
+        f"/competition-formats/{competition_format_id}/timetable",
+        json=timetable,
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert resp.headers["Content-Type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [
+        (
+            line["raceclass"],
+            line["round"],
+            line["index"],
+            line["heat"],
+            line["start_time"],
+        )
+        for line in lines
+    ] == heats
+
+
+@pytest.mark.integration
+async def test_post_timetable_errors(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return 404 for a missing format, and 422 for raceclasses too big or many."""
+    competition_format_id = competition_format_individual_sprint["id"]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        side_effect=[
+            None,
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_individual_sprint
+            ),
+        ],
+    )
+
+    url = f"/competition-formats/{competition_format_id}/timetable"
+    timetable = {
+        "start_time": "2026-01-10T09:00:00",
+        "raceclasses": [{"name": "G16", "no_of_contestants": 81}],
+    }
+    resp = client.post(url, json=timetable)
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    resp = client.post(url, json=timetable)
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert "raceclass G16" in resp.json()["detail"]
+    raceclass = {"name": "G16", "no_of_contestants": 1}
+    for raceclasses in [
+        [],
+        [raceclass | {"no_of_contestants": MAX_RACECLASS_SIZE + 1}],
+        [raceclass] * (MAX_RACECLASSES + 1),
+    ]:
+        resp = client.post(url, json=timetable | {"raceclasses": raceclasses})
+        assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.integration
+async def test_post_start_list(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return the start time of every contestant, by raceclass."""
+    competition_format_id = competition_format_interval_start["id"]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_interval_start | {"revision": 2}
+        ),
+    )
+    start_list = {
+        "start_time": "2026-01-10T10:00:00",
+        "raceclasses": [
+            {"name": "K1", "no_of_contestants": 3},
+            {"name": "K2", "no_of_contestants": 2, "group": 2},
+            {"name": "K3", "no_of_contestants": 1},
+        ],
+    }
+    # Intervals of 30 seconds, and 10 minutes from the last start of a group:
+    expected = [
+        {
+            "raceclass": "K1",
+            "group": 1,
+            "start_times": [
+                "2026-01-10T10:00:00",
+                "2026-01-10T10:00:30",
+                "2026-01-10T10:01:00",
+            ],
+        },
+        {"raceclass": "K3", "group": 1, "start_times": ["2026-01-10T10:01:30"]},
+        {
+            "raceclass": "K2",
+            "group": 2,
+            "start_times": ["2026-01-10T10:11:30", "2026-01-10T10:12:00"],
+        },
+    ]
+
+    url = f"/competition-formats/{competition_format_id}/start-list"
+    resp = client.post(url, json=start_list)
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["ETag"] == '"2"'
+    assert resp.json() == expected
+    resp = client.post(url, json=start_list, headers={"Accept": "application/x-ndjson"})
+    assert resp.headers["Content-Type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in resp.text.splitlines()] == expected
+
+
+@pytest.mark.integration
+async def test_post_start_list_not_found(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return 404 Not Found for a missing or individual sprint format."""
+    competition_format_id = competition_format_individual_sprint["id"]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        side_effect=[
+            None,
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_individual_sprint
+            ),
+        ],
+    )
+
+    url = f"/competition-formats/{competition_format_id}/start-list"
+    start_list = {
+        "start_time": "2026-01-10T10:00:00",
+        "raceclasses": [{"name": "K1", "no_of_contestants": 3}],
+    }
+    resp = client.post(url, json=start_list)
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    resp = client.post(url, json=start_list)
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    assert "individual_sprint" in resp.json()["detail"]
+
+
+@pytest.mark.integration
+async def test_post_start_list_too_big(
+    client: TestClient, competition_format_interval_start: dict
+) -> None:
+    """Should return 422 for too many raceclasses, or contestants in one."""
+    url = f"/competition-formats/{competition_format_interval_start['id']}/start-list"
+    raceclass = {"name": "K1", "no_of_contestants": 1}
+    for raceclasses in [
+        [raceclass | {"no_of_contestants": MAX_RACECLASS_SIZE + 1}],
+        [raceclass] * (MAX_RACECLASSES + 1),
+    ]:
+        resp = client.post(
+            url,
+            json={"start_time": "2026-01-10T10:00:00", "raceclasses": raceclasses},
+        )
+        assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.integration
+async def test_get_race_configs_invalid_query(
+    client: TestClient, competition_format_individual_sprint: dict
+) -> None:
+    """Should return 422 Unprocessable Entity."""
+    url = (
+        f"/competition-formats/{competition_format_individual_sprint['id']}/race-config"
+    )
+    for query in [
+        "",
+        "?contestants=0",
+        "?contestants=10&contestants=20&contestants=30&ranked=true&ranked=false",
+    ]:
+        resp = client.get(url + query)
+        assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY, query
+
+
+@pytest.mark.integration
+async def test_get_competition_formats_by_name(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return OK, and a body containing one competition_format."""
+    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    competition_format_name = competition_format_interval_start["name"]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_formats_by_name",
+        return_value=[
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                {"id": competition_format_id} | competition_format_interval_start
+            )
+        ],
+    )
+
+    resp = client.get(f"/competition-formats?name={competition_format_name}")
+    assert resp.status_code == HTTPStatus.OK
+    assert "application/json" in resp.headers["Content-Type"]
+    body = resp.json()
+    assert type(body) is list
+    assert body[0]["id"] == competition_format_id
+    assert body[0]["name"] == competition_format_interval_start["name"]
+    assert (
+        body[0]["starting_order"] == competition_format_interval_start["starting_order"]
+    )
+    assert (
+        body[0]["start_procedure"]
+        == competition_format_interval_start["start_procedure"]
+    )
+    assert body[0]["intervals"] == competition_format_interval_start["intervals"]
+
+
+@pytest.mark.integration
+async def test_get_competition_formats_by_name_individual_sprint(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return OK, and a body containing one competition_format."""
+    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    competition_format_name = competition_format_individual_sprint["name"]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_formats_by_name",
+        return_value=[
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                {"id": competition_format_id} | competition_format_individual_sprint
+            )
+        ],
+    )
+
+    resp = client.get(f"/competition-formats?name={competition_format_name}")
+    assert resp.status_code == HTTPStatus.OK
+    assert "application/json" in resp.headers["Content-Type"]
+    body = resp.json()
+    assert type(body) is list
+    assert body[0]["id"] == competition_format_id
+    assert body[0]["name"] == competition_format_individual_sprint["name"]
+    assert (
+        body[0]["starting_order"]
+        == competition_format_individual_sprint["starting_order"]
+    )
+    assert (
+        body[0]["start_procedure"]
+        == competition_format_individual_sprint["start_procedure"]
+    )
+    assert (
+        body[0]["time_between_rounds"]
+        == competition_format_individual_sprint["time_between_rounds"]
+    )
+    assert (
+        body[0]["time_between_heats"]
+        == competition_format_individual_sprint["time_between_heats"]
+    )
+    assert (
+        body[0]["max_no_of_contestants_in_raceclass"]
+        == competition_format_individual_sprint["max_no_of_contestants_in_raceclass"]
+    )
+    assert (
+        body[0]["max_no_of_contestants_in_race"]
+        == competition_format_individual_sprint["max_no_of_contestants_in_race"]
+    )
+
+
+@pytest.mark.integration
+async def test_get_competition_formats_by_name_prefix_with_limit(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return OK, and pass mode and limit on to the adapter."""
+    get_competition_formats_by_name = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_formats_by_name",
+        return_value=[
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_interval_start
+            )
+        ],
+    )
+
+    resp = client.get("/competition-formats?name=Interval&mode=prefix&limit=5")
+    assert resp.status_code == HTTPStatus.OK
+    body = resp.json()
+    assert len(body) == 1
+    assert body[0]["name"] == competition_format_interval_start["name"]
+    get_competition_formats_by_name.assert_called_once_with(
+        "Interval", mode=NameSearchMode.Prefix, limit=5
+    )
+
+
+@pytest.mark.integration
+async def test_update_competition_format_interval_start(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return No Content."""
+    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_interval_start
+        ),
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
+        return_value=competition_format_interval_start["id"],
+    )
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+    new_name = "Oslo Skagen competition-format"
+    request_body = deepcopy(competition_format_interval_start)
+    request_body["id"] = competition_format_id
+    request_body["name"] = new_name
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers,
+        json=request_body,
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+
+
+@pytest.mark.integration
+async def test_update_competition_format_individual_sprint(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return No Content."""
+    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_individual_sprint
+        ),
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
+        return_value=competition_format_individual_sprint["id"],
+    )
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+    new_name = "Oslo Skagen competition-format"
+    request_body = deepcopy(competition_format_individual_sprint)
+    request_body["id"] = competition_format_id
+    request_body["name"] = new_name
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers,
+        json=request_body,
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+
+
+@pytest.mark.integration
+async def test_update_competition_format_invalidates_cache(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should serve the updated competition_format after an update."""
+    competition_format_id = competition_format_interval_start["id"]
+    updated_competition_format = deepcopy(competition_format_interval_start)
+    updated_competition_format["name"] = "Oslo Skagen competition-format"
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        side_effect=[
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_interval_start
+            ),
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                updated_competition_format
+            ),
+        ],
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
+        return_value=competition_format_id,
+    )
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.json()["name"] == competition_format_interval_start["name"]
+    resp = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers,
+        json=updated_competition_format,
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.json()["name"] == updated_competition_format["name"]
+
+
+@pytest.mark.integration
+async def test_update_competition_format_if_match(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return No Content and the new revision, in one conditional write."""
+    competition_format_id = competition_format_interval_start["id"]
+    get_competition_format_by_id = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+    )
+    update_competition_format = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
+        return_value=4,
+    )
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+        "If-Match": '"3"',
+    }
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers,
+        json=competition_format_interval_start,
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+    assert resp.headers["ETag"] == '"4"'
+    assert update_competition_format.call_args.kwargs["expected_revision"] == 3  # noqa: PLR2004
+    get_competition_format_by_id.assert_not_called()
+
+
+@pytest.mark.integration
+async def test_update_competition_format_revision_in_body(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should make the update conditional on the revision in the body."""
+    competition_format_id = competition_format_interval_start["id"]
+    update_competition_format = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
+        return_value=3,
+    )
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers,
+        json=competition_format_interval_start | {"revision": 2},
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+    assert update_competition_format.call_args.kwargs["expected_revision"] == 2  # noqa: PLR2004
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers | {"If-Match": "*"},
+        json=competition_format_interval_start | {"revision": 2},
     )
     assert resp.status_code == HTTPStatus.NO_CONTENT
+    assert update_competition_format.call_args.kwargs["expected_revision"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.integration
+async def test_get_all_competition_formats(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return OK and a valid json body."""
+    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_all_competition_formats",
+        return_value=[
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_interval_start
+            ),
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_individual_sprint
+            ),
+        ],
+    )
+
+    resp = client.get("/competition-formats")
+    assert resp.status_code == HTTPStatus.OK
+    assert "application/json" in resp.headers["Content-Type"]
+    body = resp.json()
+    assert type(body) is list
+    assert len(body) > 0
+    assert body[0]["id"] == competition_format_id
+
+
+@pytest.mark.integration
+async def test_get_all_competition_formats_first_page(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return OK and a Next-Cursor header pointing after the last item."""
+    individual_sprint = deepcopy(competition_format_individual_sprint)
+    individual_sprint["id"] = str(uuid.uuid4())
+    get_all_competition_formats = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_all_competition_formats",
+        return_value=[
+            TypeAdapter(CompetitionFormatUnion).validate_python(individual_sprint),
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_interval_start
+            ),
+        ],
+    )
+
+    resp = client.get("/competition-formats?limit=2")
+    assert resp.status_code == HTTPStatus.OK
+    assert len(resp.json()) == 2  # noqa: PLR2004
+    get_all_competition_formats.assert_called_once_with(limit=2, after=None)
+    assert decode_cursor(resp.headers["Next-Cursor"]) == (
+        "interval start",
+        uuid.UUID(competition_format_interval_start["id"]),
+    )
+
+
+@pytest.mark.integration
+async def test_get_all_competition_formats_last_page(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return OK, pass the decoded cursor on and no Next-Cursor header."""
+    competition_format_id = uuid.uuid4()
+    get_all_competition_formats = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_all_competition_formats",
+        return_value=[
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_interval_start
+            ),
+        ],
+    )
+    after = encode_cursor("individual sprint", competition_format_id)
+
+    resp = client.get(f"/competition-formats?limit=2&after={after}")
+    assert resp.status_code == HTTPStatus.OK
+    assert len(resp.json()) == 1
+    assert "Next-Cursor" not in resp.headers
+    get_all_competition_formats.assert_called_once_with(
+        limit=2, after=("individual sprint", competition_format_id)
+    )
+
+
+@pytest.mark.integration
+async def test_get_all_competition_formats_etag(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return 304 Not Modified while the ids and revisions are unchanged."""
+    competition_format = TypeAdapter(CompetitionFormatUnion).validate_python(
+        competition_format_interval_start | {"revision": 2}
+    )
+    get_all_competition_formats = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_all_competition_formats",
+        return_value=[competition_format],
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revisions",
+        side_effect=[[(competition_format.id, 2)], [(competition_format.id, 3)]],
+    )
+
+    resp = client.get("/competition-formats")
+    assert resp.status_code == HTTPStatus.OK
+    etag = resp.headers["ETag"]
+
+    resp = client.get("/competition-formats", headers={"If-None-Match": etag})
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    assert resp.headers["ETag"] == etag
+    get_all_competition_formats.assert_called_once()
+
+    resp = client.get("/competition-formats", headers={"If-None-Match": etag})
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["ETag"] == etag
+
+
+@pytest.mark.integration
+async def test_get_all_competition_formats_limit_above_max_page_size(
+    client: TestClient,
+    mocker: MockFixture,
+) -> None:
+    """Should cap the page size at the server maximum."""
+    get_all_competition_formats = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_all_competition_formats",
+        return_value=[],
+    )
+
+    resp = client.get("/competition-formats?limit=100000")
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json() == []
+    get_all_competition_formats.assert_called_once_with(limit=MAX_PAGE_SIZE, after=None)
+
+
+@pytest.mark.integration
+async def test_get_all_competition_formats_ndjson(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return OK and stream one competition_format per line."""
+    individual_sprint = deepcopy(competition_format_individual_sprint)
+    individual_sprint["id"] = str(uuid.uuid4())
+
+    async def competition_formats() -> AsyncIterator[Any]:
+        for competition_format in (
+            competition_format_interval_start,
+            individual_sprint,
+        ):
+            yield TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format
+            )
+
+    stream_competition_formats = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.stream_competition_formats",
+        return_value=competition_formats(),
+    )
+
+    resp = client.get(
+        "/competition-formats?batch_size=50",
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert "application/x-ndjson" in resp.headers["Content-Type"]
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["id"] for line in lines] == [
+        competition_format_interval_start["id"],
+        individual_sprint["id"],
+    ]
+    assert lines[1] == TypeAdapter(CompetitionFormatUnion).dump_python(
+        TypeAdapter(CompetitionFormatUnion).validate_python(individual_sprint),
+        mode="json",
+    )
+    stream_competition_formats.assert_called_once_with(batch_size=50)
+
+
+def summarize(competition_format: dict) -> CompetitionFormatSummary:
+    """Return the summary of a competition_format, as read from the db."""
+    return CompetitionFormatSummary.model_validate(
+        {
+            field: competition_format[field]
+            for field in CompetitionFormatSummary.model_fields
+            if field in competition_format
+        }
+    )
+
+
+@pytest.mark.integration
+async def test_get_all_competition_formats_summary(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return OK and a page of summaries, without race configs."""
+    get_all_competition_formats = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_all_competition_formats",
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_all_competition_format_summaries",
+        return_value=[
+            summarize(competition_format_individual_sprint),
+            summarize(competition_format_interval_start | {"id": str(uuid.uuid4())}),
+        ],
+    )
+
+    resp = client.get("/competition-formats?view=summary&limit=2")
+    assert resp.status_code == HTTPStatus.OK
+    body = resp.json()
+    assert body[0] == {
+        "id": competition_format_individual_sprint["id"],
+        "revision": 0,
+        "name": competition_format_individual_sprint["name"],
+        "datatype": "individual_sprint",
+        "max_no_of_contestants_in_raceclass": competition_format_individual_sprint[
+            "max_no_of_contestants_in_raceclass"
+        ],
+        "max_no_of_contestants_in_race": competition_format_individual_sprint[
+            "max_no_of_contestants_in_race"
+        ],
+    }
+    assert body[1]["datatype"] == "interval_start"
+    assert "Next-Cursor" in resp.headers
+    get_all_competition_formats.assert_not_called()
+
+    # The summary has its own ETag, not matching the full page:
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revisions",
+        return_value=[
+            (uuid.UUID(item["id"]), item["revision"]) for item in resp.json()
+        ],
+    )
+    full = client.get(
+        "/competition-formats?limit=2", headers={"If-None-Match": resp.headers["ETag"]}
+    )
+    assert full.status_code == HTTPStatus.OK
+    summary = client.get(
+        "/competition-formats?view=summary&limit=2",
+        headers={"If-None-Match": resp.headers["ETag"]},
+    )
+    assert summary.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.integration
+async def test_get_competition_formats_by_name_summary(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return OK and the summaries of the matching formats."""
+    get_competition_format_summaries_by_name = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_summaries_by_name",
+        return_value=[summarize(competition_format_interval_start)],
+    )
+
+    resp = client.get("/competition-formats?name=interval&view=summary")
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json() == [
+        summarize(competition_format_interval_start).model_dump(mode="json")
+    ]
+    get_competition_format_summaries_by_name.assert_called_once_with(
+        "interval", mode=NameSearchMode.Substring, limit=MAX_PAGE_SIZE
+    )
+
+
+@pytest.mark.integration
+async def test_get_all_competition_formats_ndjson_summary(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should stream the summaries of all competition_formats."""
+
+    async def summaries() -> AsyncIterator[CompetitionFormatSummary]:
+        yield summarize(competition_format_interval_start)
+
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.stream_competition_format_summaries",
+        return_value=summaries(),
+    )
+
+    resp = client.get(
+        "/competition-formats?view=summary",
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert resp.status_code == HTTPStatus.OK
+    line = json.loads(resp.text)
+    assert line["id"] == competition_format_interval_start["id"]
+    assert "intervals" not in line
+
+
+@pytest.mark.integration
+async def test_get_competition_format_by_id_summary(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return OK and the summary, without reading the whole format."""
+    competition_format_id = competition_format_individual_sprint["id"]
+    get_competition_format_by_id = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_summary_by_id",
+        return_value=summarize(competition_format_individual_sprint | {"revision": 2}),
+    )
+
+    resp = client.get(f"/competition-formats/{competition_format_id}?view=summary")
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["ETag"] == '"2-summary"'
+    body = resp.json()
+    assert body["datatype"] == "individual_sprint"
+    assert "race_config_ranked" not in body
+    get_competition_format_by_id.assert_not_called()
+
+
+@pytest.mark.integration
+async def test_get_competition_format_by_id_summary_from_cache(
+    client: TestClient,
+    mocker: MockFixture,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should summarize a cached competition_format without reading the db."""
+    competition_format = TypeAdapter(CompetitionFormatUnion).validate_python(
+        competition_format_individual_sprint | {"revision": 2}
+    )
+    CompetitionFormatsService.cache.set(competition_format.id, competition_format)
+    get_competition_format_summary_by_id = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_summary_by_id",
+    )
+
+    resp = client.get(f"/competition-formats/{competition_format.id}?view=summary")
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json() == summarize(
+        competition_format_individual_sprint | {"revision": 2}
+    ).model_dump(mode="json")
+    get_competition_format_summary_by_id.assert_not_called()
+
+    not_modified = client.get(
+        f"/competition-formats/{competition_format.id}?view=summary",
+        headers={"If-None-Match": '"2"'},
+    )
+    assert not_modified.status_code == HTTPStatus.OK
+    not_modified = client.get(
+        f"/competition-formats/{competition_format.id}?view=summary",
+        headers={"If-None-Match": '"2-summary"'},
+    )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.integration
+async def test_get_competition_format_by_id_encoded_once_per_revision(
+    client: TestClient,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should return the json encoded for a revision until the revision changes."""
+    competition_format = TypeAdapter(CompetitionFormatUnion).validate_python(
+        competition_format_individual_sprint | {"revision": 2}
+    )
+    CompetitionFormatsService.cache.set(competition_format.id, competition_format)
+    stats = CompetitionFormatsService.encoded.stats
+    hits, misses = stats.hits, stats.misses
+
+    for view in ["full", "summary"]:
+        first = client.get(f"/competition-formats/{competition_format.id}?view={view}")
+        second = client.get(f"/competition-formats/{competition_format.id}?view={view}")
+        assert first.status_code == second.status_code == HTTPStatus.OK
+        assert first.content == second.content
+        assert first.headers["Content-Type"] == "application/json"
+    assert (stats.hits - hits, stats.misses - misses) == (2, 2)
+
+    CompetitionFormatsService.cache.set(
+        competition_format.id,
+        competition_format.model_copy(update={"name": "Sprint", "revision": 3}),
+    )
+    for view in ["full", "summary"]:
+        resp = client.get(f"/competition-formats/{competition_format.id}?view={view}")
+        assert resp.headers["ETag"].startswith('"3')
+        assert resp.json()["name"] == "Sprint"
+
+    CompetitionFormatsService.invalidate(competition_format.id)
+    assert len(CompetitionFormatsService.encoded) == 0
+
+
+@pytest.mark.integration
+async def test_get_competition_format_by_id_summary_not_found(
+    client: TestClient,
+    mocker: MockFixture,
+) -> None:
+    """Should return 404 Not Found for the summary of an unknown format."""
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_summary_by_id",
+        return_value=None,
+    )
+
+    resp = client.get(f"/competition-formats/{uuid.uuid4()}?view=summary")
+    assert resp.status_code == HTTPStatus.NOT_FOUND
 
 
 @pytest.mark.integration
-async def test_get_all_competition_formats(
+async def test_delete_competition_format_by_id(
     client: TestClient,
     mocker: MockFixture,
+    token: MockFixture,
     competition_format_interval_start: dict,
-    competition_format_individual_sprint: dict,
 ) -> None:
-    """Should return OK and a valid json body."""
+    """Should return No Content."""
     competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
     mocker.patch(
-        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_all_competition_formats",
-        return_value=[
-            TypeAdapter(CompetitionFormatUnion).validate_python(
-                competition_format_interval_start
-            ),
-            TypeAdapter(CompetitionFormatUnion).validate_python(
-                competition_format_individual_sprint
-            ),
-        ],
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value={"id": competition_format_id} | competition_format_interval_start,
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.delete_competition_format",
+        return_value=competition_format_id,
     )
+    headers = {
+        "Authorization": f"Bearer {token}",
+    }
 
-    resp = client.get("/competition-formats")
-    assert resp.status_code == HTTPStatus.OK
-    assert "application/json" in resp.headers["Content-Type"]
-    body = resp.json()
-    assert type(body) is list
-    assert len(body) > 0
-    assert body[0]["id"] == competition_format_id
+    resp = client.delete(
+        f"/competition-formats/{competition_format_id}", headers=headers
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
 
 
 @pytest.mark.integration
-async def test_delete_competition_format_by_id(
+async def test_delete_competition_format_invalidates_cache(
     client: TestClient,
     mocker: MockFixture,
     token: MockFixture,
     competition_format_interval_start: dict,
 ) -> None:
-    """Should return No Content."""
-    competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    """Should return 404 Not found after the competition_format is deleted."""
+    competition_format_id = competition_format_interval_start["id"]
     mocker.patch(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
-        return_value={"id": competition_format_id} | competition_format_interval_start,
+        side_effect=[
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                competition_format_interval_start
+            )
+        ]
+        * 2
+        + [None],
     )
     mocker.patch(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.delete_competition_format",
@@ -644,10 +1971,45 @@ async def test_delete_competition_format_by_id(
         "Authorization": f"Bearer {token}",
     }
 
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.status_code == HTTPStatus.OK
     resp = client.delete(
         f"/competition-formats/{competition_format_id}", headers=headers
     )
     assert resp.status_code == HTTPStatus.NO_CONTENT
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.integration
+async def test_watch_changes_invalidates_cache(
+    mocker: MockFixture,
+    competition_format_interval_start: dict,
+    competition_format_individual_sprint: dict,
+) -> None:
+    """Should drop changed formats from the cache, and all on unknown changes."""
+    interval_start = TypeAdapter(CompetitionFormatUnion).validate_python(
+        competition_format_interval_start
+    )
+    individual_sprint = TypeAdapter(CompetitionFormatUnion).validate_python(
+        competition_format_individual_sprint | {"id": str(uuid.uuid4())}
+    )
+    CompetitionFormatsService.cache.set(interval_start.id, interval_start)
+    CompetitionFormatsService.cache.set(individual_sprint.id, individual_sprint)
+
+    async def changes(poll_interval: float) -> AsyncIterator[uuid.UUID | None]:
+        yield interval_start.id
+        assert CompetitionFormatsService.cache.get(interval_start.id) is None
+        assert CompetitionFormatsService.cache.get(individual_sprint.id)
+        yield None
+
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.watch_competition_format_changes",
+        side_effect=changes,
+    )
+
+    await CompetitionFormatsService.watch_changes(poll_interval=1)
+    assert len(CompetitionFormatsService.cache) == 0
 
 
 # Bad cases
@@ -690,15 +2052,15 @@ async def test_create_competition_format_interval_start_already_exist(
     token: MockFixture,
     competition_format_interval_start: dict,
 ) -> None:
-    """Should return 400 Bad request entity."""
+    """Should return 400 Bad request, telling whether the id or the name is taken."""
     competition_format_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
-    mocker.patch(
-        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_formats_by_name",
-        return_value=[{id: competition_format_id} | competition_format_interval_start],
-    )
     mocker.patch(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.create_competition_format",
-        return_value=competition_format_id,
+        side_effect=DuplicateKeyError(f"Duplicate key: {competition_format_id}"),
+    )
+    get_competition_format_revision = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=1,
     )
 
     request_body = competition_format_interval_start
@@ -710,6 +2072,92 @@ async def test_create_competition_format_interval_start_already_exist(
 
     resp = client.post("/competition-formats", headers=headers, json=request_body)
     assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.json()["detail"] == (
+        f"Competition-format with id {competition_format_id} already exist."
+    )
+
+    get_competition_format_revision.return_value = None
+    resp = client.post("/competition-formats", headers=headers, json=request_body)
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.json()["detail"] == (
+        "Competition-format with name Interval Start already exist."
+    )
+
+
+@pytest.mark.integration
+async def test_update_competition_format_name_already_exist(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return 400 Bad request."""
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            competition_format_interval_start
+        ),
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
+        side_effect=DuplicateKeyError("Duplicate key: name_key"),
+    )
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_interval_start['id']}",
+        headers=headers,
+        json=competition_format_interval_start,
+    )
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("content", [b"{not json", b'{"name": "Not an array"}'])
+async def test_create_competition_formats_bulk_not_an_array(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    content: bytes,
+) -> None:
+    """Should return 422 Unprocessable Entity."""
+    create_competition_formats = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.create_competition_formats",
+    )
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+
+    resp = client.post("/competition-formats:bulk", headers=headers, content=content)
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    create_competition_formats.assert_not_called()
+
+
+@pytest.mark.integration
+async def test_create_competition_formats_bulk_too_many(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return 413 Request Entity Too Large."""
+    mocker.patch("app.routers.competition_formats.MAX_BULK_SIZE", 1)
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+
+    resp = client.post(
+        "/competition-formats:bulk",
+        headers=headers,
+        json=[competition_format_interval_start] * 2,
+    )
+    assert resp.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
 
 
 # Mandatory properties missing at create and update:
@@ -725,7 +2173,9 @@ async def test_create_competition_format_missing_mandatory_property(
     mocker.patch(
         "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_formats_by_name",
         return_value=[
-            {"id": competition_format_id} | competition_format_interval_start
+            TypeAdapter(CompetitionFormatUnion).validate_python(
+                {"id": competition_format_id} | competition_format_interval_start
+            )
         ],
     )
     mocker.patch(
@@ -1250,6 +2700,17 @@ async def test_create_competition_format_no_authorization(
     assert resp.status_code == HTTPStatus.UNAUTHORIZED
 
 
+@pytest.mark.integration
+async def test_create_competition_formats_bulk_no_authorization(
+    client: TestClient, competition_format_interval_start: dict
+) -> None:
+    """Should return 401 Unauthorized."""
+    resp = client.post(
+        "/competition-formats:bulk", json=[competition_format_interval_start]
+    )
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+
+
 @pytest.mark.integration
 async def test_update_competition_format_by_id_no_authorization(
     client: TestClient,
@@ -1350,6 +2811,29 @@ async def test_get_competition_format_not_found(
     assert resp.status_code == HTTPStatus.NOT_FOUND
 
 
+@pytest.mark.integration
+async def test_get_competition_format_not_found_if_none_match_any(
+    client: TestClient,
+    mocker: MockFixture,
+) -> None:
+    """Should return 404 Not found."""
+    competition_format_id = uuid.uuid4().hex
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=None,
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=None,
+    )
+
+    resp = client.get(
+        f"/competition-formats/{competition_format_id}",
+        headers={"If-None-Match": "*"},
+    )
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.integration
 async def test_get_competition_formats_by_name_not_found(
     client: TestClient, mocker: MockFixture
@@ -1368,6 +2852,34 @@ async def test_get_competition_formats_by_name_not_found(
     assert len(body) == 0
 
 
+@pytest.mark.integration
+async def test_get_competition_formats_by_name_invalid_mode(
+    client: TestClient, mocker: MockFixture
+) -> None:
+    """Should return 422 Unprocessable Entity."""
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_formats_by_name",
+        return_value=[],
+    )
+
+    resp = client.get("/competition-formats?name=Sprint&mode=regex")
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.integration
+async def test_get_all_competition_formats_invalid_cursor(
+    client: TestClient, mocker: MockFixture
+) -> None:
+    """Should return 400 Bad request."""
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_all_competition_formats",
+        return_value=[],
+    )
+
+    resp = client.get("/competition-formats?after=not-a-cursor")
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+
 @pytest.mark.integration
 async def test_update_competition_format_not_found(
     client: TestClient,
@@ -1400,6 +2912,93 @@ async def test_update_competition_format_not_found(
     assert resp.status_code == HTTPStatus.NOT_FOUND
 
 
+@pytest.mark.integration
+async def test_update_competition_format_revision_conflict(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return 412 Precondition Failed."""
+    competition_format_id = competition_format_interval_start["id"]
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
+        return_value=None,
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=5,
+    )
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+        "If-Match": '"3"',
+    }
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers,
+        json=competition_format_interval_start,
+    )
+    assert resp.status_code == HTTPStatus.PRECONDITION_FAILED
+
+
+@pytest.mark.integration
+async def test_update_competition_format_if_match_weak_etag(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return 412 Precondition Failed without writing."""
+    update_competition_format = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
+    )
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+        "If-Match": 'W/"3"',
+    }
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_interval_start['id']}",
+        headers=headers,
+        json=competition_format_interval_start,
+    )
+    assert resp.status_code == HTTPStatus.PRECONDITION_FAILED
+    update_competition_format.assert_not_called()
+
+
+@pytest.mark.integration
+async def test_update_competition_format_if_match_not_found(
+    client: TestClient,
+    mocker: MockFixture,
+    token: MockFixture,
+    competition_format_interval_start: dict,
+) -> None:
+    """Should return 404 Not found."""
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.update_competition_format",
+        return_value=None,
+    )
+    mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_revision",
+        return_value=None,
+    )
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+        "If-Match": '"3"',
+    }
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_interval_start['id']}",
+        headers=headers,
+        json=competition_format_interval_start,
+    )
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.integration
 async def test_delete_competition_format_not_found(
     client: TestClient, mocker: MockFixture, token: MockFixture
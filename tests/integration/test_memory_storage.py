@@ -0,0 +1,357 @@
+"""Integration test cases for the competition_formats routes on the in-memory storage."""
+
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Any
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from pytest_mock import MockFixture
+
+from app import api
+from app.adapters import (
+    CompetitionFormatsAdapter,
+    InMemoryCompetitionFormatsStorage,
+    LivenessAdapter,
+    NameSearchMode,
+)
+from app.models import CompetitionFormatUnion, CompetitionFormatView
+from app.services import CompetitionFormatsService
+from tests.helpers import create, load
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """Fixture to create a test client for the FastAPI application."""
+    return TestClient(api)
+
+
+@pytest.fixture
+async def storage() -> InMemoryCompetitionFormatsStorage:
+    """Initialize the adapters with an empty in-memory storage."""
+    storage = InMemoryCompetitionFormatsStorage()
+    await LivenessAdapter.init(storage)
+    await CompetitionFormatsAdapter.init(storage)
+    CompetitionFormatsService.invalidate(None)
+    return storage
+
+
+@pytest.mark.integration
+async def test_create_get_update_delete(
+    client: TestClient, storage: InMemoryCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should keep a competition_format through its whole life."""
+    interval_start = load("competition_format_interval_start")
+    competition_format_id = create(client, headers, interval_start)
+
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.status_code == HTTPStatus.OK
+    body = resp.json()
+    assert body["name"] == "Interval Start"
+    assert resp.headers["ETag"] == '"1"'
+
+    body["intervals"] = "00:00:15"
+    conflict = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers | {"If-Match": '"2"'},
+        json=body,
+    )
+    assert conflict.status_code == HTTPStatus.PRECONDITION_FAILED
+    updated = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers | {"If-Match": '"1"'},
+        json=body,
+    )
+    assert updated.status_code == HTTPStatus.NO_CONTENT
+    assert updated.headers["ETag"] == '"2"'
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.json()["intervals"] == "00:00:15"
+    assert resp.json()["revision"] == 2  # noqa: PLR2004
+
+    resp = client.delete(
+        f"/competition-formats/{competition_format_id}", headers=headers
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    assert await storage.delete_competition_format(competition_format_id) == 0
+    assert (
+        await storage.get_competition_format_summary_by_id(competition_format_id)
+        is None
+    )
+    assert await storage.get_competition_format_revision(competition_format_id) is None
+
+
+@pytest.mark.integration
+async def test_names_are_unique(
+    client: TestClient, storage: InMemoryCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should not create or rename a format to the normalized name of another."""
+    _ = storage
+    create(client, headers, load("competition_format_interval_start"))
+    sprint_id = create(client, headers, load("competition_format_individual_sprint"))
+
+    resp = client.post(
+        "/competition-formats",
+        headers=headers,
+        json=load("competition_format_interval_start") | {"name": " interval  START"},
+    )
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+    sprint = client.get(f"/competition-formats/{sprint_id}").json()
+    resp = client.put(
+        f"/competition-formats/{sprint_id}",
+        headers=headers,
+        json=sprint | {"name": "Interval Start"},
+    )
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+    # Renaming to another casing of its own name is fine:
+    resp = client.put(
+        f"/competition-formats/{sprint_id}",
+        headers=headers,
+        json=sprint | {"name": "INDIVIDUAL SPRINT"},
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+
+
+@pytest.mark.integration
+async def test_pages_and_summaries(
+    client: TestClient, storage: InMemoryCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should page through the formats in name order, in full and as summaries."""
+    _ = storage
+    interval_start = load("competition_format_interval_start")
+    for name in ["Charlie", "alpha", "Bravo"]:
+        create(client, headers, interval_start | {"name": name})
+
+    first = client.get("/competition-formats?limit=2")
+    assert [item["name"] for item in first.json()] == ["alpha", "Bravo"]
+    second = client.get(
+        f"/competition-formats?limit=2&after={first.headers['Next-Cursor']}"
+    )
+    assert [item["name"] for item in second.json()] == ["Charlie"]
+    assert "Next-Cursor" not in second.headers
+
+    summaries = client.get("/competition-formats?limit=2&view=summary")
+    assert [item["name"] for item in summaries.json()] == ["alpha", "Bravo"]
+    assert "intervals" not in summaries.json()[0]
+    resp = client.get(
+        "/competition-formats?limit=2&view=summary",
+        headers={"If-None-Match": summaries.headers["ETag"]},
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+
+    competition_format_id = first.json()[0]["id"]
+    resp = client.get(f"/competition-formats/{competition_format_id}?view=summary")
+    assert resp.json()["name"] == "alpha"
+
+
+@pytest.mark.integration
+async def test_search_by_name(
+    client: TestClient, storage: InMemoryCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should find formats by prefix and by substring of the normalized name."""
+    interval_start = load("competition_format_interval_start")
+    for name in ["Interval Start", "Interval Start 15s", "Mass Start", "Sprint"]:
+        create(client, headers, interval_start | {"name": name})
+
+    def names(resp: Any) -> list[str]:
+        assert resp.status_code == HTTPStatus.OK
+        return [item["name"] for item in resp.json()]
+
+    assert names(client.get("/competition-formats?name=INTERVAL&mode=prefix")) == [
+        "Interval Start",
+        "Interval Start 15s",
+    ]
+    assert names(client.get("/competition-formats?name=start")) == [
+        "Interval Start",
+        "Interval Start 15s",
+        "Mass Start",
+    ]
+    assert names(client.get("/competition-formats?name=rt&view=summary")) == [
+        "Interval Start",
+        "Interval Start 15s",
+        "Mass Start",
+    ]
+    assert names(client.get("/competition-formats?name=xyz")) == []
+    assert names(client.get("/competition-formats?name=tar&limit=1")) == [
+        "Interval Start"
+    ]
+    found = await storage.get_competition_formats_by_name(
+        "s", mode=NameSearchMode.Substring
+    )
+    assert len(found) == 4  # noqa: PLR2004
+
+
+@pytest.mark.integration
+async def test_stream_bulk_and_import(
+    client: TestClient, storage: InMemoryCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should create in bulk, stream, and import over existing formats."""
+    interval_start = load("competition_format_interval_start")
+    resp = client.post(
+        "/competition-formats:bulk",
+        headers=headers,
+        json=[
+            interval_start | {"id": "290e70d5-0933-4af0-bb53-1d705ba7eb95"},
+            load("competition_format_individual_sprint"),
+            interval_start | {"name": "interval start"},
+            interval_start
+            | {"id": "290e70d5-0933-4af0-bb53-1d705ba7eb95", "name": "Other"},
+        ],
+    )
+    assert [item["status"] for item in resp.json()] == [
+        "created",
+        "created",
+        "duplicate",
+        "duplicate",
+    ]
+    assert [item.get("detail") for item in resp.json()[2:]] == [
+        "Competition-format with name interval start already exist.",
+        "Competition-format with id 290e70d5-0933-4af0-bb53-1d705ba7eb95 already exist.",
+    ]
+
+    resp = client.get(
+        "/competition-formats?batch_size=1&view=summary",
+        headers={"Accept": "application/x-ndjson"},
+    )
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["name"] for line in lines] == ["Individual Sprint", "Interval Start"]
+
+    export = client.get("/competition-formats:export", headers=headers).content
+    renamed = json.loads(export.splitlines()[1]) | {"name": "Individual Sprint"}
+    resp = client.post(
+        "/competition-formats:import",
+        headers=headers,
+        content=export
+        + json.dumps(renamed).encode()
+        + b"\n"
+        + json.dumps(interval_start | {"name": "New"}).encode(),
+    )
+    result = resp.json()
+    assert (result["created"], result["replaced"], result["invalid"]) == (1, 2, 1)
+    assert "duplicate key" in result["errors"][0]
+
+    # Imported formats get the next revision, whatever revision they carry,
+    # and their race configs sorted:
+    individual_sprint = json.loads(export.splitlines()[0])
+    individual_sprint["race_config_ranked"].reverse()
+    resp = client.post(
+        "/competition-formats:import",
+        headers=headers,
+        content=json.dumps(individual_sprint | {"revision": 1}).encode(),
+    )
+    assert resp.json()["replaced"] == 1
+    resp = client.get(f"/competition-formats/{individual_sprint['id']}")
+    assert resp.headers["ETag"] == '"3"'
+    assert [
+        race_config["max_no_of_contestants"]
+        for race_config in resp.json()["race_config_ranked"]
+    ] == [7, 16, 24, 32, 40, 48, 56, 80]
+    created = await storage.get_competition_formats_by_name("New")
+    assert [competition_format.revision for competition_format in created] == [1]
+
+
+@pytest.mark.integration
+async def test_json_reads_are_not_served(
+    storage: InMemoryCompetitionFormatsStorage,
+) -> None:
+    """Should leave the json of formats to be encoded by the service."""
+    assert not storage.serves_json()
+    with pytest.raises(NotImplementedError):
+        await storage.get_competition_format_json_by_id(
+            UUID(int=0), CompetitionFormatView.Full
+        )
+    with pytest.raises(NotImplementedError):
+        await storage.get_all_competition_format_json(10, CompetitionFormatView.Full)
+    with pytest.raises(NotImplementedError):
+        storage.stream_competition_format_json(10, CompetitionFormatView.Full)
+
+
+@pytest.mark.integration
+async def test_watch_competition_format_changes(
+    storage: InMemoryCompetitionFormatsStorage,
+) -> None:
+    """Should yield the id of every changed competition_format, while watched."""
+    interval_start = load("competition_format_interval_start")
+    changes = CompetitionFormatsAdapter.watch_competition_format_changes(
+        poll_interval=1
+    )
+    watching = asyncio.ensure_future(anext(changes))
+    await asyncio.sleep(0)
+
+    await CompetitionFormatsService.create_competition_format(
+        TypeAdapter(CompetitionFormatUnion).validate_python(interval_start)
+    )
+    competition_format_id = await watching
+    assert await storage.get_competition_format_by_id(competition_format_id)
+    await changes.aclose()
+    assert not storage._watchers  # noqa: SLF001
+
+
+@pytest.mark.integration
+async def test_database_is_ready(
+    storage: InMemoryCompetitionFormatsStorage, mocker: MockFixture
+) -> None:
+    """Should be ready, unless the storage fails."""
+    assert await LivenessAdapter.database_is_ready()
+    mocker.patch.object(storage, "is_ready", side_effect=RuntimeError("down"))
+    assert not await LivenessAdapter.database_is_ready()
+
+
+@pytest.mark.integration
+def test_lifespan_with_memory_storage(mocker: MockFixture, headers: dict) -> None:
+    """Should start the service on the storage given by STORAGE_BACKEND."""
+    mocker.patch("app.main.STORAGE_BACKEND", "memory")
+    with TestClient(api) as client:
+        competition_format_id = create(
+            client, headers, load("competition_format_interval_start")
+        )
+        resp = client.get(f"/competition-formats/{competition_format_id}")
+        assert resp.status_code == HTTPStatus.OK
+
+
+@pytest.mark.integration
+async def test_stored_format_over_capacity(
+    client: TestClient,
+    storage: InMemoryCompetitionFormatsStorage,
+    headers: dict,
+    mocker: MockFixture,
+) -> None:
+    """Should read, update, export and import a stored format with heats too big."""
+    mocker.patch("app.services.competition_formats_service.CHECK_CAPACITY", new=True)
+    body = load("competition_format_individual_sprint") | {
+        "id": "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    }
+    # Stored before the capacity was checked, with heats of 11 and 12:
+    await storage.create_competition_format(
+        TypeAdapter(CompetitionFormatUnion).validate_python(body)
+    )
+    url = f"/competition-formats/{body['id']}"
+    assert client.get(url).json()["max_no_of_contestants_in_race"] == 10  # noqa: PLR2004
+    assert max(client.get(f"{url}/capacity").json()["ranked"]["largest_heat"]) == 12  # noqa: PLR2004
+
+    # Updated as long as the race configs and limits are kept:
+    resp = client.put(url, headers=headers, json=body | {"name": "Renamed"})
+    assert resp.status_code == HTTPStatus.NO_CONTENT, resp.text
+    resp = client.put(
+        url, headers=headers, json=body | {"max_no_of_contestants_in_race": 11}
+    )
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    resp = client.put(
+        url,
+        headers=headers,
+        json=body | {"race_config_ranked": body["race_config_ranked"][:-1]},
+    )
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    # Exported and imported, as in and out of the catalog:
+    export = client.get("/competition-formats:export", headers=headers).content
+    await storage.delete_competition_format(UUID(body["id"]))
+    resp = client.post("/competition-formats:import", headers=headers, content=export)
+    assert resp.json()["created"] == 1, resp.text
+    assert client.get(url).json()["name"] == "Renamed"
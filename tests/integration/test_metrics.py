@@ -0,0 +1,110 @@
+"""Integration test cases for the metrics route."""
+
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from pytest_mock import MockFixture
+
+from app import api
+from app.adapters import PoolMetricsListener
+from app.models import CompetitionFormatUnion
+from app.services import CompetitionFormatsService, LRUCache
+
+COMPETITION_FORMAT = {
+    "datatype": "interval_start",
+    "name": "Interval Start",
+    "starting_order": "Draw",
+    "start_procedure": "Interval Start",
+    "time_between_groups": "00:10:00",
+    "intervals": "00:00:30",
+    "max_no_of_contestants_in_raceclass": 9999,
+    "max_no_of_contestants_in_race": 9999,
+}
+
+
+class FakeTimer:
+    """A clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """Fixture to create a test client for the FastAPI application."""
+    return TestClient(api)
+
+
+@pytest.mark.integration
+async def test_metrics_cache_counters(client: TestClient, mocker: MockFixture) -> None:
+    """Should count cache hits, misses, evictions and expirations."""
+    timer = FakeTimer()
+    mocker.patch.object(
+        CompetitionFormatsService, "cache", LRUCache(maxsize=1, ttl=60, timer=timer)
+    )
+    get_competition_format_by_id = mocker.patch(
+        "app.adapters.competition_formats_adapter.CompetitionFormatsAdapter.get_competition_format_by_id",
+        return_value=TypeAdapter(CompetitionFormatUnion).validate_python(
+            COMPETITION_FORMAT
+        ),
+    )
+    first_id = "290e70d5-0933-4af0-bb53-1d705ba7eb95"
+    second_id = "9a1a8a35-84f8-4d5b-9d04-1d7e8a0e6c41"
+
+    client.get(f"/competition-formats/{first_id}")  # miss
+    client.get(f"/competition-formats/{first_id}")  # hit
+    client.get(f"/competition-formats/{second_id}")  # miss, evicts first_id
+    timer.now = 61
+    client.get(f"/competition-formats/{second_id}")  # expired, miss
+    assert get_competition_format_by_id.call_count == 3  # noqa: PLR2004
+
+    resp = client.get("/metrics")
+    assert resp.status_code == HTTPStatus.OK
+    samples = dict(line.split() for line in resp.text.splitlines())
+    assert {
+        name: value
+        for name, value in samples.items()
+        if name.startswith("competition_formats_cache")
+    } == {
+        "competition_formats_cache_hits_total": "1",
+        "competition_formats_cache_misses_total": "3",
+        "competition_formats_cache_evictions_total": "1",
+        "competition_formats_cache_expirations_total": "1",
+        "competition_formats_cache_size": "1",
+    }
+
+
+@pytest.mark.integration
+async def test_metrics_pool(client: TestClient, mocker: MockFixture) -> None:
+    """Should export the pool gauges and the checkout wait histogram."""
+    listener = PoolMetricsListener()
+    mocker.patch("app.routers.metrics.pool_metrics_listener", listener)
+    listener.connection_created(None)
+    listener.connection_created(None)
+    listener.connection_checked_out(SimpleNamespace(duration=0.003))
+    listener.connection_checked_out(SimpleNamespace(duration=0.2))
+    listener.connection_checked_in(None)
+
+    resp = client.get("/metrics")
+    assert resp.status_code == HTTPStatus.OK
+    samples = dict(line.split() for line in resp.text.splitlines())
+    assert samples["mongo_pool_connections_open"] == "2"
+    assert samples["mongo_pool_connections_in_use"] == "1"
+    assert samples["mongo_pool_checkouts_total"] == "2"
+    assert samples["mongo_pool_checkout_failures_total"] == "0"
+    assert samples['mongo_pool_checkout_wait_seconds_bucket{le="0.001"}'] == "0"
+    assert samples['mongo_pool_checkout_wait_seconds_bucket{le="0.005"}'] == "1"
+    assert samples['mongo_pool_checkout_wait_seconds_bucket{le="0.5"}'] == "2"
+    assert samples['mongo_pool_checkout_wait_seconds_bucket{le="+Inf"}'] == "2"
+    assert float(samples["mongo_pool_checkout_wait_seconds_sum"]) == pytest.approx(
+        0.203
+    )
+    assert samples["mongo_pool_checkout_wait_seconds_count"] == "2"
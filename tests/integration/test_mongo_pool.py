@@ -0,0 +1,97 @@
+"""Integration test cases for the mongo client settings and pool metrics."""
+
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from pytest_mock import MockFixture
+
+from app.adapters import MongoClientSettings, PoolMetricsListener
+
+
+@pytest.mark.integration
+async def test_mongo_client_settings_defaults() -> None:
+    """Should only set the pool options of pymongo, with its defaults."""
+    assert MongoClientSettings().client_options() == {
+        "maxPoolSize": 100,
+        "minPoolSize": 0,
+        "serverSelectionTimeoutMS": 30000,
+        "readPreference": "primary",
+    }
+
+
+@pytest.mark.integration
+async def test_mongo_client_settings_from_env(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Should read and convert the settings from the environment."""
+    monkeypatch.setenv("DB_MAX_POOL_SIZE", "50")
+    monkeypatch.setenv("DB_MIN_POOL_SIZE", "10")
+    monkeypatch.setenv("DB_MAX_IDLE_TIME_MS", "60000")
+    monkeypatch.setenv("DB_SERVER_SELECTION_TIMEOUT_MS", "5000")
+    monkeypatch.setenv("DB_COMPRESSORS", "zlib")
+    monkeypatch.setenv("DB_READ_PREFERENCE", "secondaryPreferred")
+
+    assert MongoClientSettings.from_env().client_options() == {
+        "maxPoolSize": 50,
+        "minPoolSize": 10,
+        "maxIdleTimeMS": 60000,
+        "serverSelectionTimeoutMS": 5000,
+        "compressors": "zlib",
+        "readPreference": "secondaryPreferred",
+    }
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {"max_pool_size": 0},
+        {"min_pool_size": -1},
+        {"min_pool_size": 11, "max_pool_size": 10},
+        {"max_idle_time_ms": 0},
+        {"compressors": "zlib,lz4"},
+        {"read_preference": "any"},
+    ],
+)
+async def test_mongo_client_settings_invalid(settings: dict) -> None:
+    """Should not accept illegal values."""
+    with pytest.raises(ValidationError):
+        MongoClientSettings.model_validate(settings)
+
+
+@pytest.mark.integration
+async def test_mongo_client_settings_compressor_not_installed(
+    mocker: MockFixture,
+) -> None:
+    """Should not accept a compressor whose library is missing."""
+    mocker.patch("pymongo.compression_support._have_snappy", return_value=False)
+    with pytest.raises(ValidationError, match="snappy"):
+        MongoClientSettings(compressors=["snappy"])
+
+
+@pytest.mark.integration
+async def test_pool_metrics_listener() -> None:
+    """Should count connections in use and checkout wait times."""
+    listener = PoolMetricsListener()
+    listener.pool_created(None)
+    listener.pool_ready(None)
+    listener.connection_created(None)
+    listener.connection_ready(None)
+    listener.connection_created(None)
+    listener.connection_check_out_started(None)
+    listener.connection_checked_out(SimpleNamespace(duration=0.002))
+    listener.connection_checked_out(SimpleNamespace(duration=0.0005))
+    listener.connection_checked_in(None)
+    listener.connection_check_out_failed(SimpleNamespace(duration=10.0))
+    listener.connection_closed(None)
+    listener.pool_cleared(None)
+    listener.pool_closed(None)
+
+    stats = listener.stats
+    assert stats.connections_open == 1
+    assert stats.connections_in_use == 1
+    assert stats.checkouts == 2  # noqa: PLR2004
+    assert stats.checkout_failures == 1
+    assert stats.checkout_wait_seconds == pytest.approx(10.0025)
+    assert stats.checkout_wait_buckets == [1, 1, 0, 0, 0, 0, 0, 0, 1]
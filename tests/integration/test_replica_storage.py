@@ -0,0 +1,364 @@
+"""Integration test cases for the competition_formats routes on a catalog replica."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+from pytest_mock import MockFixture
+
+from app import api
+from app.adapters import (
+    CompetitionFormatsAdapter,
+    InMemoryCompetitionFormatsStorage,
+    LivenessAdapter,
+    ReplicaCompetitionFormatsStorage,
+)
+from app.models import CompetitionFormatUnion
+from app.services import CompetitionFormatsService
+from tests.helpers import create, load, load_competition_format
+
+# Read methods of the primary, which the replica should never call when serving:
+PRIMARY_READS = [
+    "get_all_competition_formats",
+    "get_all_competition_format_summaries",
+    "get_competition_format_revisions",
+    "get_competition_format_by_id",
+    "get_competition_format_summary_by_id",
+    "get_competition_format_revision",
+    "get_competition_formats_by_name",
+    "get_competition_format_summaries_by_name",
+]
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """Fixture to create a test client for the FastAPI application."""
+    return TestClient(api)
+
+
+@pytest.fixture
+def primary() -> InMemoryCompetitionFormatsStorage:
+    """The storage replicated."""
+    return InMemoryCompetitionFormatsStorage()
+
+
+@pytest.fixture
+async def storage(
+    primary: InMemoryCompetitionFormatsStorage,
+) -> AsyncIterator[ReplicaCompetitionFormatsStorage]:
+    """Initialize the adapters with a replica of the primary storage."""
+    storage = ReplicaCompetitionFormatsStorage(
+        primary, refresh_interval=3600, poll_interval=0.01, batch_size=2
+    )
+    await LivenessAdapter.init(storage)
+    await CompetitionFormatsAdapter.init(storage)
+    CompetitionFormatsService.invalidate(None)
+    yield storage
+    await storage.close()
+
+
+@pytest.mark.integration
+async def test_load_the_catalog_at_init(
+    primary: InMemoryCompetitionFormatsStorage,
+) -> None:
+    """Should serve the formats in the primary when initialized, in batches."""
+    names = ["alpha", "bravo", "charlie"]
+    await primary.create_competition_formats(
+        [
+            load_competition_format("competition_format_interval_start", name=name)
+            for name in names
+        ]
+    )
+    storage = ReplicaCompetitionFormatsStorage(
+        primary, refresh_interval=3600, poll_interval=1, batch_size=2
+    )
+    assert storage.replica_age() is None
+    assert not await storage.is_ready()
+    await storage.init()
+    assert await storage.is_ready()
+    assert storage.replica_age() is not None
+    page = await storage.get_all_competition_formats(limit=10)
+    assert [competition_format.name for competition_format in page] == names
+    summary = await storage.get_competition_format_summary_by_id(page[0].id)
+    assert summary
+    assert summary.name == "alpha"
+    assert await storage.get_competition_format_revision(page[0].id) == (
+        page[0].revision
+    )
+    await storage.close()
+
+
+@pytest.mark.integration
+async def test_reads_never_touch_the_primary(
+    client: TestClient,
+    storage: ReplicaCompetitionFormatsStorage,
+    primary: InMemoryCompetitionFormatsStorage,
+    headers: dict,
+    mocker: MockFixture,
+) -> None:
+    """Should serve every read from the replica, and write through to the primary."""
+    _ = storage
+    reads = [mocker.spy(primary, method) for method in PRIMARY_READS]
+    competition_format_id = create(
+        client, headers, load("competition_format_individual_sprint")
+    )
+
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.status_code == HTTPStatus.OK
+    body = resp.json()
+    for path in [
+        f"/competition-formats/{competition_format_id}?view=summary",
+        "/competition-formats",
+        "/competition-formats?view=summary",
+        "/competition-formats?name=sprint",
+        "/competition-formats?name=sprint&view=summary",
+    ]:
+        assert client.get(path).status_code == HTTPStatus.OK
+    resp = client.get("/competition-formats", headers={"If-None-Match": '"x"'})
+    assert resp.status_code == HTTPStatus.OK
+    for view in ["full", "summary"]:
+        resp = client.get(
+            f"/competition-formats?view={view}",
+            headers={"Accept": "application/x-ndjson"},
+        )
+        assert len(resp.text.splitlines()) == 1
+
+    resp = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers | {"If-Match": '"1"'},
+        json=body | {"name": "Sprint"},
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+    CompetitionFormatsService.invalidate(None)
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert (resp.json()["name"], resp.json()["revision"]) == ("Sprint", 2)
+    resp = client.get(
+        f"/competition-formats/{competition_format_id}",
+        headers={"If-None-Match": '"2"'},
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    assert all(read.call_count == 0 for read in reads)
+
+    resp = client.delete(
+        f"/competition-formats/{competition_format_id}", headers=headers
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+    assert client.get("/competition-formats").json() == []
+    assert await primary.get_all_competition_formats(limit=10) == []
+
+
+@pytest.mark.integration
+async def test_bulk_and_import_write_through(
+    client: TestClient,
+    storage: ReplicaCompetitionFormatsStorage,
+    primary: InMemoryCompetitionFormatsStorage,
+    headers: dict,
+) -> None:
+    """Should copy what is created in bulk or imported to the replica."""
+    interval_start = load_competition_format(
+        "competition_format_interval_start"
+    ).model_dump(mode="json")
+    resp = client.post(
+        "/competition-formats:bulk",
+        headers=headers,
+        json=[interval_start, interval_start | {"name": "interval start"}],
+    )
+    assert [item["status"] for item in resp.json()] == ["created", "duplicate"]
+    resp = client.post(
+        "/competition-formats:import",
+        headers=headers,
+        content=json.dumps(interval_start | {"name": "Imported"}).encode(),
+    )
+    assert resp.json()["replaced"] == 1
+
+    names = [
+        competition_format.name
+        for competition_format in await storage.get_all_competition_formats(limit=10)
+    ]
+    assert names == ["Imported"]
+    assert await primary.get_all_competition_formats(limit=10) == (
+        await storage.get_all_competition_formats(limit=10)
+    )
+    revision = await storage.get_competition_format_revision(UUID(interval_start["id"]))
+    assert revision == 2  # noqa: PLR2004
+
+    # Copied as they are with keep_revisions:
+    copied = load_competition_format("competition_format_interval_start", revision=7)
+    await storage.upsert_competition_formats([copied], keep_revisions=True)
+    assert await storage.get_competition_format_revision(copied.id) == 7  # noqa: PLR2004
+    assert await primary.get_competition_format_revision(copied.id) == 7  # noqa: PLR2004
+
+
+@pytest.mark.integration
+async def test_follow_changes_of_others(
+    storage: ReplicaCompetitionFormatsStorage,
+    primary: InMemoryCompetitionFormatsStorage,
+    mocker: MockFixture,
+) -> None:
+    """Should refresh the replica on changes made straight to the primary."""
+    changes = CompetitionFormatsAdapter.watch_competition_format_changes(
+        poll_interval=1
+    )
+    watching = asyncio.ensure_future(anext(changes))
+    await asyncio.sleep(0)
+
+    competition_format = load_competition_format("competition_format_interval_start")
+    await primary.create_competition_format(competition_format)
+    assert await watching == competition_format.id
+    assert await storage.get_competition_format_by_id(competition_format.id)
+
+    await primary.delete_competition_format(competition_format.id)
+    assert await anext(changes) == competition_format.id
+    assert await storage.get_competition_format_by_id(competition_format.id) is None
+
+    # A failed refresh is left to the next reload, and still seen by watchers:
+    mocker.patch.object(
+        primary, "get_competition_format_by_id", side_effect=RuntimeError("down")
+    )
+    await primary.create_competition_format(competition_format)
+    assert await anext(changes) == competition_format.id
+    assert await storage.get_competition_format_by_id(competition_format.id) is None
+    await changes.aclose()
+
+
+@pytest.mark.integration
+async def test_older_copies_are_not_replaced(
+    storage: ReplicaCompetitionFormatsStorage,
+    primary: InMemoryCompetitionFormatsStorage,
+) -> None:
+    """Should keep a newer revision refreshed before the copy of a write."""
+    competition_format = load_competition_format("competition_format_interval_start")
+    await storage.create_competition_format(competition_format)
+    written = await primary.get_competition_format_by_id(competition_format.id)
+    assert written
+    # Another update reaches the replica through the primary first:
+    await primary.update_competition_format(
+        competition_format.id, written.model_copy(update={"name": "newer"})
+    )
+    await storage._refresh(competition_format.id)  # noqa: SLF001
+    await storage._replace([written])
+    current = await storage.get_competition_format_by_id(competition_format.id)
+    assert current
+    assert (current.name, current.revision) == ("newer", written.revision + 1)
+
+
+@pytest.mark.integration
+async def test_reload_on_conflicts_and_unknown_changes(
+    storage: ReplicaCompetitionFormatsStorage,
+    primary: InMemoryCompetitionFormatsStorage,
+) -> None:
+    """Should reload when a change cannot be applied on its own."""
+    alpha = load_competition_format("competition_format_interval_start", name="alpha")
+    bravo = load_competition_format(
+        "competition_format_interval_start",
+        name="bravo",
+        id="5d6e6c3f-5d6b-4b6e-9a8c-6e4f3c2b1a00",
+    )
+    await storage.create_competition_formats([alpha, bravo])
+    # Swap the names in the primary only, and refresh bravo first:
+    await primary.update_competition_format(
+        alpha.id, alpha.model_copy(update={"name": "x"})
+    )
+    await primary.update_competition_format(
+        bravo.id, bravo.model_copy(update={"name": "alpha"})
+    )
+    await primary.update_competition_format(
+        alpha.id, alpha.model_copy(update={"name": "bravo"})
+    )
+    await storage._refresh(bravo.id)  # noqa: SLF001
+    page = await storage.get_all_competition_formats(limit=10)
+    assert [(item.id, item.name) for item in page] == [
+        (bravo.id, "alpha"),
+        (alpha.id, "bravo"),
+    ]
+
+    await primary.delete_competition_format(alpha.id)
+    await storage._refresh(None)  # noqa: SLF001
+    assert await storage.get_competition_format_by_id(alpha.id) is None
+
+
+@pytest.mark.integration
+async def test_writes_during_a_load(
+    storage: ReplicaCompetitionFormatsStorage,
+    primary: InMemoryCompetitionFormatsStorage,
+    mocker: MockFixture,
+) -> None:
+    """Should not block writes while loading, nor undo them with what was loaded."""
+    alpha = load_competition_format("competition_format_interval_start", name="alpha")
+    bravo = load_competition_format(
+        "competition_format_interval_start",
+        name="bravo",
+        id="5d6e6c3f-5d6b-4b6e-9a8c-6e4f3c2b1a00",
+    )
+    await storage.create_competition_formats([alpha, bravo])
+    # A load reading the catalog as it was before the writes below:
+    before = await primary.get_all_competition_formats(limit=10)
+    streamed = asyncio.Event()
+
+    async def stream_competition_formats(
+        batch_size: int,
+    ) -> AsyncIterator[CompetitionFormatUnion]:
+        for competition_format in before:
+            yield competition_format
+        await streamed.wait()
+
+    mocker.patch.object(
+        primary, "stream_competition_formats", new=stream_competition_formats
+    )
+    loading = asyncio.create_task(storage.load())
+    await asyncio.sleep(0)
+
+    revision = await asyncio.wait_for(
+        storage.update_competition_format(
+            alpha.id, alpha.model_copy(update={"name": "alpha 2"})
+        ),
+        timeout=1,
+    )
+    await asyncio.wait_for(storage.delete_competition_format(bravo.id), timeout=1)
+    streamed.set()
+    await loading
+
+    page = await storage.get_all_competition_formats(limit=10)
+    assert [(item.name, item.revision) for item in page] == [("alpha 2", revision)]
+
+
+@pytest.mark.integration
+async def test_refresh_periodically(
+    primary: InMemoryCompetitionFormatsStorage, mocker: MockFixture
+) -> None:
+    """Should reload the replica in full every refresh_interval."""
+    storage = ReplicaCompetitionFormatsStorage(
+        primary, refresh_interval=0.01, poll_interval=1
+    )
+    await storage.init()
+    changes = storage.watch_competition_format_changes(poll_interval=1)
+    assert await anext(changes) is None
+
+    # A failed reload keeps the replica as it was:
+    mocker.patch.object(
+        primary, "stream_competition_formats", side_effect=RuntimeError("down")
+    )
+    loaded_at = storage.loaded_at
+    await asyncio.sleep(0.05)
+    assert storage.loaded_at == loaded_at
+    await changes.aclose()
+    await storage.close()
+
+
+@pytest.mark.integration
+def test_lifespan_with_replica(mocker: MockFixture) -> None:
+    """Should serve from a replica when CATALOG_REPLICA, giving its age on /ready."""
+    mocker.patch("app.main.STORAGE_BACKEND", "memory")
+    mocker.patch("app.main.CATALOG_REPLICA", True)  # noqa: FBT003
+    with TestClient(api) as client:
+        assert isinstance(
+            CompetitionFormatsAdapter.storage, ReplicaCompetitionFormatsStorage
+        )
+        resp = client.get("/ready")
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.text == "OK"
+        assert resp.headers["Age"] == "0"
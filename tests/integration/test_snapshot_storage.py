@@ -0,0 +1,322 @@
+"""Integration test cases for the competition_formats routes on a snapshot."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from pytest_mock import MockFixture
+
+from app import api
+from app.__main__ import main
+from app.adapters import (
+    CompetitionFormatsAdapter,
+    InMemoryCompetitionFormatsStorage,
+    LivenessAdapter,
+    SnapshotCompetitionFormatsStorage,
+    write_snapshot,
+)
+from app.models import (
+    CompetitionFormatSummary,
+    CompetitionFormatUnion,
+    CompetitionFormatUnionAdapter,
+    CompetitionFormatView,
+)
+from app.services import CompetitionFormatsService
+from tests.helpers import load, load_competition_format
+
+
+@pytest.fixture
+def competition_formats() -> list[CompetitionFormatUnion]:
+    """Competition_formats for testing, ordered by name."""
+    return [
+        load_competition_format("competition_format_individual_sprint", revision=2),
+        load_competition_format("competition_format_interval_start"),
+        load_competition_format(
+            "competition_format_interval_start",
+            id="5d6e6c3f-5d6b-4b6e-9a8c-6e4f3c2b1a00",
+            name="Mass Start",
+        ),
+    ]
+
+
+@pytest.fixture
+async def snapshot(
+    tmp_path: Path, competition_formats: list[CompetitionFormatUnion]
+) -> Path:
+    """Write a snapshot of the competition_formats."""
+    memory = InMemoryCompetitionFormatsStorage()
+    await memory.create_competition_formats(competition_formats)
+    path = tmp_path / "competition_formats.snapshot"
+    with path.open("wb") as file:
+        count = await write_snapshot(file, memory.stream_competition_formats(10))
+    assert count == len(competition_formats)
+    return path
+
+
+@pytest.fixture
+async def storage(snapshot: Path) -> AsyncIterator[SnapshotCompetitionFormatsStorage]:
+    """Initialize the adapters with a snapshot storage."""
+    storage = SnapshotCompetitionFormatsStorage(snapshot)
+    assert not await storage.is_ready()
+    await LivenessAdapter.init(storage)
+    await CompetitionFormatsAdapter.init(storage)
+    CompetitionFormatsService.invalidate(None)
+    yield storage
+    await storage.close()
+    # Leave no snapshot for the adapters of other tests to serve json from:
+    del CompetitionFormatsAdapter.storage
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """Fixture to create a test client for the FastAPI application."""
+    return TestClient(api)
+
+
+@pytest.mark.integration
+async def test_get_from_snapshot(
+    client: TestClient,
+    storage: SnapshotCompetitionFormatsStorage,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should serve every read from the snapshot."""
+    assert await LivenessAdapter.database_is_ready()
+    sprint = competition_formats[0]
+    resp = client.get(f"/competition-formats/{sprint.id}")
+    assert resp.status_code == HTTPStatus.OK
+    assert TypeAdapter(CompetitionFormatUnion).validate_python(resp.json()) == sprint
+    assert resp.headers["ETag"] == '"2"'
+    resp = client.get(
+        f"/competition-formats/{sprint.id}", headers={"If-None-Match": '"2"'}
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    resp = client.get(f"/competition-formats/{sprint.id}?view=summary")
+    assert resp.json()["name"] == "Individual Sprint"
+    resp = client.get("/competition-formats/290e70d5-0933-4af0-bb53-1d705ba7eb00")
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    summary = await storage.get_competition_format_summary_by_id(sprint.id)
+    assert summary
+    assert summary.name == "Individual Sprint"
+    assert await storage.get_competition_format_revision(sprint.id) == 2  # noqa: PLR2004
+    assert await storage.get_competition_format_summary_by_id(UUID(int=0)) is None
+    assert await storage.get_competition_format_revision(UUID(int=0)) is None
+
+    first = client.get("/competition-formats?limit=2")
+    assert [item["name"] for item in first.json()] == [
+        "Individual Sprint",
+        "Interval Start",
+    ]
+    second = client.get(
+        f"/competition-formats?limit=2&view=summary&after={first.headers['Next-Cursor']}"
+    )
+    assert [item["name"] for item in second.json()] == ["Mass Start"]
+    resp = client.get(
+        "/competition-formats?limit=2", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+
+    for view in ["full", "summary"]:
+        resp = client.get(
+            f"/competition-formats?view={view}&batch_size=2",
+            headers={"Accept": "application/x-ndjson"},
+        )
+        assert [json.loads(line)["name"] for line in resp.text.splitlines()] == [
+            "Individual Sprint",
+            "Interval Start",
+            "Mass Start",
+        ]
+
+
+@pytest.mark.integration
+async def test_search_snapshot_by_name(
+    client: TestClient, storage: SnapshotCompetitionFormatsStorage
+) -> None:
+    """Should find formats by prefix and by substring of the normalized name."""
+    _ = storage
+
+    def names(resp: Any) -> list[str]:
+        assert resp.status_code == HTTPStatus.OK
+        return [item["name"] for item in resp.json()]
+
+    assert names(client.get("/competition-formats?name=IN&mode=prefix")) == [
+        "Individual Sprint",
+        "Interval Start",
+    ]
+    assert names(client.get("/competition-formats?name=start&view=summary")) == [
+        "Interval Start",
+        "Mass Start",
+    ]
+    assert names(client.get("/competition-formats?name=t&limit=1")) == [
+        "Individual Sprint"
+    ]
+
+
+@pytest.mark.integration
+async def test_writes_are_refused(
+    client: TestClient,
+    storage: SnapshotCompetitionFormatsStorage,
+    headers: dict,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should return 503 Service Unavailable on every write."""
+    _ = storage
+    interval_start = load("competition_format_interval_start")
+    competition_format_id = competition_formats[1].id
+    for resp in [
+        client.post(
+            "/competition-formats",
+            headers=headers,
+            json=interval_start | {"name": "New"},
+        ),
+        client.post(
+            "/competition-formats:bulk", headers=headers, json=[interval_start]
+        ),
+        client.post(
+            "/competition-formats:import",
+            headers=headers,
+            content=json.dumps(interval_start).encode(),
+        ),
+        client.put(
+            f"/competition-formats/{competition_format_id}",
+            headers=headers,
+            json=interval_start | {"id": str(competition_format_id)},
+        ),
+        client.delete(f"/competition-formats/{competition_format_id}", headers=headers),
+    ]:
+        assert resp.status_code == HTTPStatus.SERVICE_UNAVAILABLE, resp.text
+        assert "read-only" in resp.json()["detail"]
+
+
+@pytest.mark.integration
+async def test_snapshot_is_served_as_stored(
+    client: TestClient,
+    storage: SnapshotCompetitionFormatsStorage,
+    competition_formats: list[CompetitionFormatUnion],
+    snapshot: Path,
+    mocker: MockFixture,
+) -> None:
+    """Should return the json in the snapshot as is, and read models without validation."""
+    encode = mocker.spy(CompetitionFormatsService, "encode")
+    file = await asyncio.to_thread(snapshot.read_bytes)
+    for view, views in [
+        ("full", competition_formats),
+        ("summary", map(CompetitionFormatSummary.of, competition_formats)),
+    ]:
+        stored = [item.model_dump_json().encode() for item in views]
+        assert all(item + b"\n" in file for item in stored)
+        resp = client.get(
+            f"/competition-formats/{competition_formats[0].id}?view={view}"
+        )
+        assert resp.content == stored[0]
+        resp = client.get(f"/competition-formats?view={view}")
+        assert resp.content == b"[" + b",".join(stored) + b"]"
+        resp = client.get(
+            f"/competition-formats?view={view}",
+            headers={"Accept": "application/x-ndjson"},
+        )
+        assert resp.content == b"".join(line + b"\n" for line in stored)
+    encode.assert_not_called()
+
+    validate_python = mocker.spy(CompetitionFormatUnionAdapter, "validate_python")
+    assert await storage.get_all_competition_formats(limit=10) == competition_formats
+    assert [
+        competition_format
+        async for competition_format in storage.stream_competition_formats(2)
+    ] == competition_formats
+    assert [
+        summary.name async for summary in storage.stream_competition_format_summaries(2)
+    ] == ["Individual Sprint", "Interval Start", "Mass Start"]
+    (summary,) = await storage.get_all_competition_format_summaries(limit=1)
+    assert summary.name == "Individual Sprint"
+    assert await storage.get_competition_format_by_id(UUID(int=0)) is None
+    validate_python.assert_not_called()
+
+
+@pytest.mark.integration
+async def test_close_while_sending(
+    storage: SnapshotCompetitionFormatsStorage,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should close, leaving a slice being sent readable."""
+    sprint = competition_formats[0]
+    json_by_id = await storage.get_competition_format_json_by_id(
+        sprint.id, CompetitionFormatView.Full
+    )
+    assert json_by_id
+    await storage.close()
+    assert not await storage.is_ready()
+    assert bytes(json_by_id[1]) == sprint.model_dump_json().encode()
+
+
+@pytest.mark.integration
+async def test_snapshot_never_changes(
+    storage: SnapshotCompetitionFormatsStorage,
+) -> None:
+    """Should never yield a change."""
+    _ = storage
+    changes = CompetitionFormatsAdapter.watch_competition_format_changes(
+        poll_interval=0.01
+    )
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(anext(changes), timeout=0.05)
+
+
+@pytest.mark.integration
+async def test_not_a_snapshot(tmp_path: Path) -> None:
+    """Should refuse to serve a file that is not a snapshot."""
+    path = tmp_path / "catalog.ndjson"
+    path.write_bytes(b'{"not": "a snapshot"}\n')
+    with pytest.raises(ValueError, match="not a snapshot"):
+        await SnapshotCompetitionFormatsStorage(path).init()
+
+    # A snapshot written before its documents were stored as returned:
+    path.write_bytes(b"[]" + (0).to_bytes(8, "little") + b"CFSNAP1\n")
+    with pytest.raises(ValueError, match="not a snapshot"):
+        await SnapshotCompetitionFormatsStorage(path).init()
+
+
+@pytest.mark.integration
+def test_lifespan_with_snapshot_storage(
+    mocker: MockFixture,
+    snapshot: Path,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should start the service on the snapshot given by SNAPSHOT_PATH."""
+    mocker.patch("app.main.STORAGE_BACKEND", "snapshot")
+    mocker.patch("app.main.SNAPSHOT_PATH", snapshot)
+    with TestClient(api) as client:
+        resp = client.get(f"/competition-formats/{competition_formats[0].id}")
+        assert resp.status_code == HTTPStatus.OK
+
+
+@pytest.mark.integration
+def test_cli_snapshot(
+    mocker: MockFixture,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+    competition_formats: list[CompetitionFormatUnion],
+) -> None:
+    """Should write a snapshot of the storage given by the environment."""
+    memory = InMemoryCompetitionFormatsStorage()
+    asyncio.run(memory.create_competition_formats(competition_formats))
+    mocker.patch("app.__main__.create_storage", return_value=memory)
+    path = tmp_path / "competition_formats.snapshot"
+
+    main(["snapshot", "-o", str(path), "--batch-size", "2"])
+    assert "Wrote 3 competition formats" in capsys.readouterr().err
+
+    storage = SnapshotCompetitionFormatsStorage(path)
+    asyncio.run(storage.init())
+    assert [
+        competition_format.id
+        for competition_format in asyncio.run(
+            storage.get_all_competition_formats(limit=10)
+        )
+    ] == [competition_format.id for competition_format in competition_formats]
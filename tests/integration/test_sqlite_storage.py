@@ -0,0 +1,384 @@
+"""Integration test cases for the competition_formats routes on the sqlite storage."""
+
+import asyncio
+import json
+import sqlite3
+import sys
+from collections.abc import AsyncIterator
+from contextlib import closing
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from pytest_mock import MockFixture
+
+from app import api
+from app.adapters import (
+    CompetitionFormatsAdapter,
+    LivenessAdapter,
+    NameSearchMode,
+    SqliteCompetitionFormatsStorage,
+)
+from app.adapters.sqlite_storage import prefix_successor
+from app.models import CompetitionFormatUnion
+from app.services import CompetitionFormatsService
+from tests.helpers import create, load
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """Fixture to create a test client for the FastAPI application."""
+    return TestClient(api)
+
+
+@pytest.fixture
+async def storage(tmp_path: Path) -> AsyncIterator[SqliteCompetitionFormatsStorage]:
+    """Initialize the adapters with an empty sqlite storage."""
+    storage = SqliteCompetitionFormatsStorage(tmp_path / "competition_formats.db")
+    await LivenessAdapter.init(storage)
+    await CompetitionFormatsAdapter.init(storage)
+    CompetitionFormatsService.invalidate(None)
+    yield storage
+    await storage.close()
+
+
+@pytest.mark.integration
+async def test_create_get_update_delete(
+    client: TestClient, storage: SqliteCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should keep a competition_format through its whole life."""
+    sprint = load("competition_format_individual_sprint")
+    competition_format_id = create(client, headers, sprint)
+
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.status_code == HTTPStatus.OK
+    body = resp.json()
+    assert body["name"] == "Individual Sprint"
+    assert len(body["race_config_ranked"]) == len(sprint["race_config_ranked"])
+    assert resp.headers["ETag"] == '"1"'
+
+    body["time_between_heats"] = "00:03:00"
+    conflict = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers | {"If-Match": '"2"'},
+        json=body,
+    )
+    assert conflict.status_code == HTTPStatus.PRECONDITION_FAILED
+    updated = client.put(
+        f"/competition-formats/{competition_format_id}",
+        headers=headers | {"If-Match": '"1"'},
+        json=body,
+    )
+    assert updated.status_code == HTTPStatus.NO_CONTENT
+    assert updated.headers["ETag"] == '"2"'
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.json()["time_between_heats"] == "00:03:00"
+    assert resp.json()["revision"] == 2  # noqa: PLR2004
+    assert await storage.get_competition_format_revision(competition_format_id) == 2  # noqa: PLR2004
+
+    resp = client.delete(
+        f"/competition-formats/{competition_format_id}", headers=headers
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+    resp = client.get(f"/competition-formats/{competition_format_id}")
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    assert await storage.delete_competition_format(competition_format_id) == 0
+    assert (
+        await storage.get_competition_format_summary_by_id(competition_format_id)
+        is None
+    )
+    assert await storage.get_competition_format_revision(competition_format_id) is None
+
+
+@pytest.mark.integration
+async def test_names_are_unique(
+    client: TestClient, storage: SqliteCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should not create or rename a format to the normalized name of another."""
+    _ = storage
+    create(client, headers, load("competition_format_interval_start"))
+    sprint_id = create(client, headers, load("competition_format_individual_sprint"))
+
+    resp = client.post(
+        "/competition-formats",
+        headers=headers,
+        json=load("competition_format_interval_start") | {"name": " interval  START"},
+    )
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+    sprint = client.get(f"/competition-formats/{sprint_id}").json()
+    resp = client.put(
+        f"/competition-formats/{sprint_id}",
+        headers=headers,
+        json=sprint | {"name": "Interval Start"},
+    )
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+    # Renaming to another casing of its own name is fine:
+    resp = client.put(
+        f"/competition-formats/{sprint_id}",
+        headers=headers,
+        json=sprint | {"name": "INDIVIDUAL SPRINT"},
+    )
+    assert resp.status_code == HTTPStatus.NO_CONTENT
+    assert client.get("/competition-formats?name=sprint").json()[0]["name"] == (
+        "INDIVIDUAL SPRINT"
+    )
+
+
+@pytest.mark.integration
+async def test_pages_and_summaries(
+    client: TestClient, storage: SqliteCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should page through the formats in name order, in full and as summaries."""
+    interval_start = load("competition_format_interval_start")
+    for name in ["Charlie", "alpha", "Bravo"]:
+        create(client, headers, interval_start | {"name": name})
+
+    first = client.get("/competition-formats?limit=2")
+    assert [item["name"] for item in first.json()] == ["alpha", "Bravo"]
+    second = client.get(
+        f"/competition-formats?limit=2&after={first.headers['Next-Cursor']}"
+    )
+    assert [item["name"] for item in second.json()] == ["Charlie"]
+    assert "Next-Cursor" not in second.headers
+
+    summaries = client.get("/competition-formats?limit=2&view=summary")
+    assert [item["name"] for item in summaries.json()] == ["alpha", "Bravo"]
+    assert "intervals" not in summaries.json()[0]
+    resp = client.get(
+        "/competition-formats?limit=2&view=summary",
+        headers={"If-None-Match": summaries.headers["ETag"]},
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+
+    competition_format_id = first.json()[0]["id"]
+    resp = client.get(f"/competition-formats/{competition_format_id}?view=summary")
+    assert resp.json()["name"] == "alpha"
+    revisions = await storage.get_competition_format_revisions(limit=1)
+    assert [str(competition_format_id) for competition_format_id, _ in revisions] == [
+        competition_format_id
+    ]
+
+
+@pytest.mark.integration
+async def test_search_by_name(
+    client: TestClient, storage: SqliteCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should find formats by prefix and by substring of the normalized name."""
+    interval_start = load("competition_format_interval_start")
+    for name in ["Interval Start", "Interval Start 15s", "Mass Start", "Sprint"]:
+        create(client, headers, interval_start | {"name": name})
+
+    def names(resp: Any) -> list[str]:
+        assert resp.status_code == HTTPStatus.OK
+        return [item["name"] for item in resp.json()]
+
+    assert names(client.get("/competition-formats?name=INTERVAL&mode=prefix")) == [
+        "Interval Start",
+        "Interval Start 15s",
+    ]
+    assert names(client.get("/competition-formats?name=start")) == [
+        "Interval Start",
+        "Interval Start 15s",
+        "Mass Start",
+    ]
+    assert names(client.get("/competition-formats?name=rt&view=summary")) == [
+        "Interval Start",
+        "Interval Start 15s",
+        "Mass Start",
+    ]
+    assert names(client.get("/competition-formats?name=xyz")) == []
+    assert names(client.get("/competition-formats?name=tar&limit=1")) == [
+        "Interval Start"
+    ]
+    found = await storage.get_competition_formats_by_name(
+        "", mode=NameSearchMode.Prefix
+    )
+    assert len(found) == 4  # noqa: PLR2004
+
+
+@pytest.mark.integration
+async def test_prefix_successor() -> None:
+    """Should bound the keys starting with a prefix."""
+    assert prefix_successor("ab") == "ac"
+    assert prefix_successor(f"a{chr(sys.maxunicode)}") == "b"
+    assert prefix_successor("") is None
+
+
+@pytest.mark.integration
+async def test_stream_bulk_and_import(
+    client: TestClient, storage: SqliteCompetitionFormatsStorage, headers: dict
+) -> None:
+    """Should create in bulk, stream, and import over existing formats."""
+    interval_start = load("competition_format_interval_start")
+    resp = client.post(
+        "/competition-formats:bulk",
+        headers=headers,
+        json=[
+            interval_start | {"id": "290e70d5-0933-4af0-bb53-1d705ba7eb95"},
+            load("competition_format_individual_sprint"),
+            interval_start | {"name": "interval start"},
+            interval_start
+            | {"id": "290e70d5-0933-4af0-bb53-1d705ba7eb95", "name": "Other"},
+        ],
+    )
+    assert [item["status"] for item in resp.json()] == [
+        "created",
+        "created",
+        "duplicate",
+        "duplicate",
+    ]
+
+    for view in ["summary", "full"]:
+        resp = client.get(
+            f"/competition-formats?batch_size=1&view={view}",
+            headers={"Accept": "application/x-ndjson"},
+        )
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        assert [line["name"] for line in lines] == [
+            "Individual Sprint",
+            "Interval Start",
+        ]
+
+    export = client.get("/competition-formats:export", headers=headers).content
+    renamed = json.loads(export.splitlines()[1]) | {"name": "Individual Sprint"}
+    resp = client.post(
+        "/competition-formats:import",
+        headers=headers,
+        content=export
+        + json.dumps(renamed).encode()
+        + b"\n"
+        + json.dumps(interval_start | {"name": "New"}).encode(),
+    )
+    result = resp.json()
+    assert (result["created"], result["replaced"], result["invalid"]) == (1, 2, 1)
+    assert "duplicate key" in result["errors"][0]
+    assert client.get("/competition-formats?name=new").json()[0]["name"] == "New"
+
+    # Imported formats get the next revision, in the row and the document:
+    revisions = await storage.get_competition_format_revisions(limit=10)
+    assert sorted(revision for _, revision in revisions) == [1, 2, 2]
+    for competition_format_id, revision in revisions:
+        resp = client.get(f"/competition-formats/{competition_format_id}")
+        assert resp.json()["revision"] == revision
+
+
+@pytest.mark.integration
+async def test_formats_are_persisted(
+    storage: SqliteCompetitionFormatsStorage, tmp_path: Path
+) -> None:
+    """Should find the formats in the file from another storage."""
+    _ = storage
+    competition_format = TypeAdapter(CompetitionFormatUnion).validate_python(
+        load("competition_format_individual_sprint")
+    )
+    await CompetitionFormatsService.create_competition_format(competition_format)
+
+    # Another storage on the same file, as after a restart:
+    reopened = SqliteCompetitionFormatsStorage(tmp_path / "competition_formats.db")
+    await reopened.init()
+    assert await reopened.is_ready()
+    assert (
+        await reopened.get_competition_format_by_id(competition_format.id)
+        == competition_format
+    )
+    await reopened.close()
+    with pytest.raises(RuntimeError):
+        _ = reopened.connection
+
+
+@pytest.mark.integration
+async def test_durations_are_stored_as_seconds(
+    storage: SqliteCompetitionFormatsStorage, tmp_path: Path
+) -> None:
+    """Should store durations as seconds, and still read them as "HH:MM:SS"."""
+    competition_format = TypeAdapter(CompetitionFormatUnion).validate_python(
+        load("competition_format_interval_start")
+    )
+    await storage.create_competition_format(competition_format)
+    with closing(sqlite3.connect(tmp_path / "competition_formats.db")) as connection:
+        (document,) = connection.execute(
+            "SELECT document FROM competition_formats"
+        ).fetchone()
+        assert json.loads(document)["intervals"] == 30  # noqa: PLR2004
+        # As written before durations were stored as seconds:
+        connection.execute(
+            "UPDATE competition_formats SET document = ?",
+            (competition_format.model_dump_json(),),
+        )
+        connection.commit()
+    assert (
+        await storage.get_competition_format_by_id(competition_format.id)
+        == competition_format
+    )
+
+
+@pytest.mark.integration
+async def test_stored_documents_are_trusted(
+    storage: SqliteCompetitionFormatsStorage, tmp_path: Path
+) -> None:
+    """Should build the documents it wrote without validation."""
+    competition_format = TypeAdapter(CompetitionFormatUnion).validate_python(
+        load("competition_format_individual_sprint")
+    )
+    await CompetitionFormatsService.validate_competition_format(competition_format)
+    await storage.create_competition_format(competition_format)
+    read = await storage.get_competition_format_by_id(competition_format.id)
+    assert read == competition_format
+
+    with closing(sqlite3.connect(tmp_path / "competition_formats.db")) as connection:
+        connection.execute(
+            "UPDATE competition_formats"
+            " SET document = json_set(document, '$.max_no_of_contestants_in_race', 0)"
+        )
+        connection.commit()
+    read = await storage.get_competition_format_by_id(competition_format.id)
+    assert read
+    assert read.max_no_of_contestants_in_race == 0
+
+
+@pytest.mark.integration
+async def test_watch_competition_format_changes(
+    storage: SqliteCompetitionFormatsStorage, tmp_path: Path
+) -> None:
+    """Should yield the id of local changes, and None for those of others."""
+    interval_start = load("competition_format_interval_start")
+    changes = CompetitionFormatsAdapter.watch_competition_format_changes(
+        poll_interval=0.05
+    )
+    watching = asyncio.ensure_future(anext(changes))
+    await asyncio.sleep(0.01)
+
+    await CompetitionFormatsService.create_competition_format(
+        TypeAdapter(CompetitionFormatUnion).validate_python(interval_start)
+    )
+    competition_format_id = await watching
+    assert await storage.get_competition_format_by_id(competition_format_id)
+
+    # A delete through another connection to the same file:
+    with closing(sqlite3.connect(tmp_path / "competition_formats.db")) as other:
+        other.execute("DELETE FROM competition_formats")
+        other.commit()
+    assert await anext(changes) is None
+    await changes.aclose()
+    assert not storage._watchers  # noqa: SLF001
+
+
+@pytest.mark.integration
+def test_lifespan_with_sqlite_storage(
+    mocker: MockFixture, headers: dict, tmp_path: Path
+) -> None:
+    """Should start the service on the storage given by STORAGE_BACKEND."""
+    mocker.patch("app.main.STORAGE_BACKEND", "sqlite")
+    mocker.patch("app.main.SQLITE_PATH", tmp_path / "competition_formats.db")
+    with TestClient(api) as client:
+        competition_format_id = create(
+            client, headers, load("competition_format_interval_start")
+        )
+    with TestClient(api) as client:
+        resp = client.get(f"/competition-formats/{competition_format_id}")
+        assert resp.status_code == HTTPStatus.OK
@@ -0,0 +1,61 @@
+"""Unit test cases for the cache module."""
+
+import pytest
+
+from app.services import CacheStats, LRUCache
+
+
+class FakeTimer:
+    """A clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.mark.unit
+async def test_lru_cache_evicts_least_recently_used() -> None:
+    """Should evict the entry that was read least recently."""
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=60, timer=FakeTimer())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3  # noqa: PLR2004
+    assert len(cache) == 2  # noqa: PLR2004
+    assert cache.stats == CacheStats(hits=3, misses=1, evictions=1)
+
+
+@pytest.mark.unit
+async def test_lru_cache_expires_entries() -> None:
+    """Should not return entries older than ttl."""
+    timer = FakeTimer()
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=10, timer=timer)
+    cache.set("a", 1)
+    timer.now = 9.9
+    assert cache.get("a") == 1
+    timer.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats == CacheStats(hits=1, misses=1, expirations=1)
+
+
+@pytest.mark.unit
+async def test_lru_cache_invalidate_and_clear() -> None:
+    """Should remove the invalidated entry, and all entries on clear."""
+    cache: LRUCache[str, int] = LRUCache(maxsize=3, ttl=60, timer=FakeTimer())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    cache.invalidate("does-not-exist")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2  # noqa: PLR2004
+    cache.clear()
+    assert len(cache) == 0
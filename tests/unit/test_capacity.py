@@ -0,0 +1,76 @@
+"""Unit test cases for the capacity module."""
+
+import pytest
+
+from app.models import RaceConfig
+from app.services import compile_race_config
+from app.services.capacity import capacity, largest_heat
+
+# 2 quarterfinals, 4 from each to final A, the rest to final B, and none to C:
+QUARTERFINALS = RaceConfig(
+    max_no_of_contestants=16,
+    rounds=["Q", "F"],
+    no_of_heats={"Q": {"A": 2}, "F": {"A": 1, "B": 1, "C": 0}},
+    from_to={"Q": {"A": {"F": {"B": "REST", "A": 4}}, "C": {"F": {"C": 0}}}},
+)
+# 2 quarterfinals, 2 from each to a semifinal without heats, on to the final:
+SKIPPED_SEMIFINAL = RaceConfig(
+    max_no_of_contestants=16,
+    rounds=["Q", "S", "F"],
+    no_of_heats={"Q": {"A": 2}, "S": {"A": 0}, "F": {"A": 1, "B": 1}},
+    from_to={
+        "Q": {"A": {"S": {"A": 2}, "F": {"B": "REST"}}},
+        "S": {"A": {"F": {"A": "ALL"}}},
+    },
+)
+# 1 heat, and all of it to a second round:
+ROUNDS = RaceConfig(
+    max_no_of_contestants=7,
+    rounds=["R1", "R2"],
+    no_of_heats={"R1": {"A": 1}, "R2": {"A": 1}},
+    from_to={"R1": {"A": {"R2": {"A": "ALL"}}}},
+)
+
+
+@pytest.mark.unit
+def test_largest_heat() -> None:
+    """Should follow the contestants through the rounds."""
+    graph = compile_race_config(QUARTERFINALS)
+    # 16 gives quarterfinals of 8, a final A of 8 and a final B of 8:
+    assert largest_heat(graph, 16) == 8  # noqa: PLR2004
+    # 9 gives quarterfinals of 5 and 4, and a final A of 8 before the rest:
+    assert largest_heat(graph, 9) == 8  # noqa: PLR2004
+    # 3 gives quarterfinals of 2 and 1, all of them to final A:
+    assert largest_heat(graph, 3) == 3  # noqa: PLR2004
+    assert largest_heat(compile_race_config(ROUNDS), 7) == 7  # noqa: PLR2004
+
+
+@pytest.mark.unit
+def test_largest_heat_through_heat_class_without_heats() -> None:
+    """Should pass the contestants of a heat class without heats on."""
+    graph = compile_race_config(SKIPPED_SEMIFINAL)
+    # 16 gives quarterfinals of 8, a final A of 4 and a final B of 12:
+    assert largest_heat(graph, 16) == 12  # noqa: PLR2004
+    # A semifinal without heats, given all of 3, passes them all to final A:
+    graph = compile_race_config(
+        SKIPPED_SEMIFINAL.model_copy(
+            update={
+                "from_to": SKIPPED_SEMIFINAL.from_to | {"Q": {"A": {"S": {"A": "ALL"}}}}
+            }
+        )
+    )
+    assert largest_heat(graph, 3) == 3  # noqa: PLR2004
+
+
+@pytest.mark.unit
+def test_capacity() -> None:
+    """Should give the config, heats and largest heat of every size."""
+    table = capacity([QUARTERFINALS, ROUNDS], 20)
+    assert len(table.largest_heat) == 20  # noqa: PLR2004
+    assert table.max_no_of_contestants[6:8] == [7, 16]
+    assert table.no_of_heats[6:8] == [{"R1": 1, "R2": 1}, {"Q": 2, "F": 2}]
+    assert table.largest_heat[:8] == [1, 2, 3, 4, 5, 6, 7, 8]
+    # No config covers more than 16:
+    assert table.max_no_of_contestants[16:] == [None] * 4
+    assert table.no_of_heats[16:] == [{}] * 4
+    assert table.largest_heat[16:] == [0] * 4
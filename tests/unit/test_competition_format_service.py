@@ -14,6 +14,7 @@ from app.services import (
     CompetitionFormatsService,
     IllegalValueError,
     ValidationError,
+    capacity_table,
 )
 
 
@@ -231,3 +232,39 @@ async def test_validate_race_config_() -> None:
         )
     except IllegalValueError:
         pytest.fail("IllegalValueError was raised unexpectedly!")
+
+
+@pytest.mark.unit
+async def test_validate_capacity() -> None:
+    """Should raise IllegalValueError on a heat too big."""
+    race_config = RaceConfig(
+        max_no_of_contestants=4,
+        rounds=["R1", "R2"],
+        no_of_heats={"R1": {"A": 2}, "R2": {"A": 1}},
+        from_to={"R1": {"A": {"R2": {"A": "ALL"}}}},
+    )
+    competition_format: IndividualSprintFormat = IndividualSprintFormat(
+        name="Test",
+        start_procedure="Test",
+        starting_order="Test",
+        max_no_of_contestants_in_race=4,
+        max_no_of_contestants_in_raceclass=4,
+        time_between_groups=timedelta(minutes=1),
+        time_between_rounds=timedelta(seconds=30),
+        time_between_heats=timedelta(seconds=30),
+        rounds_non_ranked_classes=["R1", "R2"],
+        rounds_ranked_classes=["R1", "R2"],
+        race_config_non_ranked=[race_config],
+        race_config_ranked=[race_config],
+    )
+
+    await CompetitionFormatsService.validate_competition_format(competition_format)
+    await CompetitionFormatsService.validate_capacity(competition_format)
+    assert capacity_table(competition_format).ranked.largest_heat == [1, 2, 3, 4]
+
+    # All of 4 contestants in the second round is more than 3 in a race, which
+    # is only checked on its own:
+    competition_format.max_no_of_contestants_in_race = 3
+    await CompetitionFormatsService.validate_competition_format(competition_format)
+    with pytest.raises(IllegalValueError, match="4 contestants gets a heat of 4"):
+        await CompetitionFormatsService.validate_capacity(competition_format)
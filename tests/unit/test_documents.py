@@ -0,0 +1,148 @@
+"""Unit test cases for the documents module."""
+
+import json
+from datetime import timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from app.adapters import SCHEMA_VERSION, read_document
+from app.adapters.documents import is_current, write_document
+from app.models import (
+    CompetitionFormatUnion,
+    CompetitionFormatUnionAdapter,
+    IndividualSprintFormat,
+    RaceConfig,
+)
+from app.services import capacity_table
+
+
+def stored(name: str) -> tuple[CompetitionFormatUnion, dict]:
+    """Return a competition_format from the test files, and its stored document."""
+    with open(f"tests/files/{name}.json", "rb") as file:
+        competition_format = CompetitionFormatUnionAdapter.validate_json(file.read())
+    document = write_document(competition_format) | {
+        "_id": "6612f1c2a1b2c3d4e5f60718",
+        "name_key": competition_format.name.lower(),
+    }
+    return competition_format, document
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "name",
+    [
+        "competition_format_interval_start",
+        "competition_format_individual_sprint",
+        "competition_format_individual_sprint_multiple_finals_1",
+    ],
+)
+async def test_read_trusted_document(name: str) -> None:
+    """Should build the same competition_format as validation, leaving out storage fields."""
+    competition_format, document = stored(name)
+    read = read_document(document)
+    assert type(read) is type(competition_format)
+    assert read == competition_format
+    assert read.model_dump_json() == competition_format.model_dump_json()
+    assert "name_key" not in read.model_dump()
+
+
+@pytest.mark.unit
+async def test_read_trusted_document_race_configs() -> None:
+    """Should build the race configs as models."""
+    _, document = stored("competition_format_individual_sprint")
+    read = read_document(document)
+    assert isinstance(read, IndividualSprintFormat)
+    assert all(
+        isinstance(race_config, RaceConfig)
+        for race_config in read.race_config_ranked + read.race_config_non_ranked
+    )
+
+
+@pytest.mark.unit
+async def test_read_trusted_document_is_not_validated() -> None:
+    """Should trust a document of the current schema version as it is."""
+    _, document = stored("competition_format_interval_start")
+    read = read_document(document | {"max_no_of_contestants_in_race": 0})
+    assert read.max_no_of_contestants_in_race == 0
+
+
+@pytest.mark.unit
+async def test_read_untrusted_document() -> None:
+    """Should validate a document without the current schema version."""
+    with open("tests/files/competition_format_interval_start.json") as file:
+        document = json.load(file)
+    read = read_document(document | {"schema_version": 0})
+    assert read.name == document["name"]
+    assert read.time_between_groups.total_seconds() == 600  # noqa: PLR2004
+    with pytest.raises(ValidationError):
+        read_document(document | {"max_no_of_contestants_in_race": 0})
+
+
+@pytest.mark.unit
+async def test_write_durations_as_seconds() -> None:
+    """Should store durations as whole seconds, days included."""
+    competition_format, document = stored("competition_format_interval_start")
+    assert document["schema_version"] == SCHEMA_VERSION
+    assert (document["time_between_groups"], document["intervals"]) == (600, 30)
+    assert write_document(competition_format, mode="json")["id"] == str(
+        competition_format.id
+    )
+
+    long_break = competition_format.model_copy(
+        update={"time_between_groups": timedelta(days=1, hours=2)}
+    )
+    document = write_document(long_break)
+    assert document["time_between_groups"] == 93600  # noqa: PLR2004
+    assert read_document(document) == long_break
+    assert json.loads(long_break.model_dump_json())["time_between_groups"] == (
+        "26:00:00"
+    )
+
+
+@pytest.mark.unit
+async def test_read_durations_of_version_1() -> None:
+    """Should read a document from before durations were stored as seconds."""
+    competition_format, document = stored("competition_format_individual_sprint")
+    version_1 = (
+        document
+        | json.loads(competition_format.model_dump_json())
+        | {
+            "id": competition_format.id,
+            "schema_version": 1,
+        }
+    )
+    assert version_1["time_between_heats"] == "00:02:30"
+    assert read_document(version_1) == competition_format
+
+
+@pytest.mark.unit
+async def test_read_capacity_stored_before() -> None:
+    """Should leave out a capacity table stored with the format."""
+    competition_format, document = stored("competition_format_individual_sprint")
+    assert isinstance(competition_format, IndividualSprintFormat)
+    assert "capacity" not in document
+    document["capacity"] = capacity_table(competition_format).model_dump()
+    assert read_document(document) == competition_format
+    del document["schema_version"]
+    assert read_document(document) == competition_format
+
+
+@pytest.mark.unit
+async def test_read_migrated_baseline_document() -> None:
+    """Should read a document stored before revisions, before and after migration."""
+    with open("tests/files/competition_format_individual_sprint.json") as file:
+        document = json.load(file) | {"_id": "6612f1c2a1b2c3d4e5f60718"}
+    assert not is_current(document)
+    read = read_document(document)
+    assert read.revision == 0
+
+    # The $set of the migration, as written by the mongo storage:
+    migrated = document | write_document(read) | {"name_key": read.name.lower()}
+    assert is_current(migrated)
+    assert migrated["revision"] == 0
+    assert read_document(migrated) == read
+
+    # A document migrated without its revision is validated instead:
+    del migrated["revision"]
+    assert read_document(migrated) == read
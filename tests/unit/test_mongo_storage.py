@@ -0,0 +1,97 @@
+"""Unit test cases for the mongo storage module."""
+
+import logging
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID, uuid4
+
+import pytest
+from pymongo.errors import OperationFailure
+from pytest_mock import MockFixture
+
+from app.adapters import MongoCompetitionFormatsStorage
+
+DUPLICATE_KEY_ERROR = OperationFailure("E11000 duplicate key error", code=11000)
+UNAUTHORIZED_ERROR = OperationFailure("not authorized", code=13)
+
+
+async def documents(*items: dict) -> AsyncIterator[dict]:
+    """Iterate over documents, as a cursor does."""
+    for item in items:
+        yield item
+
+
+def database(mocker: MockFixture, create_index: Any) -> Any:
+    """Mock a database with names stored before the name keys were introduced."""
+    collection = mocker.MagicMock()
+    collection.find.return_value = documents()
+    collection.aggregate.return_value = documents(
+        {"_id": "sprint", "names": ["Sprint", "SPRINT "]}
+    )
+    collection.update_many = mocker.AsyncMock()
+    collection.create_index = mocker.AsyncMock(side_effect=create_index)
+    return mocker.MagicMock(competition_formats_collection=collection)
+
+
+@pytest.mark.unit
+async def test_init_with_duplicate_names(
+    mocker: MockFixture, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Should report names differing only by case, and start without the unique index."""
+
+    async def create_index(keys: list, **options: Any) -> str:
+        if keys == [("name_key", 1)] and options.get("unique"):
+            raise DUPLICATE_KEY_ERROR
+        return "index"
+
+    storage = MongoCompetitionFormatsStorage(database(mocker, create_index))
+    with caplog.at_level(logging.ERROR, logger="uvicorn.error"):
+        await storage.init()
+    assert "[['Sprint', 'SPRINT ']]" in caplog.text
+    collection = storage.database.competition_formats_collection
+    collection.update_many.assert_awaited_once()
+    assert mocker.call([("updated_at", 1)]) in collection.create_index.call_args_list
+
+
+@pytest.mark.unit
+async def test_init_fails_on_other_errors(mocker: MockFixture) -> None:
+    """Should not start when the unique name index fails for another reason."""
+
+    async def create_index(keys: list, **options: Any) -> str:
+        if keys == [("name_key", 1)] and options.get("unique"):
+            raise UNAUTHORIZED_ERROR
+        return "index"
+
+    storage = MongoCompetitionFormatsStorage(database(mocker, create_index))
+    with pytest.raises(OperationFailure):
+        await storage.init()
+
+
+@pytest.mark.unit
+async def test_poll_changes_sees_deletes(mocker: MockFixture) -> None:
+    """Should see a delete when a format is created in the same poll."""
+    alpha, bravo, charlie = uuid4(), uuid4(), uuid4()
+    stored = [{alpha, bravo}, {alpha, charlie}]
+
+    def find(query: dict, projection: dict) -> Any:
+        cursor = mocker.MagicMock()
+        if query:
+            updated = {"id": charlie, "updated_at": datetime.now(UTC)}
+            cursor.sort.return_value = documents(updated)
+        else:
+            ids = stored.pop(0)
+            cursor.hint.return_value = documents(*({"id": id_} for id_ in ids))
+        return cursor
+
+    collection = mocker.MagicMock()
+    collection.find.side_effect = find
+    mocker.patch("asyncio.sleep", new=mocker.AsyncMock())
+    storage = MongoCompetitionFormatsStorage(
+        mocker.MagicMock(competition_formats_collection=collection)
+    )
+
+    changes = storage._poll_changes(poll_interval=1)  # noqa: SLF001
+    seen: list[UUID] = [await anext(changes), await anext(changes)]
+    assert seen == [charlie, bravo]
+    await changes.aclose()
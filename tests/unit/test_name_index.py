@@ -0,0 +1,49 @@
+"""Unit test cases for the name_index module."""
+
+import re
+
+import pytest
+
+from app.adapters.name_index import (
+    NameSearchMode,
+    name_ngrams,
+    name_query,
+    normalize_name,
+)
+
+
+@pytest.mark.unit
+async def test_normalize_name_folds_case_and_whitespace() -> None:
+    """Should map names differing in case and spacing to the same key."""
+    assert normalize_name("  Individual   SPRINT ") == "individual sprint"
+    assert normalize_name("Straße") == normalize_name("STRASSE")
+
+
+@pytest.mark.unit
+async def test_name_ngrams() -> None:
+    """Should return the distinct trigrams of the key in order."""
+    assert name_ngrams("aaaa") == ["aaa"]
+    assert name_ngrams("sprint") == ["spr", "pri", "rin", "int"]
+    assert name_ngrams("ab") == []
+
+
+@pytest.mark.unit
+async def test_name_query_prefix() -> None:
+    """Should anchor the regex on the normalized, escaped search term."""
+    query = name_query("Sprint (A)", NameSearchMode.Prefix)
+    assert query == {"name_key": {"$regex": f"^{re.escape('sprint (a)')}"}}
+
+
+@pytest.mark.unit
+async def test_name_query_substring() -> None:
+    """Should narrow the candidates with the n-grams of the search term."""
+    query = name_query("Sprint.*", NameSearchMode.Substring)
+    assert query["name_key"] == {"$regex": re.escape("sprint.*")}
+    assert query["name_ngrams"] == {"$all": name_ngrams("sprint.*")}
+    assert re.search(query["name_key"]["$regex"], "individual sprint") is None
+
+
+@pytest.mark.unit
+async def test_name_query_substring_shorter_than_ngram() -> None:
+    """Should match on the name key only."""
+    assert name_query("F1", NameSearchMode.Substring) == {"name_key": {"$regex": "f1"}}
@@ -0,0 +1,75 @@
+"""Unit test cases for the progression-graph module."""
+
+import pytest
+
+from app.models import QUOTA_ALL, QUOTA_REST, RaceConfig
+from app.services import IllegalValueError, compile_race_config
+from app.services.progression_graph import compile_quota
+
+
+@pytest.mark.unit
+def test_compile_race_config() -> None:
+    """Should intern rounds and heats, and give the edges of every node."""
+    graph = compile_race_config(
+        RaceConfig(
+            max_no_of_contestants=16,
+            rounds=["Q", "F"],
+            no_of_heats={"F": {"A": 1, "B": 1, "C": 0}, "Q": {"A": 2}},
+            from_to={
+                "Q": {"A": {"F": {"A": 4, "B": "REST"}}, "C": {"F": {"C": 0}}},
+            },
+        )
+    )
+    assert graph.max_no_of_contestants == 16  # noqa: PLR2004
+    assert graph.rounds == ["Q", "F"]
+    assert graph.heats == ["A", "B", "C"]
+    # Q-A, F-A, F-B, F-C, and Q-C, which is only in from_to:
+    assert graph.node_rounds == [0, 1, 1, 1, 0]
+    assert graph.node_heats == [0, 0, 1, 2, 2]
+    assert graph.node_no_of_heats == [2, 1, 1, 0, 0]
+    assert graph.edge_offsets == [0, 2, 2, 2, 2, 3]
+    assert graph.edge_targets == [1, 2, 3]
+    assert graph.edge_quotas == [4, QUOTA_REST, 0]
+
+
+@pytest.mark.unit
+def test_compile_race_config_all() -> None:
+    """Should encode ALL, and rounds only found in no_of_heats."""
+    graph = compile_race_config(
+        RaceConfig(
+            max_no_of_contestants=7,
+            rounds=["R1"],
+            no_of_heats={"R1": {"A": 1}, "R2": {"A": 1}},
+            from_to={"R1": {"A": {"R2": {"A": "ALL"}}}},
+        )
+    )
+    assert graph.rounds == ["R1", "R2"]
+    assert graph.edge_offsets == [0, 1, 1]
+    assert graph.edge_targets == [1]
+    assert graph.edge_quotas == [QUOTA_ALL]
+
+
+@pytest.mark.unit
+def test_compile_race_config_illegal_quota() -> None:
+    """Should raise IllegalValueError."""
+    with pytest.raises(IllegalValueError, match="SOME"):
+        compile_race_config(
+            RaceConfig(
+                max_no_of_contestants=7,
+                rounds=["R1", "R2"],
+                no_of_heats={"R1": {"A": 1}, "R2": {"A": 1}},
+                from_to={"R1": {"A": {"R2": {"A": "SOME"}}}},
+            )
+        )
+
+
+@pytest.mark.unit
+def test_compile_quota() -> None:
+    """Should read numbers given as strings, and raise on negative numbers."""
+    assert compile_quota("8") == 8  # noqa: PLR2004
+    assert compile_quota(0) == 0
+    assert compile_quota("REST") == QUOTA_REST
+    with pytest.raises(IllegalValueError, match="-1"):
+        compile_quota(QUOTA_ALL)
+    with pytest.raises(IllegalValueError, match="-8"):
+        compile_quota("-8")
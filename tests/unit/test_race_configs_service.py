@@ -0,0 +1,47 @@
+"""Unit test cases for the race-configs-service module."""
+
+import json
+
+import pytest
+
+from app.models import IndividualSprintFormat, RaceConfig
+from app.services import RaceConfigIndex, RaceConfigsService
+
+
+def race_config(max_no_of_contestants: int) -> RaceConfig:
+    """Return a race config with one round, covering max_no_of_contestants."""
+    return RaceConfig(
+        max_no_of_contestants=max_no_of_contestants,
+        rounds=["R1"],
+        no_of_heats={"R1": {"A": 1}},
+        from_to={},
+    )
+
+
+@pytest.mark.unit
+def test_select_race_config() -> None:
+    """Should select the smallest config covering the contestants."""
+    index = RaceConfigIndex([race_config(16), race_config(7), race_config(24)])
+    assert index.thresholds == [7, 16, 24]
+    assert [
+        selected.max_no_of_contestants if selected else None
+        for selected in map(index.select, [1, 7, 8, 16, 17, 24, 25])
+    ] == [7, 7, 16, 16, 24, 24, None]
+    assert RaceConfigIndex([]).select(1) is None
+
+
+@pytest.mark.unit
+def test_index_is_made_once_per_format() -> None:
+    """Should reuse the index of a format, until the format is read again."""
+    with open("tests/files/competition_format_individual_sprint.json") as file:
+        document = json.load(file)
+    competition_format = IndividualSprintFormat.model_validate(document)
+    ranked, non_ranked = RaceConfigsService.index(competition_format)
+    assert ranked.thresholds == sorted(
+        race_config.max_no_of_contestants
+        for race_config in competition_format.race_config_ranked
+    )
+    assert RaceConfigsService.index(competition_format) == (ranked, non_ranked)
+
+    read_again = IndividualSprintFormat.model_validate(document)
+    assert RaceConfigsService.index(read_again)[0] is not ranked